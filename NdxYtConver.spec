@@ -6,7 +6,8 @@ a = Analysis(
     pathex=['.'],
     binaries=[],
     datas=[('core', 'core')],
-    hiddenimports=[],
+    # Se importan dentro de funciones (arranque rápido): declararlos por si acaso
+    hiddenimports=['pytubefix', 'mutagen.mp3', 'mutagen.id3', 'requests', 'webbrowser'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# benchmarks/bench_description.py - DESCRIPCIONES AUTO-GENERATED POR SEGUNDO
+"""
+Mide cuántas descripciones por segundo analiza el core (detección de
+auto-generated + extracción de MusicMetadata) sobre el corpus de
+benchmarks/fixtures/descriptions.json:
+
+  una pasada    core/description.py: parse_description()
+  referencia    implementación anterior (varios recorridos de la descripción
+                y expresiones sin precompilar), para comparar
+
+Antes de medir comprueba que ambas dan exactamente el resultado esperado
+de cada descripción del corpus (título, artistas, álbum, sello, fecha...).
+
+Uso:
+    python benchmarks/bench_description.py [--segundos 2] [--repeticiones 5]
+"""
+import argparse
+import dataclasses
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.description import MusicMetadata, parse_description
+
+CORPUS = Path(__file__).parent / "fixtures" / "descriptions.json"
+
+
+# Funcion de referencia: detección + extracción como estaban antes del parser de una pasada
+def reference_parse(title: str, author: str, description: str):
+    desc_lower, title_lower, author_lower = description.lower(), title.lower(), author.lower()
+    indicators = [
+        'provided to youtube by' in desc_lower,
+        'auto-generated by youtube' in desc_lower,
+        '- topic' in author_lower,
+        'topic' in author_lower and len(author_lower) > 10,
+        'released on:' in desc_lower,
+        any(x in desc_lower for x in ['·', '•', '♪']),
+        'full album' in title_lower or 'complete album' in title_lower,
+    ]
+    if sum(indicators) < 2:
+        return False, None
+
+    lines = [line.strip() for line in description.split('\n') if line.strip()]
+    if len(lines) < 3:
+        return True, None
+
+    metadata = {'song_title': '', 'artists': [], 'album': '', 'release_date': None,
+                'year': None, 'label': None, 'composers': [], 'is_official': True}
+    for line in lines:
+        if 'provided to youtube by' in line.lower():
+            match = re.search(r'Provided to YouTube by\s*(.+)', line, re.IGNORECASE)
+            if match:
+                metadata['label'] = match.group(1).strip()
+                break
+    for line in lines:
+        if '·' in line and len(line) > 10:
+            parts = [p.strip() for p in line.split('·')]
+            metadata['song_title'] = parts[0]
+            unique_artists = []
+            for artist in parts[1:]:
+                if artist and artist not in unique_artists:
+                    unique_artists.append(artist)
+            metadata['artists'] = unique_artists
+            metadata['composers'] = metadata['artists'].copy()
+            break
+    for line in lines:
+        if len(line) > 5 and '·' not in line:
+            if ('provided' not in line.lower() and 'released' not in line.lower()
+                    and 'auto-generated' not in line.lower()):
+                if line != metadata['song_title'] and line not in metadata['artists']:
+                    metadata['album'] = line
+                    break
+    for line in lines:
+        if 'released on:' in line.lower():
+            match = re.search(r'Released on:\s*(.+)', line, re.IGNORECASE)
+            if match:
+                metadata['release_date'] = match.group(1).strip()
+                year_match = re.search(r'(\d{4})', metadata['release_date'])
+                if year_match:
+                    metadata['year'] = year_match.group(1)
+                break
+    if not metadata['song_title']:
+        title_parts = title.split(' - ')
+        if len(title_parts) >= 2:
+            metadata['song_title'] = title_parts[1].split('(')[0].strip()
+        else:
+            metadata['song_title'] = title
+    for key in ('song_title', 'album'):
+        if metadata[key]:
+            text = re.sub(r'\s+', ' ', metadata[key]).strip()
+            text = re.sub(r'\([^)]*\)', '', text)
+            text = re.sub(r'\[[^\]]*\]', '', text)
+            text = re.sub(r'【[^】]*】', '', text)
+            metadata[key] = text.strip()
+    return True, MusicMetadata(**metadata)
+
+
+# Funcion que compara el resultado de un parser con lo esperado en el corpus
+def check(parser, entries) -> int:
+    failures = 0
+    for entry in entries:
+        is_auto, metadata = parser(entry["title"], entry["author"], entry["description"])
+        got = {"is_auto_generated": is_auto,
+               "metadata": dataclasses.asdict(metadata) if metadata else None}
+        if got != entry["expected"]:
+            failures += 1
+            print(f"  DIFERENCIA en {entry['title']!r}: {got} != {entry['expected']}")
+    return failures
+
+
+# Funcion que mide descripciones por segundo (mejor de varias repeticiones)
+def measure(parser, entries, seconds: float, repetitions: int) -> float:
+    inputs = [(entry["title"], entry["author"], entry["description"]) for entry in entries]
+    best = 0.0
+    for _ in range(repetitions):
+        parsed = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            for title, author, description in inputs:
+                parser(title, author, description)
+            parsed += len(inputs)
+        best = max(best, parsed / (time.perf_counter() - started))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Descripciones auto-generated analizadas por segundo")
+    parser.add_argument("--segundos", type=float, default=2, help="Duración de cada repetición")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Repeticiones (se toma la mejor)")
+    args = parser.parse_args()
+
+    entries = json.loads(CORPUS.read_text(encoding="utf-8"))["descriptions"]
+    auto = sum(1 for entry in entries if entry["expected"]["is_auto_generated"])
+    print(f"Corpus: {len(entries)} descripciones ({auto} auto-generated)")
+
+    cases = [("una pasada", parse_description), ("referencia", reference_parse)]
+    failures = sum(check(function, entries) for _, function in cases)
+    if failures:
+        print(f"{failures} resultados distintos de lo esperado")
+        sys.exit(1)
+    print("Resultados idénticos a lo esperado en todo el corpus")
+
+    print(f"{'Parser':<14} {'Descripciones/s':>16} {'us/descripción':>15}")
+    print("-" * 47)
+    rates = {}
+    for name, function in cases:
+        rates[name] = measure(function, entries, args.segundos, args.repeticiones)
+        print(f"{name:<14} {rates[name]:>16,.0f} {1e6 / rates[name]:>15.2f}")
+    print("-" * 47)
+    print(f"Aceleración: x{rates['una pasada'] / rates['referencia']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
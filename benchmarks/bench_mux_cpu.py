@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# benchmarks/bench_mux_cpu.py - TIEMPO DE CPU: RECODIFICAR VS COPIAR (STREAM-COPY)
+"""
+Compara el tiempo de CPU de ffmpeg en cada ruta de procesado del core:
+
+  MP4   audio AAC recodificado (MP4_AUDIO_ENCODER_ARGS)  vs  -c:a copy
+  AUDIO Opus -> MP3 (MP3_ENCODER_ARGS)                   vs  re-empaquetado .opus
+  MP3   cada perfil de core/profiles.py (fast, balanced, archival)
+
+Genera medios sintéticos con ffmpeg (no usa la red) y usa los mismos
+argumentos que core/downloader.py.
+
+Uso:
+    python benchmarks/bench_mux_cpu.py [--segundos 180] [--repeticiones 3]
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.downloader import MP3_ENCODER_ARGS, MP4_AUDIO_ENCODER_ARGS
+from core.profiles import PROFILES
+
+try:
+    import resource
+except ImportError:  # Windows: solo tiempo de reloj
+    resource = None
+
+
+# Funcion que ejecuta ffmpeg y devuelve (cpu, reloj) en segundos
+def run_ffmpeg(args) -> tuple:
+    before = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+    started = time.perf_counter()
+    subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *args], check=True)
+    wall = time.perf_counter() - started
+
+    if before is None:
+        return wall, wall
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return cpu, wall
+
+
+# Funcion que crea video H.264 y audio AAC/Opus sinteticos (como los streams de YouTube)
+def make_sources(workdir: Path, seconds: int) -> dict:
+    video = workdir / "video.mp4"
+    aac = workdir / "audio.m4a"
+    opus = workdir / "audio.webm"
+
+    run_ffmpeg(["-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30:duration={seconds}",
+                "-c:v", "libx264", "-preset", "ultrafast", "-an", str(video)])
+    run_ffmpeg(["-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+                "-ac", "2", "-c:a", "aac", "-b:a", "128k", str(aac)])
+    run_ffmpeg(["-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+                "-ac", "2", "-c:a", "libopus", "-b:a", "160k", str(opus)])
+
+    return {"video": video, "aac": aac, "opus": opus}
+
+
+# Funcion que mide una ruta varias veces y devuelve la mediana
+def measure(args, repetitions: int) -> tuple:
+    samples = sorted(run_ffmpeg(args) for _ in range(repetitions))
+    return samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU de ffmpeg: recodificar vs copiar")
+    parser.add_argument("--segundos", type=int, default=180, help="Duración de los medios de prueba")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por caso (mediana)")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        sys.exit("ffmpeg no está instalado")
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_mux_"))
+    try:
+        print(f"Generando {args.segundos}s de medios de prueba en {workdir}...")
+        src = make_sources(workdir, args.segundos)
+        out_mp4 = str(workdir / "out.mp4")
+
+        cases = [
+            ("mp4   audio recodificado (aac 192k)",
+             ["-i", str(src["video"]), "-i", str(src["aac"]), "-c:v", "copy",
+              *MP4_AUDIO_ENCODER_ARGS, "-shortest", out_mp4]),
+            ("mp4   stream-copy (-c:a copy)",
+             ["-i", str(src["video"]), "-i", str(src["aac"]), "-c:v", "copy",
+              "-c:a", "copy", "-shortest", out_mp4]),
+            ("audio opus -> mp3",
+             ["-i", str(src["opus"]), *MP3_ENCODER_ARGS, "-vn", str(workdir / "out.mp3")]),
+            ("audio re-empaquetado .opus",
+             ["-i", str(src["opus"]), "-vn", "-c:a", "copy", str(workdir / "out.opus")]),
+        ]
+        # Coste de cada perfil de codificación MP3 (con sus hilos)
+        for profile in PROFILES.values():
+            cases.append((f"perfil {profile.name:<9} opus -> mp3",
+                          ["-i", str(src["opus"]), *profile.mp3_args, *profile.output_args(),
+                           "-vn", str(workdir / "out.mp3")]))
+
+        cpu_label = "CPU (s)" if resource else "CPU~reloj (s)"
+        print(f"\n{'Ruta':<40} {cpu_label:>14} {'Reloj (s)':>10}")
+        print("-" * 66)
+        results = {}
+        for name, ffmpeg_args in cases:
+            cpu, wall = measure(ffmpeg_args, args.repeticiones)
+            results[name] = cpu
+            print(f"{name:<40} {cpu:>14.3f} {wall:>10.3f}")
+
+        print("-" * 66)
+        mp4_ratio = results[cases[0][0]] / max(results[cases[1][0]], 1e-6)
+        audio_ratio = results[cases[2][0]] / max(results[cases[3][0]], 1e-6)
+        print(f"MP4:   copiar usa {mp4_ratio:.1f}x menos CPU que recodificar el audio")
+        print(f"Audio: re-empaquetar usa {audio_ratio:.1f}x menos CPU que codificar MP3")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# benchmarks/bench_pipeline.py - PIPELINE COMPLETO SIN RED: DESCARGA, CODIFICACIÓN Y ETIQUETAS
+"""
+Mide core/downloader.py de punta a punta sin tocar YouTube:
+
+  - benchmarks/fixtures/manifest.json es un manifiesto grabado (streams, itags,
+    codecs, descripción de un video auto-generated y thumbnails)
+  - los medios se sintetizan con ffmpeg a partir del manifiesto
+  - un servidor HTTP local (con Range) sirve los streams y los thumbnails
+  - pytubefix.YouTube se sustituye por un objeto que lee el manifiesto
+
+Casos: mp3 y mp4 en cada calidad (1-7). Cada caso corre en un proceso nuevo
+para medir la memoria máxima (RSS) de Python y de ffmpeg por separado.
+Se informan los tiempos por fase (resolución de metadatos, sondeo de
+thumbnails, descarga, ffmpeg, ID3, movido final), el caudal de descarga y
+cuántas veces más rápido que tiempo real va el pipeline.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--segundos 20] [--repeticiones 3] [--casos mp3 mp4-5]
+    python benchmarks/bench_pipeline.py --guardar baseline.json
+    python benchmarks/bench_pipeline.py --comparar baseline.json [--tolerancia 15]
+
+Con --comparar el proceso termina con código 1 si algún caso empeora más
+que la tolerancia (en tiempo total o en memoria).
+"""
+import argparse
+import contextlib
+import functools
+import http.server
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+MANIFEST = Path(__file__).parent / "fixtures" / "manifest.json"
+
+try:
+    import resource
+except ImportError:  # Windows: sin medición de memoria
+    resource = None
+
+CASES = ["mp3"] + [f"mp4-{quality}" for quality in range(1, 8)]
+
+# Fases que se informan (thumbnail se separa de la resolución de metadatos)
+STAGES = ("resolve", "thumbnail", "download", "encode", "tag", "finalize", "total")
+
+# Diferencia mínima (segundos) para contar una regresión de tiempo (ruido en casos cortos)
+MIN_REGRESSION_SECONDS = 0.05
+
+STREAM_EXTENSIONS = {"video/mp4": "mp4", "audio/mp4": "m4a", "audio/webm": "webm"}
+
+
+# Clase que sirve archivos con soporte de Range (como el CDN de YouTube)
+class RangeHandler(http.server.SimpleHTTPRequestHandler):
+    """GET con Range: bytes=a-b y respuesta 206"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), end)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        with open(path, "rb") as source:
+            source.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = source.read(min(remaining, 256 * 1024))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+# Funcion que arranca el servidor local en un puerto libre
+def start_server(directory: Path) -> http.server.ThreadingHTTPServer:
+    handler = functools.partial(RangeHandler, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Funcion que ejecuta ffmpeg en silencio
+def ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *args], check=True)
+
+
+# Funcion que sintetiza los streams y thumbnails del manifiesto
+def make_media(manifest: dict, media_dir: Path, seconds: int):
+    """Genera un archivo por itag (H.264, AAC u Opus) y los JPG de los thumbnails"""
+    streams_dir = media_dir / "streams"
+    streams_dir.mkdir(parents=True, exist_ok=True)
+    sine = ["-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}", "-ac", "2"]
+
+    for spec in manifest["streams"]:
+        output = str(streams_dir / f"{spec['itag']}.{STREAM_EXTENSIONS[spec['mime_type']]}")
+        bitrate = spec.get("abr", "128kbps").replace("kbps", "k")
+
+        if spec["type"] == "audio":
+            codec = "libopus" if spec["mime_type"] == "audio/webm" else "aac"
+            ffmpeg(*sine, "-c:a", codec, "-b:a", bitrate, output)
+            continue
+
+        video = ["-f", "lavfi", "-i",
+                 f"testsrc2=size={spec['size']}:rate={spec.get('fps', 30)}:duration={seconds}"]
+        x264 = ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "32", "-pix_fmt", "yuv420p"]
+        if spec.get("progressive"):
+            ffmpeg(*video, *sine, *x264, "-c:a", "aac", "-b:a", bitrate, "-shortest", output)
+        else:
+            ffmpeg(*video, *x264, "-an", output)
+
+    thumbs_dir = media_dir / "vi" / manifest["video"]["video_id"]
+    thumbs_dir.mkdir(parents=True, exist_ok=True)
+    for name, size in manifest["thumbnails"].items():
+        ffmpeg("-f", "lavfi", "-i", f"testsrc2=size={size}", "-frames:v", "1",
+               str(thumbs_dir / f"{name}.jpg"))
+
+
+# Clase que imita un Stream de pytubefix a partir del manifiesto
+class FakeStream:
+    """Los atributos que usa el core; la descarga va al servidor local"""
+
+    def __init__(self, spec: dict, base_url: str, media_dir: Path):
+        filename = f"{spec['itag']}.{STREAM_EXTENSIONS[spec['mime_type']]}"
+        self.itag = spec["itag"]
+        self.type = spec["type"]
+        self.mime_type = spec["mime_type"]
+        self.subtype = self.mime_type.split("/")[1]
+        self.resolution = spec.get("resolution")
+        self.fps = spec.get("fps")
+        self.abr = spec.get("abr") if spec["type"] == "audio" or spec.get("progressive") else None
+        self.is_progressive = bool(spec.get("progressive"))
+        self.includes_audio_track = self.type == "audio" or self.is_progressive
+        self.codecs = list(spec["codecs"])
+        self.video_codec = self.codecs[0] if self.type == "video" else None
+        self.audio_codec = self.codecs[-1] if self.includes_audio_track else None
+        self.url = f"{base_url}/streams/{filename}"
+        self.filesize = (media_dir / "streams" / filename).stat().st_size
+        self.filesize_mb = self.filesize / (1024 * 1024)
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024):
+        with urllib.request.urlopen(self.url) as response:
+            for chunk in iter(lambda: response.read(chunk_size), b""):
+                yield chunk
+
+    def download(self, output_path: str, filename: str, **kwargs) -> str:
+        destination = os.path.join(output_path, filename)
+        with open(destination, "wb") as output:
+            for chunk in self.iter_chunks():
+                output.write(chunk)
+        return destination
+
+
+# Clase que imita la consulta de streams de pytubefix (filter/order_by/first...)
+class FakeStreamQuery(list):
+    def filter(self, only_audio: bool = False, mime_type=None, res=None, progressive=None, **kwargs):
+        return FakeStreamQuery(
+            s for s in self
+            if (not only_audio or s.type == "audio")
+            and (mime_type is None or s.mime_type == mime_type)
+            and (res is None or s.resolution == res)
+            and (progressive is None or s.is_progressive == progressive))
+
+    def get_by_itag(self, itag):
+        return next((s for s in self if str(s.itag) == str(itag)), None)
+
+    def order_by(self, attribute: str):
+        number = lambda s: int(re.sub(r"\D", "", getattr(s, attribute) or "") or 0)
+        return FakeStreamQuery(sorted((s for s in self if getattr(s, attribute)), key=number))
+
+    def desc(self):
+        return FakeStreamQuery(reversed(self))
+
+    def first(self):
+        return self[0] if self else None
+
+    def last(self):
+        return self[-1] if self else None
+
+
+# Funcion que crea la clase YouTube falsa (reemplaza a pytubefix.YouTube)
+def make_fake_youtube(manifest: dict, base_url: str, media_dir: Path, seconds: int):
+    video = manifest["video"]
+    streams = [FakeStream(spec, base_url, media_dir) for spec in manifest["streams"]]
+
+    class FakeYouTube:
+        def __init__(self, url, on_progress_callback=None, **kwargs):
+            self.watch_url = url
+            self.video_id = video["video_id"]
+            self.title = video["title"]
+            self.author = video["author"]
+            self.description = video["description"]
+            self.views = video["views"]
+            self.publish_date = video["publish_date"]
+            self.length = seconds
+            self.thumbnail_url = f"https://i.ytimg.com/vi/{self.video_id}/hqdefault.jpg"
+            self.streams = FakeStreamQuery(streams)
+
+    return FakeYouTube
+
+
+# Funcion que desvía los thumbnails de i.ytimg.com al servidor local
+def redirect_thumbnails(session, base_url: str):
+    import requests
+
+    class LocalAdapter(requests.adapters.HTTPAdapter):
+        def send(self, request, **kwargs):
+            request.url = base_url + request.path_url
+            return super().send(request, **kwargs)
+
+    session.mount("https://i.ytimg.com/", LocalAdapter())
+
+
+# Funcion que devuelve la memoria máxima (MB) de este proceso
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # Linux informa KB; macOS, bytes
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+# Clase que sigue la memoria máxima de los procesos que lanza el core (ffmpeg)
+class ChildPeakRss:
+    """Muestrea VmHWM en /proc/<pid>/status (solo Linux)
+
+    RUSAGE_CHILDREN no sirve: tras fork() el hijo hereda el máximo del
+    proceso Python, así que ocultaría la memoria real de ffmpeg.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.available = os.path.isdir("/proc/self")
+        self.peak_kb = 0
+        self.interval = interval
+        self._pids = set()
+        self._lock = threading.Lock()
+        if self.available:
+            threading.Thread(target=self._loop, daemon=True).start()
+
+    # Metodo que envuelve subprocess.Popen para seguir cada proceso nuevo
+    def install(self):
+        tracker = self
+        original = subprocess.Popen
+
+        class TrackedPopen(original):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                tracker.watch(self.pid)
+
+        subprocess.Popen = TrackedPopen
+
+    def watch(self, pid: int):
+        if self.available:
+            with self._lock:
+                self._pids.add(pid)
+            self._sample(pid)
+
+    def _sample(self, pid: int) -> bool:
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        self.peak_kb = max(self.peak_kb, int(line.split()[1]))
+                        return True
+        except OSError:
+            pass
+        return False
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                pids = list(self._pids)
+            for pid in pids:
+                if not self._sample(pid):
+                    with self._lock:
+                        self._pids.discard(pid)
+            time.sleep(self.interval)
+
+    # Metodo que devuelve el máximo observado en MB (None si no se puede medir)
+    def peak_mb(self) -> Optional[float]:
+        return round(self.peak_kb / 1024, 1) if self.available else None
+
+
+# Funcion que ejecuta una vez un caso y devuelve sus tiempos por fase
+def run_once(case: str, manifest: dict, base_url: str, media_dir: Path, workdir: Path) -> dict:
+    from core.downloader import YouTubeDownloaderCore
+
+    core = YouTubeDownloaderCore(temp_dir=str(workdir / "temp"), use_cache=False)
+    redirect_thumbnails(core.http, base_url)
+
+    # Medir el sondeo de thumbnails dentro de la resolución de metadatos
+    thumbnail_time = [0.0]
+    probe = core._probe_thumbnail
+
+    def timed_probe(video_id):
+        started = time.perf_counter()
+        try:
+            return probe(video_id)
+        finally:
+            thumbnail_time[0] += time.perf_counter() - started
+
+    core._probe_thumbnail = timed_probe
+
+    url = f"https://www.youtube.com/watch?v={manifest['video']['video_id']}"
+    report = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        if case == "mp3":
+            output = core.download_mp3(url, workdir / "out.mp3", report=report)
+        else:
+            quality = int(case.split("-")[1])
+            output = core.download_mp4(url, quality, workdir / "out.mp4", report=report)
+
+    timings = dict(report["timings"])
+    timings["thumbnail"] = round(thumbnail_time[0], 4)
+    timings["resolve"] = max(0.0, timings.get("resolve", 0.0) - thumbnail_time[0])
+
+    streams = {s["itag"]: s for s in manifest["streams"]}
+    itags = [report.get(key) for key in ("audio_itag", "video_itag") if report.get(key)]
+    downloaded = sum((media_dir / "streams" /
+                      f"{itag}.{STREAM_EXTENSIONS[streams[itag]['mime_type']]}").stat().st_size
+                     for itag in itags)
+
+    result = {stage: timings.get(stage, 0.0) for stage in STAGES}
+    result.update({"bytes": downloaded, "output_bytes": Path(output).stat().st_size,
+                   "path": report.get("path")})
+    shutil.rmtree(workdir / "temp", ignore_errors=True)
+    return result
+
+
+# Funcion que ejecuta un caso (en el proceso hijo) y devuelve la mediana
+def run_case(case: str, media_dir: Path, seconds: int, repetitions: int) -> dict:
+    import pytubefix
+
+    manifest = json.loads(MANIFEST.read_text(encoding="utf-8"))
+    server = start_server(media_dir)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    pytubefix.YouTube = make_fake_youtube(manifest, base_url, media_dir, seconds)
+    children = ChildPeakRss()
+    children.install()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+    try:
+        runs = [run_once(case, manifest, base_url, media_dir, workdir) for _ in range(repetitions)]
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {stage: sorted(run[stage] for run in runs)[len(runs) // 2] for stage in STAGES}
+    result.update({key: runs[0][key] for key in ("bytes", "output_bytes", "path")})
+    result["rss_mb"] = peak_rss_mb()
+    result["ffmpeg_rss_mb"] = children.peak_mb()
+    return result
+
+
+# Funcion que lanza un caso en un proceso nuevo (memoria medida por separado)
+def run_case_isolated(case: str, media_dir: Path, seconds: int, repetitions: int) -> dict:
+    command = [sys.executable, __file__, "--hijo", case, "--medios", str(media_dir),
+               "--segundos", str(seconds), "--repeticiones", str(repetitions)]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Caso {case} falló:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# Funcion que imprime la tabla de resultados
+def print_results(results: dict, seconds: int):
+    header = (f"{'Caso':<8} {'Ruta':<12}" + "".join(f"{stage[:9]:>10}" for stage in STAGES)
+              + f"{'MB/s':>8}{'x real':>8}{'RSS':>7}{'ffmpeg':>8}")
+    print(f"\nTiempos en segundos (mediana), memoria máxima en MB")
+    print(header)
+    print("-" * len(header))
+    for case, r in results.items():
+        speed = r["bytes"] / (1024 * 1024) / r["download"] if r["download"] else 0
+        realtime = seconds / r["total"] if r["total"] else 0
+        rss = "".join(f"{value:>{width}.0f}" if value is not None else f"{'-':>{width}}"
+                      for value, width in ((r["rss_mb"], 7), (r["ffmpeg_rss_mb"], 8)))
+        print(f"{case:<8} {r['path'] or '-':<12}" + "".join(f"{r[stage]:>10.3f}" for stage in STAGES)
+              + f"{speed:>8.1f}{realtime:>8.1f}" + rss)
+
+
+# Funcion que compara contra un baseline guardado; devuelve True si hay regresiones
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    print(f"\nComparación con el baseline (tolerancia {tolerance:.0f}%)")
+    print(f"{'Caso':<8} {'Métrica':<14}{'Antes':>10}{'Ahora':>10}{'Cambio':>9}")
+    print("-" * 52)
+    regressions = False
+    for case, now in results.items():
+        before = baseline.get("casos", {}).get(case)
+        if before is None:
+            print(f"{case:<8} (sin baseline)")
+            continue
+        for metric in ("total", "download", "encode", "tag", "rss_mb", "ffmpeg_rss_mb"):
+            old, new = before.get(metric), now.get(metric)
+            if not old or new is None:
+                continue
+            change = 100.0 * (new - old) / old
+            # Solo el total y la memoria deciden la regresión (las fases cortas son ruidosas)
+            worse = metric in ("total", "rss_mb", "ffmpeg_rss_mb") and change > tolerance
+            if metric == "total" and new - old < MIN_REGRESSION_SECONDS:
+                worse = False
+            regressions |= worse
+            print(f"{case:<8} {metric:<14}{old:>10.3f}{new:>10.3f}{change:>8.1f}%"
+                  + ("  ← REGRESIÓN" if worse else ""))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline completo sin red")
+    parser.add_argument("--segundos", type=int, default=20, help="Duración de los medios sintéticos")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por caso (mediana)")
+    parser.add_argument("--casos", nargs="+", choices=CASES, default=CASES, help="Casos a medir")
+    parser.add_argument("--medios", help="Carpeta con medios ya generados (se reutiliza)")
+    parser.add_argument("--guardar", help="Guardar los resultados como baseline (JSON)")
+    parser.add_argument("--comparar", help="Comparar con un baseline guardado (JSON)")
+    parser.add_argument("--tolerancia", type=float, default=15.0,
+                        help="Porcentaje de empeoramiento admitido al comparar")
+    parser.add_argument("--hijo", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        sys.exit("ffmpeg no está instalado")
+
+    # Proceso hijo: un solo caso, resultado en JSON por stdout
+    if args.hijo:
+        print(json.dumps(run_case(args.hijo, Path(args.medios), args.segundos, args.repeticiones)))
+        return
+
+    manifest = json.loads(MANIFEST.read_text(encoding="utf-8"))
+    media_dir = Path(args.medios) if args.medios else Path(tempfile.mkdtemp(prefix="bench_media_"))
+    try:
+        if not (media_dir / "streams").is_dir():
+            print(f"Generando {args.segundos}s de medios sintéticos en {media_dir}...")
+            make_media(manifest, media_dir, args.segundos)
+
+        results = {}
+        for case in args.casos:
+            print(f"  {case}...", flush=True)
+            results[case] = run_case_isolated(case, media_dir, args.segundos, args.repeticiones)
+    finally:
+        if not args.medios:
+            shutil.rmtree(media_dir, ignore_errors=True)
+
+    print_results(results, args.segundos)
+
+    if args.guardar:
+        Path(args.guardar).write_text(json.dumps({
+            "parametros": {"segundos": args.segundos, "repeticiones": args.repeticiones},
+            "casos": results,
+        }, indent=2), encoding="utf-8")
+        print(f"\nBaseline guardado en {args.guardar}")
+
+    if args.comparar:
+        baseline = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        if baseline.get("parametros", {}).get("segundos") != args.segundos:
+            print("\nAdvertencia: el baseline se midió con otra duración de medios")
+        if compare(results, baseline, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
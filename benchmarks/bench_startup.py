@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# benchmarks/bench_startup.py - TIEMPO DE ARRANQUE: IMPORTS Y CONSTRUCCIÓN DEL CORE
+"""
+Mide el arranque en frío de cada punto de entrada, en procesos nuevos:
+
+  import core.downloader        solo el import del core
+  import cli.main               import del CLI
+  core construido               import + YouTubeDownloaderCLI() (sin sondear ffmpeg)
+  cli/main.py --help            comando completo
+  cli/cliWinVer.py --help       entrada que empaqueta PyInstaller (NdxYtConver)
+
+Con --exe se mide también el ejecutable ya compilado (dist/NdxYtConver/...).
+Informa qué módulos pesados quedan cargados tras el import (deben importarse
+solo al usarse: pytubefix al resolver un video, mutagen al etiquetar,
+requests al descargar) y si se llegó a lanzar ffmpeg.
+
+Uso:
+    python benchmarks/bench_startup.py [--repeticiones 10] [--exe dist/NdxYtConver/NdxYtConver.exe]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Módulos que no deberían cargarse solo por arrancar
+HEAVY_MODULES = ("pytubefix", "mutagen", "requests", "urllib3", "webbrowser", "tkinter")
+
+CONSTRUCT = ("import sys; sys.path.insert(0, '.'); from cli.main import YouTubeDownloaderCLI; "
+             "YouTubeDownloaderCLI()")
+
+LOADED = ("import sys; sys.path.insert(0, '.'); import core.ffmpeg; "
+          "from cli.main import YouTubeDownloaderCLI; YouTubeDownloaderCLI(); "
+          f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules)); "
+          "print(core.ffmpeg._capabilities is not None)")
+
+
+# Funcion que ejecuta un comando en un proceso nuevo y devuelve el tiempo de reloj
+def run_once(cmd) -> float:
+    env = dict(os.environ)
+    # Con .pyc escritos se mide el arranque real (no la compilación)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    started = time.perf_counter()
+    subprocess.run(cmd, cwd=ROOT, env=env, stdin=subprocess.DEVNULL,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - started
+
+
+# Funcion que mide un comando varias veces (tras un calentamiento) y devuelve la mediana
+def measure(cmd, repetitions: int) -> float:
+    run_once(cmd)
+    samples = sorted(run_once(cmd) for _ in range(repetitions))
+    return samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque del CLI y del core")
+    parser.add_argument("--repeticiones", type=int, default=10, help="Procesos por caso (mediana)")
+    parser.add_argument("--exe", help="Ejecutable de PyInstaller a medir (NdxYtConver)")
+    args = parser.parse_args()
+
+    python = sys.executable
+    cases = [
+        ("python (vacío)", [python, "-c", "pass"]),
+        ("import core.downloader", [python, "-c", "import sys; sys.path.insert(0, '.'); import core.downloader"]),
+        ("import cli.main", [python, "-c", "import sys; sys.path.insert(0, '.'); import cli.main"]),
+        ("core construido", [python, "-c", CONSTRUCT]),
+        ("cli/main.py --help", [python, "cli/main.py", "--help"]),
+        ("cli/cliWinVer.py --help", [python, "cli/cliWinVer.py", "--help"]),
+    ]
+    if args.exe:
+        cases.append((f"{Path(args.exe).name} --help", [str(Path(args.exe).resolve()), "--help"]))
+
+    print(f"{'Caso':<32} {'Mediana (ms)':>13} {'Sobre python (ms)':>18}")
+    print("-" * 65)
+    baseline = None
+    for name, cmd in cases:
+        seconds = measure(cmd, args.repeticiones)
+        if baseline is None:
+            baseline = seconds
+        print(f"{name:<32} {seconds * 1000:>13.1f} {(seconds - baseline) * 1000:>18.1f}")
+
+    print("-" * 65)
+    result = subprocess.run([python, "-c", LOADED], cwd=ROOT, capture_output=True, text=True, check=True)
+    loaded, probed = result.stdout.splitlines()[-2:]
+    print(f"Módulos pesados cargados al arrancar: {loaded or 'ninguno'}")
+    print(f"ffmpeg sondeado al arrancar: {'sí' if probed == 'True' else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,13 @@ class InteractiveCLI:
         mp3_parser.add_argument(
             "--no-dialog", action="store_true", help="Sin diálogo de guardar")
         mp3_parser.add_argument("--output", "-o", help="Ruta de salida")
+        mp3_parser.add_argument("--conexiones", "-c", type=int, default=None,
+                                help="Descarga segmentada con N conexiones en paralelo")
+        mp3_parser.add_argument("--original", action="store_true",
+                                help="Guardar el audio original (.opus/.m4a) sin recodificar a MP3")
+        mp3_parser.add_argument("--album", action="store_true",
+                                help="Dividir un álbum completo en un MP3 por pista (capítulos o tiempos de la descripción)")
+        YouTubeDownloaderCLI.add_profile_arguments(mp3_parser)
 
         # MP4
         mp4_parser = subparsers.add_parser(
@@ -42,6 +49,9 @@ class InteractiveCLI:
         mp4_parser.add_argument(
             "--no-dialog", action="store_true", help="Sin diálogo de guardar")
         mp4_parser.add_argument("--output", "-o", help="Ruta de salida")
+        mp4_parser.add_argument("--conexiones", "-c", type=int, default=None,
+                                help="Descarga segmentada con N conexiones en paralelo")
+        YouTubeDownloaderCLI.add_profile_arguments(mp4_parser)
 
         # Info
         info_parser = subparsers.add_parser(
@@ -53,6 +63,11 @@ class InteractiveCLI:
             "streams", help="📊 Mostrar streams", add_help=False)
         streams_parser.add_argument("url", help="URL de YouTube")
 
+        # Batch
+        batch_parser = subparsers.add_parser(
+            "batch", help="📚 Convertir playlist, canal o lista de URLs", add_help=False)
+        YouTubeDownloaderCLI.add_batch_arguments(batch_parser)
+
         return parser
 
     def show_help(self, command=None):
@@ -67,9 +82,18 @@ class InteractiveCLI:
   OPCIONES:
     --no-dialog    Descargar sin abrir diálogo 'Guardar como'
     -o, --output   Ruta específica para guardar el archivo
+    -c, --conexiones <N>  Descarga segmentada con N conexiones
+    --original     Guardar el audio original (.opus/.m4a) sin recodificar
+    --album        Dividir un álbum completo en un MP3 por pista (-o = carpeta)
+    -p, --perfil <fast|balanced|archival>  Perfil de codificación
+    --hilos <N>    Hilos por proceso ffmpeg (0 = automático)
+    --prioridad <0-19>  Prioridad baja de ffmpeg (nice)
     
   EJEMPLOS:
     mp3 https://youtu.be/ejemplo
+    mp3 https://youtu.be/ejemplo --original
+    mp3 https://youtu.be/ejemplo --album -o "C:\\Musica\\Album"
+    mp3 https://youtu.be/ejemplo -p archival
     mp3 https://youtu.be/ejemplo --no-dialog
     mp3 https://youtu.be/ejemplo -o "C:\\Musica\\cancion.mp3"
                 """)
@@ -81,6 +105,10 @@ class InteractiveCLI:
     -q, --calidad <1-7>  Calidad del video (1=baja, 7=alta)
     --no-dialog          Descargar sin abrir diálogo 'Guardar como'
     -o, --output         Ruta específica para guardar el archivo
+    -c, --conexiones <N> Descarga segmentada con N conexiones (1080p/máxima)
+    -p, --perfil <fast|balanced|archival>  Perfil de codificación
+    --hilos <N>          Hilos por proceso ffmpeg (0 = automático)
+    --prioridad <0-19>   Prioridad baja de ffmpeg (nice)
     
   CALIDADES:
     1 = 144p  (baja calidad)
@@ -96,6 +124,28 @@ class InteractiveCLI:
     mp4 https://youtu.be/ejemplo -q 4         # Descarga 480p
     mp4 https://youtu.be/ejemplo --no-dialog  # Descarga sin ventana (Si ya tienes ruta)
                 """)
+            elif command == "batch":
+                print("""
+  batch <PLAYLIST | CANAL | archivo.txt> [opciones]
+  
+  OPCIONES:
+    -f, --formato <mp3|mp4|audio>  Formato (audio = original sin recodificar)
+    -q, --calidad <1-7>      Calidad del video para mp4
+    -d, --destino <carpeta>  Carpeta de salida (default: Descargas)
+    -j, --trabajos <N>       Videos procesándose a la vez (default: 4)
+    --descargas <N>          Máximo de pistas descargándose a la vez
+    --codificadores <N>      Máximo de procesos ffmpeg a la vez
+    -r, --reporte <archivo>  Reporte JSON con el resultado de cada video
+    --saltar-existentes      No volver a convertir archivos que ya existen
+    -p, --perfil <fast|balanced|archival>  Perfil de codificación
+    --hilos <N>              Hilos por proceso ffmpeg (0 = automático)
+    --prioridad <0-19>       Prioridad baja de ffmpeg (nice)
+    
+  EJEMPLOS:
+    batch "https://www.youtube.com/playlist?list=ejemplo" -j 6
+    batch urls.txt -f mp4 -q 5 -d "C:\\Videos"
+    batch urls.txt -p fast --hilos 1 -j 8
+                """)
             elif command == "info":
                 print("""
   info <URL>
@@ -123,12 +173,14 @@ class InteractiveCLI:
   mp4 <URL>      - Descargar video como MP4
   info <URL>     - Mostrar información del video
   streams <URL>  - Mostrar streams disponibles
+  batch <LISTA>  - Convertir playlist, canal o archivo de URLs
 
 💡 Para ayuda específica:
   help mp3      - Ayuda sobre descarga MP3
   help mp4      - Ayuda sobre descarga MP4
   help info     - Ayuda sobre información
   help streams  - Ayuda sobre streams
+  help batch    - Ayuda sobre conversión en lote
 
 🔄 COMANDOS INTERACTIVOS:
   clear, cls    - Limpiar pantalla
@@ -147,13 +199,18 @@ class InteractiveCLI:
 
             # Mostrar banner
             self.app.show_banner()
+            self.app.configure_connections(getattr(parsed_args, "conexiones", None))
+            self.app.configure_profile(parsed_args)
 
             # Ejecutar comando
-            if parsed_args.command == "mp3":
+            if parsed_args.command == "mp3" and parsed_args.album:
+                self.app.download_album(parsed_args.url, parsed_args.output)
+            elif parsed_args.command == "mp3":
                 self.app.download_mp3(
                     parsed_args.url,
                     not parsed_args.no_dialog,
-                    parsed_args.output
+                    parsed_args.output,
+                    parsed_args.original
                 )
             elif parsed_args.command == "mp4":
                 self.app.download_mp4(
@@ -166,6 +223,8 @@ class InteractiveCLI:
                 self.app.show_info(parsed_args.url)
             elif parsed_args.command == "streams":
                 self.app.show_streams(parsed_args.url)
+            elif parsed_args.command == "batch":
+                self.app.download_batch(parsed_args)
 
         except SystemExit:
             # No hacer nada, solo continuar
@@ -216,7 +275,7 @@ Escribe '--help' para ayuda | Ctrl+C para salir
                     # Extraer comando principal si existe
                     command = None
                     for part in parts:
-                        if part in ['mp3', 'mp4', 'info', 'streams']:
+                        if part in ['mp3', 'mp4', 'info', 'streams', 'batch']:
                             command = part
                             break
                     self.show_help(command)
@@ -4,17 +4,21 @@
 import sys
 import argparse
 import subprocess
-import webbrowser
 from pathlib import Path
 import platform
 import tempfile
 import os
+import time
 
 # Agregar el directorio core al path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 
 from core.downloader import YouTubeDownloaderCore, VideoInfo
+from core.batch import BatchRunner, expand_source
+from core.profiles import PROFILES, DEFAULT_PROFILE
+from core.segmented import set_global_connection_limit, GLOBAL_MAX_CONNECTIONS
+from core.progress import ProgressEvent, DOWNLOAD, ENCODE, START, PROGRESS
 class SaveDialog:
     """Maneja los diálogos de guardar archivo según el sistema operativo"""
 
@@ -170,6 +174,76 @@ class SaveDialog:
             print(f"⚠️  No se pudo abrir la carpeta: {e}")
 
 
+class ProgressBar:
+    """Barra de progreso en una línea para los eventos del core"""
+
+    LABELS = {
+        "resolve": "🔎 Preparando",
+        "download": "⬇️  Descargando",
+        "encode": "⚙️  Convirtiendo",
+        "tag": "🏷️  Etiquetando",
+        "finalize": "📁 Guardando",
+    }
+    WIDTH = 30
+
+    def __init__(self):
+        self.tracks = {}
+        self.last_line = ""
+
+    def __call__(self, event: ProgressEvent):
+        """Callback on_progress del core"""
+        label = self.LABELS.get(event.phase, event.phase)
+
+        if event.event == START:
+            self._render(f"{label}...")
+        elif event.event == PROGRESS and event.phase == DOWNLOAD:
+            # Audio y video se descargan a la vez: mostrar la suma
+            self.tracks[event.track] = (event.done, event.total or 0)
+            done = sum(d for d, _ in self.tracks.values())
+            total = sum(t for _, t in self.tracks.values())
+            self._render(f"{label} {self._bar(done, total)} "
+                         f"{done / 1048576:.1f}/{total / 1048576:.1f} MB")
+        elif event.event == PROGRESS and event.phase == ENCODE:
+            self._render(f"{label} {self._bar(event.done, event.total)} "
+                         f"{self._clock(event.done)}/{self._clock(event.total)}")
+
+    # Metodo que cierra la línea de la barra
+    def finish(self):
+        if self.last_line:
+            print()
+            self.last_line = ""
+
+    # Metodo que imprime los tiempos por fase del reporte
+    @staticmethod
+    def print_timings(timings: dict):
+        if not timings:
+            return
+        phases = " | ".join(f"{name} {seconds:.1f}s" for name, seconds in timings.items()
+                            if name != "total")
+        print(f"   ⏱️  Tiempos: {phases} (total {timings.get('total', 0):.1f}s)")
+
+    def _bar(self, done: float, total) -> str:
+        if not total:
+            return "[" + "·" * self.WIDTH + "]"
+        fraction = min(1.0, done / total)
+        filled = int(fraction * self.WIDTH)
+        return f"[{'█' * filled}{'░' * (self.WIDTH - filled)}] {fraction * 100:5.1f}%"
+
+    @staticmethod
+    def _clock(seconds) -> str:
+        if seconds is None:
+            return "--:--"
+        seconds = int(seconds)
+        return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+    def _render(self, line: str):
+        # Rellenar con espacios para borrar restos de la línea anterior
+        padding = max(0, len(self.last_line) - len(line))
+        sys.stdout.write("\r   " + line + " " * padding)
+        sys.stdout.flush()
+        self.last_line = line
+
+
 class YouTubeDownloaderCLI:
     """Interfaz de línea de comandos con diálogo Guardar Como"""
 
@@ -185,9 +259,15 @@ class YouTubeDownloaderCLI:
             epilog="""
 📋 EJEMPLOS DE USO:
   mp3 https://youtu.be/dQw4w9WgXcQ
+  mp3 https://youtu.be/dQw4w9WgXcQ --original
+  mp3 "https://youtu.be/...(Full Album)" --album -o ./discos
   mp4 https://youtu.be/dQw4w9WgXcQ --calidad 5
+  mp4 https://youtu.be/dQw4w9WgXcQ -q 6 --conexiones 8
   info https://youtu.be/dQw4w9WgXcQ
   streams https://youtu.be/dQw4w9WgXcQ
+  batch "https://www.youtube.com/playlist?list=..." --formato mp3 -j 6
+  batch urls.txt --formato mp4 -q 5 --destino ./videos
+  batch urls.txt --perfil fast --hilos 1 -j 8
 
 🎛️  CALIDADES MP4:
   1 = 144p      (baja calidad)
@@ -200,6 +280,10 @@ class YouTubeDownloaderCLI:
 
 💡 CONSEJOS:
   • Usa --no-dialog para descargar directamente sin diálogo
+  • Usa --conexiones N para acelerar videos grandes (1080p / máxima)
+  • batch acepta una playlist, un canal o un archivo con una URL por línea
+  • mp3 --album descarga el álbum una vez y lo divide en pistas etiquetadas (-o = carpeta)
+  • Usa --perfil fast|balanced|archival para elegir velocidad o calidad de codificación
   • La aplicación te preguntará al final si quieres abrir la ubicación y reproducir el archivo
             """
         )
@@ -214,6 +298,13 @@ class YouTubeDownloaderCLI:
                                 help="Descargar sin abrir diálogo 'Guardar como'")
         mp3_parser.add_argument(
             "--output", "-o", help="Ruta específica para guardar")
+        mp3_parser.add_argument("--conexiones", "-c", type=int, default=None,
+                                help="Descarga segmentada con N conexiones en paralelo")
+        mp3_parser.add_argument("--original", action="store_true",
+                                help="Guardar el audio original (.opus/.m4a) sin recodificar a MP3")
+        mp3_parser.add_argument("--album", action="store_true",
+                                help="Dividir un álbum completo en un MP3 por pista (capítulos o tiempos de la descripción)")
+        self.add_profile_arguments(mp3_parser)
 
         # MP4
         mp4_parser = subparsers.add_parser("mp4", help="🎬 Descargar como MP4")
@@ -224,6 +315,9 @@ class YouTubeDownloaderCLI:
                                 help="Descargar sin abrir diálogo 'Guardar como'")
         mp4_parser.add_argument(
             "--output", "-o", help="Ruta específica para guardar")
+        mp4_parser.add_argument("--conexiones", "-c", type=int, default=None,
+                                help="Descarga segmentada con N conexiones en paralelo")
+        self.add_profile_arguments(mp4_parser)
 
         # Info
         info_parser = subparsers.add_parser(
@@ -235,6 +329,11 @@ class YouTubeDownloaderCLI:
             "streams", help="📊 Mostrar streams disponibles")
         streams_parser.add_argument("url", help="URL del video de YouTube")
 
+        # Batch
+        batch_parser = subparsers.add_parser(
+            "batch", help="📚 Convertir una playlist, canal o lista de URLs")
+        self.add_batch_arguments(batch_parser)
+
         args = parser.parse_args()
 
         if not args.command:
@@ -243,12 +342,17 @@ class YouTubeDownloaderCLI:
 
         try:
             self.show_banner()
+            self.configure_connections(getattr(args, "conexiones", None))
+            self.configure_profile(args)
 
-            if args.command == "mp3":
+            if args.command == "mp3" and args.album:
+                self.download_album(args.url, args.output)
+            elif args.command == "mp3":
                 self.download_mp3(
                     args.url,
                     not args.no_dialog,
-                    args.output
+                    args.output,
+                    args.original
                 )
             elif args.command == "mp4":
                 self.download_mp4(
@@ -261,6 +365,8 @@ class YouTubeDownloaderCLI:
                 self.show_info(args.url)
             elif args.command == "streams":
                 self.show_streams(args.url)
+            elif args.command == "batch":
+                self.download_batch(args)
 
         except KeyboardInterrupt:
             print("\n\n⏹️  Operación cancelada por el usuario")
@@ -269,6 +375,64 @@ class YouTubeDownloaderCLI:
         finally:
             self.core.cleanup()
 
+    @staticmethod
+    def add_batch_arguments(batch_parser):
+        """Argumentos del comando batch (compartidos con la versión Windows)"""
+        batch_parser.add_argument(
+            "fuente", help="URL de playlist, URL de canal o archivo .txt con una URL por línea")
+        batch_parser.add_argument("--formato", "-f", choices=["mp3", "mp4", "audio"], default="mp3",
+                                  help="Formato de salida; audio = original .opus/.m4a sin recodificar (default: mp3)")
+        batch_parser.add_argument("--calidad", "-q", type=int, choices=range(1, 8),
+                                  default=5, help="Calidad del video para mp4 (1-7)")
+        batch_parser.add_argument("--destino", "-d", default=None,
+                                  help="Carpeta de salida (default: ~/Downloads)")
+        batch_parser.add_argument("--trabajos", "-j", type=int, default=4,
+                                  help="Videos procesándose a la vez (default: 4)")
+        batch_parser.add_argument("--descargas", type=int, default=None,
+                                  help="Máximo de pistas descargándose a la vez (default: 2 x trabajos)")
+        batch_parser.add_argument("--codificadores", type=int, default=None,
+                                  help="Máximo de procesos ffmpeg a la vez (default: núcleos)")
+        batch_parser.add_argument("--reporte", "-r", default=None,
+                                  help="Ruta del reporte JSON (default: <destino>/reporte_lote.json)")
+        batch_parser.add_argument("--saltar-existentes", action="store_true",
+                                  help="No volver a convertir archivos que ya existen")
+        batch_parser.add_argument("--conexiones", "-c", type=int, default=None,
+                                  help="Descarga segmentada con N conexiones en paralelo")
+        batch_parser.add_argument("--conexiones-totales", type=int, default=None,
+                                  help="Máximo de conexiones HTTP entre todos los videos del lote "
+                                       f"(default: {GLOBAL_MAX_CONNECTIONS})")
+        YouTubeDownloaderCLI.add_profile_arguments(batch_parser)
+
+    @staticmethod
+    def add_profile_arguments(parser):
+        """Perfil de codificación, hilos y prioridad de ffmpeg (mp3, mp4 y batch)"""
+        parser.add_argument("--perfil", "-p", choices=list(PROFILES), default=DEFAULT_PROFILE,
+                            help="fast = rápido, balanced = equilibrado, archival = máxima calidad "
+                                 f"(default: {DEFAULT_PROFILE})")
+        parser.add_argument("--hilos", type=int, default=None,
+                            help="Hilos por proceso ffmpeg (0 = automático; default: el del perfil)")
+        parser.add_argument("--prioridad", type=int, choices=range(0, 20), default=None,
+                            metavar="0-19",
+                            help="Prioridad baja de ffmpeg (nice 0-19; default: la del perfil)")
+
+    def configure_profile(self, args):
+        """Fija el perfil de codificación del core según los argumentos"""
+        if not hasattr(args, "perfil"):
+            return
+        self.core.configure_profile(args.perfil, threads=args.hilos, nice=args.prioridad)
+        profile = self.core.profile
+        threads = profile.threads or "auto"
+        print(f"🎚️  Perfil: {profile.name} (hilos: {threads}, prioridad: {profile.nice})")
+
+    def configure_connections(self, connections: int = None):
+        """Activa la descarga segmentada si se pidieron varias conexiones"""
+        if connections and connections > 1:
+            self.core.segmented = True
+            self.core.connections = min(connections, 16)
+            print(f"🔀 Descarga segmentada: {self.core.connections} conexiones")
+        else:
+            self.core.segmented = False
+
     def show_banner(self):
         """Muestra el banner de la aplicación"""
         banner = """
@@ -277,11 +441,16 @@ class YouTubeDownloaderCLI:
         print(banner)
 
     def download_mp3(self, url: str, use_dialog: bool = True,
-                    output_path: str = None):
-        """Descarga MP3 con diálogo opcional"""
+                    output_path: str = None, original: bool = False):
+        """Descarga MP3 (o el audio original sin recodificar) con diálogo opcional"""
         try:
             print("🎵 OBTENIENDO INFORMACIÓN DEL VIDEO...")
-            info = self.core.get_video_info(url)
+            # Resolver el video una sola vez y reutilizarlo en la descarga
+            video = self.core.resolve(url)
+            info = self.core.get_video_info(video)
+            
+            # Modo original: .opus / .m4a según el codec, sin pasar por el codificador
+            extension = self.core.original_audio_extension(video) if original else ".mp3"
 
             print(f"\n📺 VIDEO: {info.title}")
             print(f"👤 CANAL: {info.author}")
@@ -295,7 +464,7 @@ class YouTubeDownloaderCLI:
                 print(f"\n📂 Abriendo diálogo 'Guardar como'...")
                 default_name = self.core.sanitize_filename(info.title)
                 save_path = self.save_dialog.get_save_path(
-                    default_name, ".mp3")
+                    default_name, extension)
 
                 if not save_path:
                     print("❌ El usuario canceló la operación")
@@ -306,7 +475,7 @@ class YouTubeDownloaderCLI:
                 # Sin diálogo, usar ubicación por defecto
                 downloads = Path.home() / "Downloads"
                 downloads.mkdir(exist_ok=True)
-                default_name = self.core.sanitize_filename(info.title) + ".mp3"
+                default_name = self.core.sanitize_filename(info.title) + extension
                 save_path = downloads / default_name
                 print(f"\n📁 Guardando en: {save_path}")
 
@@ -326,10 +495,19 @@ class YouTubeDownloaderCLI:
                     print(f"📝 Nuevo nombre: {save_path.name}")
 
             # Descargar
-            print(f"\n⬇️  DESCARGANDO MP3...")
-            print("   Esto puede tomar unos momentos...")
-
-            result = self.core.download_mp3(url, save_path)
+            print(f"\n⬇️  DESCARGANDO {extension.lstrip('.').upper()}...")
+
+            report = {}
+            progress = ProgressBar()
+            try:
+                if original:
+                    result = self.core.download_audio(video, save_path, report=report,
+                                                      on_progress=progress)
+                else:
+                    result = self.core.download_mp3(video, save_path, report=report,
+                                                    on_progress=progress)
+            finally:
+                progress.finish()
 
             # Mostrar resultados
             size_mb = result.stat().st_size / (1024 * 1024)
@@ -339,6 +517,9 @@ class YouTubeDownloaderCLI:
             print(f"{'='*60}")
             print(f"   📁 Archivo: {result.name}")
             print(f"   📏 Tamaño: {size_mb:.2f} MB")
+            print(f"   ⚙️  Procesado: {report.get('path', '-')} ({report.get('audio_codec', '-')}, "
+                  f"perfil {report.get('profile', '-')})")
+            ProgressBar.print_timings(report.get('timings'))
             print(f"   📍 Ubicación: {result.parent}")
             print(f"{'='*60}")
 
@@ -366,6 +547,70 @@ class YouTubeDownloaderCLI:
             print(f"\n❌ Error durante la descarga: {e}")
             raise
 
+    def download_album(self, url: str, output_dir: str = None):
+        """Descarga un álbum completo una vez y lo divide en un MP3 por pista"""
+        try:
+            print("💿 OBTENIENDO INFORMACIÓN DEL ÁLBUM...")
+            video = self.core.resolve(url)
+            info = self.core.get_video_info(video)
+            tracks = self.core.get_album_tracks(video)
+
+            print(f"\n📺 VIDEO: {info.title}")
+            print(f"👤 CANAL: {info.author}")
+            print(f"⏱️  DURACIÓN: {info.length_formatted}")
+            if not tracks:
+                print("\n❌ El video no tiene capítulos ni lista de pistas con tiempos")
+                return
+
+            print(f"\n🎼 PISTAS: {len(tracks)}")
+            for track in tracks:
+                minutes, seconds = divmod(int(track.start), 60)
+                print(f"   {track.number:>2}. [{minutes:02d}:{seconds:02d}] {track.title}")
+
+            # Carpeta de destino (por defecto Descargas/Artista - Álbum)
+            if output_dir:
+                save_dir = Path(output_dir)
+            else:
+                artist, album = self.core.album_names(info)
+                save_dir = Path.home() / "Downloads" / self.core.sanitize_filename(f"{artist} - {album}")
+            print(f"\n📁 Guardando en: {save_dir}")
+
+            print(f"\n⬇️  DESCARGANDO ÁLBUM (una descarga, una pasada de ffmpeg)...")
+
+            report = {}
+            progress = ProgressBar()
+            try:
+                results = self.core.download_album(video, save_dir, report=report,
+                                                   on_progress=progress)
+            finally:
+                progress.finish()
+
+            size_mb = sum(result.stat().st_size for result in results) / (1024 * 1024)
+
+            print(f"\n{'='*60}")
+            print("✅ ¡ÁLBUM COMPLETADO!")
+            print(f"{'='*60}")
+            print(f"   🎼 Pistas: {len(results)}")
+            print(f"   📏 Tamaño total: {size_mb:.2f} MB")
+            print(f"   ⚙️  Procesado: {report.get('path', '-')} ({report.get('audio_codec', '-')}, "
+                  f"perfil {report.get('profile', '-')})")
+            ProgressBar.print_timings(report.get('timings'))
+            print(f"   📍 Ubicación: {results[0].parent}")
+            print(f"{'='*60}")
+
+            print("\n" + "="*40)
+            abrir_ubicacion = input(
+                "¿Abrir ubicación de las pistas? (s/n): ").strip().lower()
+            if abrir_ubicacion == 's':
+                print("\n📂 Abriendo carpeta de destino...")
+                self.save_dialog.open_file_location(results[0])
+
+            print("\n👋 ¡Proceso finalizado!")
+
+        except Exception as e:
+            print(f"\n❌ Error durante la descarga: {e}")
+            raise
+
     def download_mp4(self, url: str, quality: int = 5, use_dialog: bool = True,
                     output_path: str = None):
         """Descarga MP4 con diálogo opcional"""
@@ -385,7 +630,8 @@ class YouTubeDownloaderCLI:
             resolution, desc = quality_names.get(quality, ("720p", "HD"))
 
             print(f"🎬 OBTENIENDO INFORMACIÓN ({resolution} - {desc})...")
-            info = self.core.get_video_info(url)
+            video = self.core.resolve(url)
+            info = self.core.get_video_info(video)
 
             print(f"\n📺 VIDEO: {info.title}")
             print(f"👤 CANAL: {info.author}")
@@ -432,9 +678,14 @@ class YouTubeDownloaderCLI:
 
             # Descargar
             print(f"\n⬇️  DESCARGANDO MP4...")
-            print("   Esto puede tomar varios minutos dependiendo del tamaño...")
 
-            result = self.core.download_mp4(url, quality, save_path)
+            report = {}
+            progress = ProgressBar()
+            try:
+                result = self.core.download_mp4(video, quality, save_path, report=report,
+                                                on_progress=progress)
+            finally:
+                progress.finish()
 
             # Mostrar resultados
             size_mb = result.stat().st_size / (1024 * 1024)
@@ -445,6 +696,8 @@ class YouTubeDownloaderCLI:
             print(f"   📁 Archivo: {result.name}")
             print(f"   📏 Tamaño: {size_mb:.2f} MB")
             print(f"   🎬 Resolución: {resolution}")
+            print(f"   ⚙️  Procesado: {report.get('path', '-')} (perfil {report.get('profile', '-')})")
+            ProgressBar.print_timings(report.get('timings'))
             print(f"   📍 Ubicación: {result.parent}")
             print(f"{'='*60}")
 
@@ -472,6 +725,67 @@ class YouTubeDownloaderCLI:
             print(f"\n❌ Error durante la descarga: {e}")
             raise
 
+    def download_batch(self, args):
+        """Convierte todos los videos de una playlist, canal o archivo de URLs"""
+        print("📚 LEYENDO LISTA DE VIDEOS...")
+        urls = expand_source(args.fuente)
+        if not urls:
+            print("❌ No se encontraron videos en la fuente")
+            return
+
+        output_dir = Path(args.destino) if args.destino else Path.home() / "Downloads"
+        report_path = Path(args.reporte) if args.reporte else output_dir / "reporte_lote.json"
+        workers = max(1, args.trabajos)
+
+        # Red y ffmpeg se limitan por separado: la descarga no espera a la CPU
+        network = args.descargas or 2 * workers
+        encoder = args.codificadores or os.cpu_count() or 2
+        self.core.configure_limits(network=network, encoder=encoder)
+        if args.conexiones_totales:
+            set_global_connection_limit(args.conexiones_totales)
+
+        formato = args.formato.upper()
+        print(f"\n🎯 {len(urls)} videos → {formato}"
+              + (f" (calidad {args.calidad})" if args.formato == "mp4" else ""))
+        print(f"⚙️  Trabajos: {workers} | Descargas: {network} | FFmpeg: {encoder}")
+        print(f"📁 Destino: {output_dir}\n")
+
+        icons = {"done": "✅", "skipped": "⏭️ ", "error": "❌", "cancelled": "⏹️ "}
+        started = time.time()
+
+        def progress(done: int, total: int, item):
+            elapsed = time.time() - started
+            name = item.title or item.url
+            path = f" [{item.path}]" if item.path else ""
+            print(f"[{done}/{total}] {icons.get(item.state, '•')} {name}{path} "
+                  f"({item.elapsed:.1f}s) | transcurrido {elapsed:.0f}s")
+            if item.error:
+                print(f"         ↳ {item.error}")
+
+        runner = BatchRunner(self.core, workers=workers, on_progress=progress)
+        items = runner.run(
+            urls,
+            kind=args.formato,
+            quality=args.calidad,
+            output_dir=output_dir,
+            report_path=report_path,
+            skip_existing=args.saltar_existentes
+        )
+
+        ok = sum(1 for item in items if item.state == "done")
+        skipped = sum(1 for item in items if item.state == "skipped")
+        failed = sum(1 for item in items if item.state == "error")
+
+        print(f"\n{'='*60}")
+        print("📚 LOTE TERMINADO")
+        print(f"{'='*60}")
+        print(f"   ✅ Convertidos: {ok}")
+        print(f"   ⏭️  Omitidos: {skipped}")
+        print(f"   ❌ Con error: {failed}")
+        print(f"   ⏱️  Tiempo total: {time.time() - started:.1f}s")
+        print(f"   📄 Reporte: {report_path}")
+        print(f"{'='*60}")
+
     def show_info(self, url: str):
         """Muestra información del video"""
         try:
@@ -493,6 +807,7 @@ class YouTubeDownloaderCLI:
             open_thumb = input(
                 "\n¿Abrir thumbnail en navegador? (s/n): ").strip().lower()
             if open_thumb == 's':
+                import webbrowser
                 webbrowser.open(info.thumbnail_url)
 
         except Exception as e:
@@ -0,0 +1,128 @@
+# core/album.py - DIVISIÓN DE ÁLBUMES COMPLETOS EN PISTAS
+"""
+Lista de pistas de un video "Full Album" a partir de sus capítulos o de
+los tiempos escritos en la descripción.
+
+Formatos de descripción reconocidos (uno por línea, el tiempo es el inicio):
+    00:00 Intro
+    [04:12] Segunda canción
+    3. Tercera canción - 9:58
+    04 - 1:02:30 - Última canción
+"""
+import re
+from dataclasses import dataclass
+from typing import Optional, List, Tuple
+
+from core.description import clean_text
+
+
+# "1:02:30", "04:12" o "4:12" (el primero de la línea marca el inicio de la pista)
+_TIMESTAMP_RE = re.compile(r'(?<![\d:])(?:(\d{1,2}):)?(\d{1,2}):(\d{2})(?![\d:])')
+# Numeración, separadores y corchetes sobrantes alrededor del título
+_LEADING_RE = re.compile(r'^[\s\-–—|:.)\]\[(]*(?:\d{1,3}\s*[.)\-–—:]\s+)?[\s\-–—|:.)\]\[(]*')
+_TRAILING_RE = re.compile(r'[\s\-–—|:(\[]+$')
+# "(Full Album)", "[Complete Album]", "Full Album" suelto en el título del video
+_FULL_ALBUM_RE = re.compile(r'[\(\[【]?\s*(?:full|complete)\s+album\s*[\)\]】]?', re.IGNORECASE)
+
+# Mínimo de pistas para considerar que hay una lista de pistas
+MIN_TRACKS = 2
+
+# Una pista más corta que esto se une a la anterior (tiempos repetidos o erratas)
+MIN_TRACK_SECONDS = 1.0
+
+
+# Dataclase con una pista del álbum
+@dataclass
+class AlbumTrack:
+    """Pista del álbum: número (desde 1), título e inicio/fin en segundos"""
+    number: int
+    title: str
+    start: float
+    end: Optional[float] = None
+
+
+# Funcion que convierte una coincidencia de _TIMESTAMP_RE en segundos
+def _to_seconds(match: "re.Match") -> int:
+    hours, minutes, seconds = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+# Funcion que limpia el título de una pista (numeración, separadores, corchetes)
+def _track_title(text: str) -> str:
+    text = _LEADING_RE.sub('', text.strip())
+    text = _TRAILING_RE.sub('', text)
+    return text.strip()
+
+
+# Funcion que ordena los inicios y arma las pistas numeradas
+def _build_tracks(entries: List[Tuple[float, str]], duration: Optional[float]) -> List[AlbumTrack]:
+    """Descarta inicios fuera del video o sin avance; la primera pista empieza en 0"""
+    tracks: List[AlbumTrack] = []
+    for start, title in entries:
+        if duration and start >= duration:
+            break
+        if tracks and start - tracks[-1].start < MIN_TRACK_SECONDS:
+            # Los tiempos deben crecer: una lista desordenada no es un tracklist
+            if start < tracks[-1].start:
+                return []
+            continue
+        tracks.append(AlbumTrack(number=len(tracks) + 1, title=title, start=float(start)))
+
+    if len(tracks) < MIN_TRACKS:
+        return []
+
+    tracks[0].start = 0.0
+    for track, following in zip(tracks, tracks[1:]):
+        track.end = following.start
+    tracks[-1].end = float(duration) if duration else None
+
+    for track in tracks:
+        if not track.title:
+            track.title = f"Track {track.number:02d}"
+    return tracks
+
+
+# Funcion que extrae las pistas de los tiempos escritos en la descripción
+def parse_timestamps(description: str, duration: Optional[float] = None) -> List[AlbumTrack]:
+    """Una línea por pista con su tiempo de inicio; [] si no hay lista de pistas"""
+    entries = []
+    for line in description.split('\n'):
+        match = _TIMESTAMP_RE.search(line)
+        if match is None:
+            continue
+        # El título es lo que queda a un lado del tiempo (antes o después)
+        before, after = line[:match.start()], line[match.end():]
+        title = _track_title(after) or _track_title(before)
+        entries.append((_to_seconds(match), clean_text(title) if title else ''))
+    return _build_tracks(entries, duration)
+
+
+# Funcion que convierte los capítulos de pytubefix en pistas
+def parse_chapters(chapters, duration: Optional[float] = None) -> List[AlbumTrack]:
+    """chapters: objetos con title y start_seconds (yt.chapters)"""
+    entries = [(chapter.start_seconds, clean_text(chapter.title or '')) for chapter in chapters or []]
+    return _build_tracks(entries, duration)
+
+
+# Funcion que obtiene las pistas del video: capítulos primero, luego la descripción
+def find_tracks(yt, duration: Optional[float] = None) -> List[AlbumTrack]:
+    """[] si el video no tiene ni capítulos ni tiempos en la descripción"""
+    try:
+        tracks = parse_chapters(yt.chapters, duration)
+    except Exception as e:
+        print(f"Advertencia leyendo capítulos: {e}")
+        tracks = []
+    if not tracks:
+        tracks = parse_timestamps(yt.description or '', duration)
+    return tracks
+
+
+# Funcion que deduce artista y nombre del álbum del título del video
+def album_from_title(title: str, author: str) -> Tuple[str, str]:
+    """"Artista - Álbum (Full Album)" -> (artista, álbum); si no, (canal, título limpio)"""
+    name = clean_text(_FULL_ALBUM_RE.sub('', title))
+    artist = author[:-len(" - Topic")] if author.endswith(" - Topic") else author
+    parts = [part.strip() for part in name.split(' - ') if part.strip()]
+    if len(parts) >= 2:
+        return parts[0], ' - '.join(parts[1:])
+    return artist, name or title
@@ -0,0 +1,533 @@
+# core/asyncdownloader.py - CORE ASÍNCRONO (ASYNCIO): INFO, STREAMS, MP3 Y MP4
+import asyncio
+import collections
+import contextlib
+import functools
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple, Dict, List, Union, Callable, Awaitable, TYPE_CHECKING
+
+from core.cache import extract_video_id
+from core.downloader import YouTubeDownloaderCore, VideoContext, VideoInfo, THUMBNAIL_CANDIDATES
+from core.ffmpeg import (FFmpegError, classify_ffmpeg_error, MAX_ATTEMPTS as FFMPEG_MAX_ATTEMPTS,
+                         STDERR_TAIL_LINES, CORRUPT_INPUT, EMPTY_OUTPUT)
+from core.profiles import EncoderProfile, apply_priority
+from core.progress import (ProgressTracker, ProgressEvent, parse_ffmpeg_progress,
+                           RESOLVE, DOWNLOAD, ENCODE, TAG, FINALIZE)
+from core.segmented import split_ranges, DEFAULT_CHUNK_SIZE, READ_SIZE
+
+# httpx se importa al crear el cliente (no es necesario para arrancar el servidor)
+if TYPE_CHECKING:
+    import httpx
+
+# Hilos para lo que sigue siendo bloqueante: pytubefix (metadatos) y mutagen (ID3)
+BLOCKING_WORKERS = 4
+
+
+# Clase con la misma lógica que YouTubeDownloaderCore pero con corutinas
+class AsyncYouTubeDownloaderCore:
+    """Info, streams, MP3 y MP4 sin bloquear el event loop
+
+    La red (thumbnails y pistas) va por httpx.AsyncClient y ffmpeg por
+    asyncio.create_subprocess_exec, así que un solo loop atiende cientos de
+    trabajos a la vez. Solo pytubefix y mutagen, que no tienen API async,
+    corren en un pool pequeño de hilos. La selección de streams, los perfiles,
+    el cache de metadatos, las etiquetas y las carpetas de trabajo se comparten
+    con el core síncrono.
+
+    Cancelar la tarea (task.cancel()) mata ffmpeg, cierra las conexiones y
+    borra la carpeta del trabajo.
+    """
+
+    def __init__(self, core: Optional[YouTubeDownloaderCore] = None, connections: int = 1,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, max_retries: int = 3,
+                 timeout: float = 15, blocking_workers: int = BLOCKING_WORKERS):
+        self.core = core or YouTubeDownloaderCore()
+        # Conexiones por pista (rangos en paralelo)
+        self.connections = max(1, connections)
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._executor = ThreadPoolExecutor(max_workers=blocking_workers,
+                                            thread_name_prefix="ndx-async")
+        self._network_slots: Optional[asyncio.Semaphore] = None
+        self._encoder_slots: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncYouTubeDownloaderCore":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    # Metodo para limitar cuantas pistas se descargan y cuantos ffmpeg corren a la vez
+    def configure_limits(self, network: Optional[int] = None, encoder: Optional[int] = None):
+        """Igual que en el core síncrono, con semáforos de asyncio (None = sin límite)"""
+        self._network_slots = asyncio.Semaphore(network) if network else None
+        self._encoder_slots = asyncio.Semaphore(encoder) if encoder else None
+
+    # Propiedad con el cliente HTTP async (se crea al primer uso, dentro del loop)
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True)
+        return self._client
+
+    # Metodo que cierra el cliente HTTP y el pool de hilos
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._executor.shutdown(wait=False)
+
+    # Metodo interno: ejecuta una función bloqueante en el pool propio
+    async def _blocking(self, func: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    # Metodo que reserva un hueco de red
+    def _network_slot(self):
+        return self._network_slots or contextlib.nullcontext()
+
+    # Metodo que reserva un hueco de ffmpeg
+    def _encoder_slot(self):
+        return self._encoder_slots or contextlib.nullcontext()
+
+    # Metodo que resuelve el video (pytubefix, en un hilo)
+    async def resolve(self, url: str, record: bool = True) -> VideoContext:
+        return await self._blocking(self.core.resolve, url, record)
+
+    # Metodo que acepta una URL o un contexto ya resuelto
+    async def _get_context(self, source: Union[str, VideoContext], record: bool = True) -> VideoContext:
+        if isinstance(source, VideoContext):
+            return source
+        return await self.resolve(source, record)
+
+    # Metodo encargado de conseguir la informacion de video
+    async def get_video_info(self, url: Union[str, VideoContext]) -> VideoInfo:
+        """Como get_video_info(): los thumbnails se sondean mientras pytubefix lee los metadatos"""
+        try:
+            cache = self.core.cache
+            if isinstance(url, str) and cache is not None:
+                cached_info = cache.get_info(extract_video_id(url))
+                if cached_info is not None:
+                    return cached_info
+
+            # El fallo ya se contó arriba: resolver sin volver a contarlo
+            ctx = await self._get_context(url, record=False)
+            if ctx.video_info is not None:
+                return ctx.video_info
+
+            # El video_id sale de la URL: el sondeo no espera a pytubefix
+            video_id = extract_video_id(ctx.url)
+            probe = asyncio.ensure_future(self._probe_thumbnail(video_id)) if video_id else None
+            try:
+                video_info = await self._blocking(self.core._build_video_info, ctx.yt)
+                if probe is None:
+                    probe = asyncio.ensure_future(self._probe_thumbnail(video_info.video_id))
+                thumbnail_url, thumbnail_data = await probe
+            except BaseException:
+                if probe is not None:
+                    probe.cancel()
+                raise
+
+            if thumbnail_url is not None:
+                video_info.thumbnail_url = thumbnail_url
+                video_info.thumbnail_data = thumbnail_data
+
+            ctx.video_info = video_info
+            if cache is not None:
+                cache.put(video_info.video_id, ctx)
+
+            return video_info
+
+        except Exception as e:
+            raise Exception(f"Error obteniendo info: {str(e)}")
+
+    # Metodo que sondea los thumbnails candidatos a la vez
+    async def _probe_thumbnail(self, video_id: str) -> Tuple[Optional[str], Optional[bytes]]:
+        """Devuelve (url, bytes) del mejor thumbnail; solo se lee el cuerpo del ganador"""
+        import httpx
+        candidates = [f"https://i.ytimg.com/vi/{video_id}/{name}.jpg"
+                      for name in THUMBNAIL_CANDIDATES]
+
+        async def fetch(thumb_url):
+            try:
+                request = self.client.build_request("GET", thumb_url, timeout=3)
+                return await self.client.send(request, stream=True)
+            except httpx.HTTPError:
+                return None
+
+        responses = await asyncio.gather(*(fetch(thumb_url) for thumb_url in candidates))
+
+        winner_url, winner_data = None, None
+        try:
+            for thumb_url, response in zip(candidates, responses):
+                if response is not None and winner_url is None and response.status_code == 200:
+                    try:
+                        winner_data = await response.aread()
+                        winner_url = thumb_url
+                    except httpx.HTTPError:
+                        pass
+        finally:
+            for response in responses:
+                if response is not None:
+                    await response.aclose()
+
+        return winner_url, winner_data
+
+    # Metodo que descarga la portada si no se guardó al sondear
+    async def _fetch_thumbnail(self, video_info: VideoInfo) -> Optional[bytes]:
+        if video_info.thumbnail_data:
+            return video_info.thumbnail_data
+        import httpx
+        try:
+            response = await self.client.get(video_info.thumbnail_url, timeout=5)
+            if response.status_code == 200:
+                video_info.thumbnail_data = response.content
+        except httpx.HTTPError:
+            pass
+        return video_info.thumbnail_data
+
+    # Metodo que genera la cabecera ID3 para un MP3 en streaming
+    async def render_id3_header(self, video_info: VideoInfo) -> bytes:
+        thumbnail_data = await self._fetch_thumbnail(video_info)
+        return await self._blocking(self.core.render_id3_header, video_info, thumbnail_data)
+
+    # Metodo para obtener los streams disponibles de un video
+    async def get_available_streams(self, url: Union[str, VideoContext]) -> list:
+        return await self._blocking(self.core.get_available_streams, url)
+
+    # Metodo interno: URL y tamaño de un stream (pytubefix puede consultar la red)
+    def _stream_source(self, stream) -> Tuple[str, int]:
+        return stream.url, stream.filesize
+
+    # Metodo que descarga una pista por rangos con httpx
+    async def _download_stream(self, stream, destination: Path,
+                               progress: Optional[ProgressTracker] = None, track: str = "audio") -> Path:
+        """Rangos en orden (o en paralelo con connections > 1) escritos en su posición"""
+        url, filesize = await self._blocking(self._stream_source, stream)
+
+        async with self._network_slot():
+            if not filesize:
+                await self._download_whole(url, destination, progress, track)
+                return destination
+
+            slots = asyncio.Semaphore(self.connections)
+
+            # Las escrituras son cortas y no se intercalan (el loop es de un solo hilo)
+            with open(destination, "wb") as output:
+                async def fetch(start: int, end: int):
+                    async with slots:
+                        await self._fetch_range(url, start, end, output, filesize, progress, track)
+
+                await gather_or_cancel(*(fetch(start, end) for start, end
+                                         in split_ranges(filesize, self.chunk_size)))
+
+        return destination
+
+    # Metodo interno: un rango con reintentos desde el último byte recibido
+    async def _fetch_range(self, url: str, start: int, end: int, output, filesize: int,
+                           progress: Optional[ProgressTracker], track: str):
+        position = start
+        attempt = 0
+        while position <= end:
+            try:
+                async with self.client.stream("GET", url,
+                                              headers={"Range": f"bytes={position}-{end}"}) as response:
+                    if response.status_code != 206:
+                        raise Exception(f"Respuesta HTTP {response.status_code} (se esperaba 206)")
+                    async for chunk in response.aiter_bytes(READ_SIZE):
+                        chunk = chunk[:end + 1 - position]
+                        output.seek(position)
+                        output.write(chunk)
+                        position += len(chunk)
+                        if progress is not None:
+                            progress.add_bytes(track, len(chunk), filesize)
+
+                if position <= end:
+                    raise IOError(f"Rango incompleto: {position}/{end + 1} bytes")
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise Exception(f"Rango {start}-{end} falló tras {attempt} intentos: {e}")
+                await asyncio.sleep(min(2 ** (attempt - 1) * 0.5, 5))
+
+    # Metodo interno: descarga sin tamaño conocido (una sola petición)
+    async def _download_whole(self, url: str, destination: Path,
+                              progress: Optional[ProgressTracker], track: str):
+        async with self.client.stream("GET", url) as response:
+            response.raise_for_status()
+            with open(destination, "wb") as output:
+                async for chunk in response.aiter_bytes(READ_SIZE):
+                    output.write(chunk)
+                    if progress is not None:
+                        progress.add_bytes(track, len(chunk))
+
+    # Metodo que ejecuta ffmpeg y comprueba que haya terminado bien
+    async def _run_ffmpeg(self, ffmpeg_cmd: List[str], profile: EncoderProfile,
+                          progress: Optional[ProgressTracker] = None,
+                          duration: Optional[float] = None,
+                          output: Optional[Path] = None):
+        """Mismo contrato que el core síncrono: FFmpegError clasificado y reintentos"""
+        for attempt in range(1, FFMPEG_MAX_ATTEMPTS + 1):
+            try:
+                await self._run_ffmpeg_once(ffmpeg_cmd, profile, progress, duration)
+                break
+            except FFmpegError as e:
+                if not e.retryable or attempt == FFMPEG_MAX_ATTEMPTS:
+                    raise
+                print(f"Reintentando ffmpeg ({attempt}/{FFMPEG_MAX_ATTEMPTS}): {e}")
+
+        if output is not None and (not output.exists() or output.stat().st_size == 0):
+            raise FFmpegError(EMPTY_OUTPUT)
+
+    # Metodo interno: un intento de ffmpeg como subproceso de asyncio
+    async def _run_ffmpeg_once(self, ffmpeg_cmd: List[str], profile: EncoderProfile,
+                               progress: Optional[ProgressTracker] = None,
+                               duration: Optional[float] = None):
+        process = await asyncio.create_subprocess_exec(
+            ffmpeg_cmd[0], "-hide_banner", "-loglevel", "error", "-progress", "pipe:1", "-nostats",
+            *ffmpeg_cmd[1:],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        apply_priority(process, profile)
+
+        async def read_progress():
+            async for raw in process.stdout:
+                seconds = parse_ffmpeg_progress(raw)
+                if seconds is not None and progress is not None:
+                    progress.set_position(seconds, duration)
+
+        async def read_stderr() -> List[str]:
+            tail = collections.deque(maxlen=STDERR_TAIL_LINES)
+            async for raw in process.stderr:
+                line = raw.decode("utf-8", "replace").strip()
+                if line:
+                    tail.append(line)
+            return list(tail)
+
+        try:
+            _, lines = await asyncio.gather(read_progress(), read_stderr())
+            returncode = await process.wait()
+        except BaseException:
+            # Cancelado o fallo al leer: ffmpeg no puede quedar vivo escribiendo en el workspace
+            await self._kill_ffmpeg(process)
+            raise
+
+        if returncode != 0:
+            raise FFmpegError(classify_ffmpeg_error(returncode, lines), returncode, lines)
+
+    # Metodo interno: mata ffmpeg y espera a que termine (sin zombis)
+    async def _kill_ffmpeg(self, process: "asyncio.subprocess.Process"):
+        """Se espera al proceso aunque la tarea se vuelva a cancelar mientras tanto"""
+        if process.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                process.kill()
+        waiter = asyncio.ensure_future(process.wait())
+        while not waiter.done():
+            try:
+                await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                continue
+
+    # Metodo que descarga y procesa; si ffmpeg ve la entrada corrupta, descarga de nuevo una vez
+    async def _fetch_and_encode(self, fetch: Callable[[], Awaitable], encode: Callable[[], Awaitable],
+                                tracker: ProgressTracker):
+        for attempt in range(2):
+            with tracker.phase(DOWNLOAD):
+                await fetch()
+            try:
+                return await encode()
+            except FFmpegError as e:
+                if e.kind != CORRUPT_INPUT or attempt > 0:
+                    raise
+                print(f"Entrada corrupta, se vuelve a descargar: {e}")
+
+    # Metodo interno: elige el audio para MP3 (pytubefix puede leer el manifiesto)
+    def _select_mp3_audio(self, ctx: VideoContext, video_info: VideoInfo):
+        stream = self.core._get_best_audio_stream(ctx.yt, video_info.is_auto_generated)
+        return stream, self.core._get_audio_extension(stream)
+
+    # Metodo que descarga y convierte a MP3 con metadatos
+    async def download_mp3(self, url: Union[str, VideoContext], output_path: Optional[Path] = None,
+                           preserve_metadata: bool = True,
+                           report: Optional[Dict] = None,
+                           profile: Union[str, EncoderProfile, None] = None,
+                           on_progress: Optional[Callable[[ProgressEvent], None]] = None) -> Path:
+        """Equivalente async de download_mp3 (report, profile y on_progress iguales)"""
+        tracker = ProgressTracker(on_progress)
+        try:
+            encoder_profile = self.core._resolve_profile(profile)
+            await self._blocking(self.core._require_ffmpeg, encoder_profile.mp3_args)
+            with tracker.phase(RESOLVE):
+                ctx = await self._get_context(url)
+                video_info = await self.get_video_info(ctx)
+                thumbnail_data = await self._fetch_thumbnail(video_info) if preserve_metadata else None
+                audio_stream, extension = await self._blocking(self._select_mp3_audio, ctx, video_info)
+
+            print(f"Descargando audio: {audio_stream.abr} ({audio_stream.mime_type})")
+
+            if report is not None:
+                report.update({
+                    'path': 'transcode',
+                    'audio_itag': audio_stream.itag,
+                    'audio_codec': self.core._audio_codec(audio_stream),
+                    'profile': encoder_profile.name,
+                })
+
+            # La carpeta del trabajo se borra también si la tarea se cancela
+            with self.core.workspace() as ws:
+                temp_audio = ws.file(f"audio.{extension}")
+                temp_mp3 = ws.file("audio.mp3")
+
+                ffmpeg_cmd = [
+                    "ffmpeg", "-y", "-i", str(temp_audio),
+                    *encoder_profile.mp3_args,
+                    *encoder_profile.output_args(),
+                    "-vn", str(temp_mp3)
+                ]
+
+                async def fetch():
+                    await self._download_stream(audio_stream, temp_audio, tracker, "audio")
+
+                async def encode():
+                    async with self._encoder_slot():
+                        with tracker.phase(ENCODE):
+                            await self._run_ffmpeg(ffmpeg_cmd, encoder_profile, tracker,
+                                                   video_info.duration, output=temp_mp3)
+
+                await self._fetch_and_encode(fetch, encode, tracker)
+
+                with tracker.phase(TAG):
+                    if preserve_metadata:
+                        await self._blocking(self.core._tag_mp3, temp_mp3, video_info, thumbnail_data)
+
+                if output_path is None:
+                    output_path = Path.cwd() / self.core.suggest_filename(video_info, ".mp3",
+                                                                          with_artist=True)
+
+                with tracker.phase(FINALIZE):
+                    await self._blocking(shutil.move, str(temp_mp3), str(output_path))
+
+            return output_path
+
+        except FFmpegError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error descargando MP3: {str(e)}")
+        finally:
+            if report is not None:
+                report['timings'] = tracker.summary()
+
+    # Metodo interno: elige video y audio para MP4 (pytubefix puede leer el manifiesto)
+    def _select_mp4_streams(self, ctx: VideoContext, video_info: VideoInfo, quality: int,
+                            profile: EncoderProfile):
+        video_stream, resolution = self.core._select_video_stream(ctx.yt, quality)
+        if not video_stream:
+            raise Exception(f"No se encontró video en {resolution}")
+        if video_stream.is_progressive:
+            return video_stream, resolution, None, None, None, None
+
+        audio_stream = self.core._get_mux_audio_stream(ctx.yt, video_info.is_auto_generated)
+        audio_args, path = self.core._mp4_audio_args(audio_stream, profile)
+        self.core._require_ffmpeg(audio_args)
+        return (video_stream, resolution, audio_stream, self.core._get_audio_extension(audio_stream),
+                audio_args, path)
+
+    # Metodo que descarga y convierte a MP4 en la calidad pedida
+    async def download_mp4(self, url: Union[str, VideoContext], quality: int = 5,
+                           output_path: Optional[Path] = None,
+                           report: Optional[Dict] = None,
+                           profile: Union[str, EncoderProfile, None] = None,
+                           on_progress: Optional[Callable[[ProgressEvent], None]] = None) -> Path:
+        """Equivalente async de download_mp4: pistas en paralelo y mezcla sin recodificar el video"""
+        report = report if report is not None else {}
+        tracker = ProgressTracker(on_progress)
+        try:
+            encoder_profile = self.core._resolve_profile(profile)
+            report['profile'] = encoder_profile.name
+
+            with tracker.phase(RESOLVE):
+                ctx = await self._get_context(url)
+                video_info = await self.get_video_info(ctx)
+                (video_stream, resolution, audio_stream, extension,
+                 audio_args, path) = await self._blocking(self._select_mp4_streams, ctx, video_info,
+                                                          quality, encoder_profile)
+
+            if output_path is None:
+                output_path = Path.cwd() / self.core.suggest_filename(video_info, ".mp4",
+                                                                      suffix=f"_{resolution}")
+
+            with self.core.workspace() as ws:
+                temp_video = ws.file("video.mp4")
+
+                # Progresivo: ya trae audio, solo descargar y mover
+                if video_stream.is_progressive:
+                    report.update({'path': 'progressive', 'video_itag': video_stream.itag})
+                    with tracker.phase(DOWNLOAD):
+                        await self._download_stream(video_stream, temp_video, tracker, "video")
+                    with tracker.phase(FINALIZE):
+                        await self._blocking(shutil.move, str(temp_video), str(output_path))
+                    return output_path
+
+                temp_audio = ws.file(f"audio.{extension}")
+                temp_combined = ws.file("combined.mp4")
+                report.update({
+                    'path': path,
+                    'video_itag': video_stream.itag,
+                    'audio_itag': audio_stream.itag,
+                    'audio_codec': self.core._audio_codec(audio_stream),
+                })
+
+                ffmpeg_cmd = [
+                    "ffmpeg", "-y",
+                    "-i", str(temp_video),
+                    "-i", str(temp_audio),
+                    "-c:v", "copy",
+                    *audio_args,
+                    *encoder_profile.output_args(),
+                    "-shortest",
+                    str(temp_combined)
+                ]
+
+                async def fetch():
+                    await gather_or_cancel(
+                        self._download_stream(audio_stream, temp_audio, tracker, "audio"),
+                        self._download_stream(video_stream, temp_video, tracker, "video"))
+
+                async def mux():
+                    async with self._encoder_slot():
+                        with tracker.phase(ENCODE):
+                            await self._run_ffmpeg(ffmpeg_cmd, encoder_profile, tracker,
+                                                   video_info.duration, output=temp_combined)
+
+                await self._fetch_and_encode(fetch, mux, tracker)
+
+                with tracker.phase(FINALIZE):
+                    await self._blocking(shutil.move, str(temp_combined), str(output_path))
+
+            return output_path
+
+        except FFmpegError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error descargando MP4: {str(e)}")
+        finally:
+            report['timings'] = tracker.summary()
+
+
+# Funcion que espera varias corutinas y cancela el resto si una falla
+async def gather_or_cancel(*coroutines: Awaitable) -> list:
+    """Como asyncio.gather, pero sin dejar tareas huérfanas (cierran archivos y conexiones)"""
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -0,0 +1,246 @@
+# core/batch.py - CONVERSIÓN EN LOTE (PLAYLISTS, CANALES Y LISTAS DE URLS)
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, List, Dict, Callable
+
+from core.cache import extract_video_id
+from core.segmented import DownloadCancelled
+
+
+# Estados de cada elemento del lote
+PENDING = "pending"
+DONE = "done"
+SKIPPED = "skipped"
+ERROR = "error"
+CANCELLED = "cancelled"
+
+_CHANNEL_URL = re.compile(r'youtube\.com/(?:@|channel/|c/|user/)')
+
+
+# Funcion que convierte la fuente del lote en una lista de URLs de video
+def expand_source(source: str) -> List[str]:
+    """Acepta un archivo de URLs (una por línea), una playlist, un canal o una URL suelta"""
+    source = source.strip()
+    path = Path(source)
+
+    if path.is_file():
+        urls = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                urls.append(line)
+    elif "list=" in source:
+        from pytubefix import Playlist
+        urls = list(Playlist(source).video_urls)
+    elif _CHANNEL_URL.search(source):
+        from pytubefix import Channel
+        urls = list(Channel(source).video_urls)
+    else:
+        urls = [source]
+
+    # Quitar repetidos (mismo video con distinta forma de URL)
+    unique = []
+    seen = set()
+    for url in urls:
+        key = extract_video_id(url) or url
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
+
+
+# Dataclase con el resultado de un elemento del lote
+@dataclass
+class BatchItem:
+    """Resultado de un video dentro del lote"""
+    index: int
+    url: str
+    state: str = PENDING
+    title: Optional[str] = None
+    output: Optional[Path] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    # Ruta de procesado que tomó (copy, transcode, remux, progressive)
+    path: Optional[str] = None
+    # Tiempos por fase (resolve, download, encode...)
+    timings: Optional[Dict[str, float]] = None
+
+    # Metodo que devuelve el elemento en formato serializable
+    def to_dict(self) -> Dict:
+        return {
+            "indice": self.index,
+            "url": self.url,
+            "estado": self.state,
+            "titulo": self.title,
+            "archivo": str(self.output) if self.output else None,
+            "error": self.error,
+            "procesado": self.path,
+            "tiempos": self.timings,
+            "segundos": round(self.elapsed, 2),
+        }
+
+
+# Clase encargada de convertir muchos videos con workers en paralelo
+class BatchRunner:
+    """Procesa una lista de URLs con N workers y escribe un reporte JSON
+
+    La concurrencia de red y de ffmpeg se limita aparte con
+    core.configure_limits(); aquí solo se fija cuántos videos avanzan a la vez.
+    """
+
+    def __init__(self, core, workers: int = 4,
+                 on_progress: Optional[Callable[[int, int, BatchItem], None]] = None):
+        self.core = core
+        self.workers = max(1, workers)
+        self.on_progress = on_progress
+        self._lock = threading.Lock()
+        self._reserved: set = set()
+
+    # Metodo principal: convierte todas las URLs y devuelve los resultados en orden
+    def run(self, urls: List[str], kind: str = "mp3", quality: int = 5,
+            output_dir: Path = Path("."), report_path: Optional[Path] = None,
+            skip_existing: bool = False,
+            cancel_event: Optional[threading.Event] = None,
+            profile: Optional[str] = None) -> List[BatchItem]:
+        """Convierte cada URL en output_dir; un fallo no detiene el resto del lote"""
+        if kind not in ("mp3", "mp4", "audio"):
+            raise ValueError(f"Formato inválido: {kind}")
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        cancel_event = cancel_event or threading.Event()
+        items = [BatchItem(index=i, url=url) for i, url in enumerate(urls, 1)]
+        started = time.time()
+        finished = 0
+
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch")
+        try:
+            futures = [pool.submit(self._process, item, kind, quality, output_dir,
+                                   skip_existing, cancel_event, profile)
+                       for item in items]
+            for future in as_completed(futures):
+                item = future.result()
+                finished += 1
+                if self.on_progress is not None:
+                    self.on_progress(finished, len(items), item)
+        except KeyboardInterrupt:
+            # Ctrl+C: cortar descargas en curso y no empezar las pendientes
+            cancel_event.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+            for item in items:
+                if item.state == PENDING:
+                    item.state = CANCELLED
+            raise
+        finally:
+            pool.shutdown(wait=True)
+            if report_path is not None:
+                self.write_report(report_path, items, kind, quality, time.time() - started,
+                                  profile or self.core.profile.name)
+
+        return items
+
+    # Metodo que convierte un video del lote
+    def _process(self, item: BatchItem, kind: str, quality: int, output_dir: Path,
+                 skip_existing: bool, cancel_event: threading.Event,
+                 profile: Optional[str] = None) -> BatchItem:
+        if cancel_event.is_set():
+            item.state = CANCELLED
+            return item
+
+        started = time.time()
+        output_path = None
+        report = {}
+        try:
+            video = self.core.resolve(item.url)
+            video_info = self.core.get_video_info(video)
+            item.title = video_info.title
+
+            if kind == "mp3":
+                filename = self.core.suggest_filename(video_info, ".mp3", with_artist=True)
+            elif kind == "audio":
+                filename = self.core.suggest_filename(
+                    video_info, self.core.original_audio_extension(video), with_artist=True)
+            else:
+                # Mismo nombre que una descarga suelta: titulo_resolución.mp4
+                availability = self.core.check_availability(video, quality)
+                if not availability['available']:
+                    raise Exception(f"No se encontró video en {availability['requested']}")
+                filename = self.core.suggest_filename(
+                    video_info, ".mp4", suffix=f"_{availability['resolution']}")
+
+            if skip_existing and (output_dir / filename).exists():
+                item.output = output_dir / filename
+                item.state = SKIPPED
+                return item
+
+            output_path = self._reserve_path(output_dir / filename)
+
+            if kind == "mp3":
+                item.output = self.core.download_mp3(video, output_path,
+                                                     cancel_event=cancel_event, report=report,
+                                                     profile=profile)
+            elif kind == "audio":
+                item.output = self.core.download_audio(video, output_path,
+                                                       cancel_event=cancel_event, report=report,
+                                                       profile=profile)
+            else:
+                item.output = self.core.download_mp4(video, quality, output_path,
+                                                     cancel_event=cancel_event, report=report,
+                                                     profile=profile)
+            item.path = report.get("path")
+            item.state = DONE
+
+        except DownloadCancelled:
+            item.state = CANCELLED
+        except Exception as e:
+            item.state = ERROR
+            item.error = str(e)
+        finally:
+            item.elapsed = time.time() - started
+            item.timings = report.get("timings")
+            if output_path is not None:
+                with self._lock:
+                    self._reserved.discard(output_path)
+
+        return item
+
+    # Metodo que evita que dos videos con el mismo titulo se pisen
+    def _reserve_path(self, path: Path) -> Path:
+        """Devuelve una ruta libre (nombre_1, nombre_2...) y la reserva"""
+        with self._lock:
+            candidate = path
+            counter = 1
+            while candidate in self._reserved or candidate.exists():
+                candidate = path.with_name(f"{path.stem}_{counter}{path.suffix}")
+                counter += 1
+            self._reserved.add(candidate)
+            return candidate
+
+    # Metodo que escribe el reporte JSON del lote
+    @staticmethod
+    def write_report(report_path: Path, items: List[BatchItem], kind: str,
+                     quality: int, elapsed: float, profile: Optional[str] = None):
+        """Reporte legible por máquina con el resultado de cada elemento"""
+        summary: Dict[str, int] = {}
+        for item in items:
+            summary[item.state] = summary.get(item.state, 0) + 1
+
+        report = {
+            "formato": kind,
+            "calidad": quality if kind == "mp4" else None,
+            "perfil": profile,
+            "total": len(items),
+            "resumen": summary,
+            "segundos": round(elapsed, 2),
+            "elementos": [item.to_dict() for item in items],
+        }
+
+        report_path = Path(report_path)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, ensure_ascii=False, indent=2),
+                               encoding="utf-8")
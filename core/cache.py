@@ -0,0 +1,211 @@
+# core/cache.py - CACHÉ DE METADATOS EN MEMORIA (TTL + LRU)
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Any
+
+
+# Formatos de URL soportados (watch?v=, youtu.be, embed, v, shorts, live)
+_VIDEO_ID_PATTERNS = [
+    re.compile(r'[?&]v=([0-9A-Za-z_-]{11})'),
+    re.compile(r'youtu\.be/([0-9A-Za-z_-]{11})'),
+    re.compile(r'youtube(?:-nocookie)?\.com/(?:embed|v|shorts|live)/([0-9A-Za-z_-]{11})'),
+]
+_BARE_VIDEO_ID = re.compile(r'^[0-9A-Za-z_-]{11}$')
+
+
+# Funcion que normaliza cualquier URL de YouTube a su ID de 11 caracteres
+def extract_video_id(url: str) -> Optional[str]:
+    """Extrae el ID del video (11 caracteres) de una URL o ID directo"""
+    if not url:
+        return None
+
+    url = url.strip()
+    if _BARE_VIDEO_ID.match(url):
+        return url
+
+    for pattern in _VIDEO_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+# Entrada del cache: info y metadatos (TTL largo) + manifiesto de streams (TTL corto)
+@dataclass
+class _CacheEntry:
+    video_info: Any
+    music_metadata: Any
+    info_expires: float
+    context: Any = None
+    streams: Optional[List[Dict]] = None
+    manifest_expires: float = 0.0
+
+
+# Clase encargada de guardar metadatos de videos ya resueltos
+class MetadataCache:
+    """Cache acotado con TTL y expulsión LRU, indexado por video_id"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600,
+                 manifest_ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Las URLs de los streams caducan: el manifiesto vive menos tiempo
+        self.manifest_ttl = min(manifest_ttl, ttl)
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # Metodo interno que devuelve una entrada vigente (y la marca como reciente)
+    def _lookup(self, video_id: Optional[str]) -> Optional[_CacheEntry]:
+        """Busca una entrada no expirada; debe llamarse con el lock tomado"""
+        if not video_id:
+            return None
+
+        entry = self._entries.get(video_id)
+        if entry is None:
+            return None
+
+        if entry.info_expires <= time.monotonic():
+            del self._entries[video_id]
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(video_id)
+        return entry
+
+    # Metodo interno que respeta el limite de entradas
+    def _evict(self):
+        """Expulsa las entradas menos usadas recientemente"""
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # Metodo interno que comprueba si el manifiesto sigue vigente
+    def _manifest_fresh(self, entry: _CacheEntry) -> bool:
+        return entry.manifest_expires > time.monotonic()
+
+    # Metodo que devuelve la informacion del video guardada
+    def get_info(self, video_id: Optional[str], record: bool = True):
+        """Devuelve VideoInfo si está en cache
+
+        record=False no cuenta acierto ni fallo (consultas secundarias de la
+        misma petición, que ya contó el suyo)
+        """
+        with self._lock:
+            entry = self._lookup(video_id)
+            if entry is None or entry.video_info is None:
+                if record:
+                    self.misses += 1
+                return None
+            if record:
+                self.hits += 1
+            return entry.video_info
+
+    # Metodo que devuelve el contexto resuelto (solo si el manifiesto sigue vigente)
+    def get_context(self, video_id: Optional[str], record: bool = True):
+        """Devuelve el VideoContext con manifiesto de streams vigente"""
+        with self._lock:
+            entry = self._lookup(video_id)
+            if entry is None or entry.context is None or not self._manifest_fresh(entry):
+                if record:
+                    self.misses += 1
+                return None
+            if record:
+                self.hits += 1
+            return entry.context
+
+    # Metodo que devuelve la lista de streams guardada
+    def get_streams(self, video_id: Optional[str]) -> Optional[List[Dict]]:
+        """Devuelve la lista de streams si el manifiesto sigue vigente"""
+        with self._lock:
+            entry = self._lookup(video_id)
+            if entry is None or entry.streams is None or not self._manifest_fresh(entry):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.streams
+
+    # Metodo que guarda un contexto resuelto (info, metadatos y manifiesto)
+    def put(self, video_id: Optional[str], context=None, video_info=None):
+        """Guarda VideoInfo, MusicMetadata y/o el contexto con su manifiesto"""
+        if not video_id or self.max_entries <= 0:
+            return
+
+        if video_info is None and context is not None:
+            video_info = context.video_info
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None:
+                entry = _CacheEntry(
+                    video_info=None,
+                    music_metadata=None,
+                    info_expires=now + self.ttl
+                )
+                self._entries[video_id] = entry
+
+            # Un contexto sin info calculada no pisa la info ya guardada
+            if video_info is not None:
+                entry.video_info = video_info
+                entry.music_metadata = video_info.extracted_metadata
+                entry.info_expires = now + self.ttl
+
+            if context is not None:
+                entry.context = context
+                entry.streams = None
+                entry.manifest_expires = now + self.manifest_ttl
+
+            self._entries.move_to_end(video_id)
+            self._evict()
+
+    # Metodo que guarda la lista de streams del manifiesto de un contexto
+    def put_streams(self, video_id: Optional[str], streams: List[Dict], context=None):
+        """Guarda la lista de streams (y el contexto del que salió si es nuevo)"""
+        if not video_id or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            entry = self._entries.get(video_id)
+            known_context = entry is not None and entry.context is context
+        if context is not None and not known_context:
+            self.put(video_id, context)
+
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is not None:
+                entry.streams = streams
+
+    # Metodo para invalidar explicitamente un video
+    def invalidate(self, video_id_or_url: str) -> bool:
+        """Elimina un video del cache; acepta ID o URL"""
+        video_id = extract_video_id(video_id_or_url) or video_id_or_url
+        with self._lock:
+            return self._entries.pop(video_id, None) is not None
+
+    # Metodo para vaciar el cache completo
+    def clear(self):
+        """Vacía el cache"""
+        with self._lock:
+            self._entries.clear()
+
+    # Metodo que devuelve las estadisticas del cache
+    def stats(self) -> Dict:
+        """Estadísticas de aciertos, fallos y expulsiones"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -0,0 +1,175 @@
+# core/description.py - PARSER DE DESCRIPCIONES AUTO-GENERATED (UNA SOLA PASADA)
+"""
+Detección de videos "Auto-generated by YouTube" y extracción de sus
+metadatos musicales recorriendo la descripción una sola vez.
+
+Formato de ejemplo:
+    Provided to YouTube by NexTone Inc.
+
+    Full Moon Full Life · Azumi Takahashi · Lotus Juice · ATLUS Sound Team
+
+    Persona 3 Reload Original Soundtrack
+
+    Released on: 2024-04-24
+
+    Auto-generated by YouTube.
+"""
+import re
+from dataclasses import dataclass
+from typing import Optional, List, Tuple
+
+
+# Expresiones precompiladas (se usan en cada video del lote)
+_LABEL_RE = re.compile(r'Provided to YouTube by\s*(.+)', re.IGNORECASE)
+_RELEASED_RE = re.compile(r'Released on:\s*(.+)', re.IGNORECASE)
+_YEAR_RE = re.compile(r'\d{4}')
+_WHITESPACE_RE = re.compile(r'\s+')
+# (Official Video), [4K] y 【Full HD】, en este orden (solo si aparece el carácter de apertura)
+_BRACKET_PATTERNS = (
+    ('(', re.compile(r'\([^)]*\)')),
+    ('[', re.compile(r'\[[^\]]*\]')),
+    ('【', re.compile(r'【[^】]*】')),
+)
+
+# Indicadores necesarios para considerar un video auto-generated
+MIN_INDICATORS = 2
+
+
+# Dataclase general de la disposicion de metadata de video
+@dataclass
+class MusicMetadata:
+    """Metadatos extraídos de videos auto-generated"""
+    song_title: str
+    artists: List[str]
+    album: str
+    release_date: Optional[str]
+    year: Optional[str]
+    label: Optional[str]
+    composers: List[str]
+    is_official: bool
+
+
+# Funcion que limpia un título o álbum (espacios y texto entre paréntesis/corchetes)
+def clean_text(text: str) -> str:
+    text = _WHITESPACE_RE.sub(' ', text)
+    for opener, pattern in _BRACKET_PATTERNS:
+        if opener in text:
+            text = pattern.sub('', text)
+    return text.strip()
+
+
+# Funcion que elige el álbum entre las líneas candidatas (ni título ni artista)
+def _first_album(candidates: List[str], song_title: str, artists: List[str]) -> Optional[str]:
+    for line in candidates:
+        if line != song_title and line not in artists:
+            return line
+    return None
+
+
+# Funcion que detecta auto-generated y extrae los metadatos en una sola pasada
+def parse_description(title: str, author: str,
+                      description: str) -> Tuple[bool, Optional[MusicMetadata]]:
+    """Devuelve (es_auto_generated, MusicMetadata o None)
+
+    Los metadatos solo se devuelven si el video es auto-generated y la
+    descripción tiene al menos 3 líneas con contenido.
+    """
+    title_lower = title.lower()
+    author_lower = author.lower()
+
+    # Indicadores que no dependen de la descripción
+    indicators = (('- topic' in author_lower)
+                  + ('topic' in author_lower and len(author_lower) > 10)
+                  + ('full album' in title_lower or 'complete album' in title_lower))
+
+    provided = auto_generated = released = music_marks = False
+    label = release_date = year = None
+    song_title = album = None
+    artists: List[str] = []
+    # Líneas que pueden ser el álbum, vistas antes de la línea del título
+    pending_albums: List[str] = []
+    line_count = 0
+
+    for line in description.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        line_count += 1
+        lower = line.lower()
+
+        # Caracteres que suelen aparecer en descripciones de música
+        has_dot = '·' in line
+        if not music_marks and (has_dot or '•' in line or '♪' in line):
+            music_marks = True
+        if not auto_generated and 'auto-generated by youtube' in lower:
+            auto_generated = True
+
+        # Sello: "Provided to YouTube by <sello>"
+        if 'provided to youtube by' in lower:
+            provided = True
+            if label is None:
+                match = _LABEL_RE.search(line)
+                if match:
+                    label = match.group(1).strip()
+
+        # Fecha: "Released on: 2024-04-24"
+        if 'released on:' in lower:
+            released = True
+            if release_date is None:
+                match = _RELEASED_RE.search(line)
+                if match:
+                    release_date = match.group(1).strip()
+                    year_match = _YEAR_RE.search(release_date)
+                    if year_match:
+                        year = year_match.group(0)
+
+        if has_dot:
+            # "Título · Artista1 · Artista2 · ..." (artistas sin duplicados)
+            if song_title is None and len(line) > 10:
+                parts = [part.strip() for part in line.split('·')]
+                song_title = parts[0]
+                artists = list(dict.fromkeys(part for part in parts[1:] if part))
+                album = _first_album(pending_albums, song_title, artists)
+        elif (album is None and len(line) > 5 and 'provided' not in lower
+              and 'released' not in lower and 'auto-generated' not in lower):
+            # El álbum es la primera línea candidata que no sea el título ni un artista
+            if song_title is None:
+                pending_albums.append(line)
+            elif line != song_title and line not in artists:
+                album = line
+
+        # Todo decidido: el resto (créditos, "Auto-generated by YouTube.") no cambia nada
+        if (album is not None and release_date is not None and label is not None
+                and line_count >= 3
+                and indicators + provided + auto_generated + released + music_marks >= MIN_INDICATORS):
+            break
+
+    indicators += provided + auto_generated + released + music_marks
+    is_auto_generated = indicators >= MIN_INDICATORS
+
+    if not is_auto_generated or line_count < 3:
+        return is_auto_generated, None
+
+    if song_title is None:
+        song_title = ''
+        album = _first_album(pending_albums, song_title, artists)
+    album = album or ''
+
+    # Sin línea de título en la descripción: "Artista - Título (...)" del video
+    if not song_title:
+        title_parts = title.split(' - ')
+        if len(title_parts) >= 2:
+            song_title = title_parts[1].split('(')[0].strip()
+        else:
+            song_title = title
+
+    return is_auto_generated, MusicMetadata(
+        song_title=clean_text(song_title) if song_title else song_title,
+        artists=artists,
+        album=clean_text(album) if album else album,
+        release_date=release_date,
+        year=year,
+        label=label,
+        composers=list(artists),
+        is_official=True,
+    )
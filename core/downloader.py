@@ -1,19 +1,69 @@
 # core/downloader.py - CÓDIGO COMPARTIDO ACTUALIZADO Ver 1.2.1
-from pytubefix import YouTube
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, APIC, TIT2, TPE1, TALB, TYER, TRCK, TCON, TPE2, COMM
-import requests
 import subprocess
-import uuid
+import io
 import os
 import shutil
 import re
 from pathlib import Path
-from dataclasses import dataclass
-from typing import Optional, Tuple, Dict, List
+from dataclasses import dataclass, field, replace
+from typing import Optional, Tuple, Dict, List, Union, Iterator, Callable, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import contextlib
 import time
 from datetime import datetime
 
+from core.cache import MetadataCache, extract_video_id
+from core.description import MusicMetadata, parse_description, clean_text
+from core.album import AlbumTrack, find_tracks, album_from_title
+from core.segmented import SegmentedDownloader, RangeJournal, DownloadCancelled, iter_range_chunks
+from core.workspace import Workspace, reclaim_workspaces, process_alive, WORKSPACE_STALE_SECONDS
+from core.profiles import EncoderProfile, get_profile, apply_priority, PROFILES, DEFAULT_PROFILE
+from core.progress import (ProgressTracker, ProgressEvent, read_ffmpeg_progress,
+                           RESOLVE, DOWNLOAD, ENCODE, TAG, FINALIZE)
+from core.ffmpeg import (FFmpegError, FFmpegCapabilities, StderrTail, probe_ffmpeg, audio_encoder,
+                         MAX_ATTEMPTS as FFMPEG_MAX_ATTEMPTS,
+                         MISSING_FFMPEG, MISSING_CODEC, CORRUPT_INPUT, EMPTY_OUTPUT)
+
+# pytubefix, mutagen y requests se importan al usarlos (arranque rápido del CLI)
+if TYPE_CHECKING:
+    import requests
+    from pytubefix import YouTube
+    from mutagen.id3 import ID3
+
+
+# Thumbnails de YouTube en orden de preferencia
+THUMBNAIL_CANDIDATES = ("maxresdefault", "sddefault", "hqdefault")
+
+# Un .lock más antiguo que esto se considera abandonado (proceso caído)
+PARTIAL_LOCK_STALE_SECONDS = 6 * 3600
+
+# Parametros del codificador MP3 del perfil por defecto (VBR calidad 2 ~190-250kbps)
+# Los parametros por trabajo salen del perfil elegido (core/profiles.py)
+MP3_ENCODER_ARGS = list(PROFILES[DEFAULT_PROFILE].mp3_args)
+
+# En streaming no se puede volver atrás a escribir la cabecera Xing del VBR:
+# se usa CBR para que los reproductores calculen bien la duración
+MP3_STREAM_ENCODER_ARGS = list(PROFILES[DEFAULT_PROFILE].mp3_stream_args)
+
+# Cada cuánto se buscan carpetas de trabajo abandonadas al crear una nueva
+WORKSPACE_JANITOR_INTERVAL = 600
+
+# Audio del MP4 final cuando el original no cabe tal cual (el video siempre se copia)
+MP4_AUDIO_ENCODER_ARGS = list(PROFILES[DEFAULT_PROFILE].aac_args)
+
+# Codecs de audio que el contenedor MP4 acepta sin recodificar
+MP4_COPY_AUDIO_CODECS = ("mp4a",)
+
+# Modo audio original: extension final segun el codec (se re-empaqueta, no se recodifica)
+ORIGINAL_AUDIO_FORMATS = {"opus": ".opus", "mp4a": ".m4a"}
+
+# Version del etiquetado ID3/nombres: subirla invalida el cache de archivos terminados
+TAGGING_VERSION = 1
+
+# Tamaño de lectura de la salida de ffmpeg en modo streaming
+PIPE_READ_SIZE = 64 * 1024
+
 
 # Dataclase general de la disposicion de informacion de video
 @dataclass
@@ -28,241 +78,378 @@ class VideoInfo:
     length_formatted: str
     is_auto_generated: bool
     extracted_metadata: Optional[Dict] = None
+    # Bytes del thumbnail ganador (se reutilizan como portada ID3)
+    thumbnail_data: Optional[bytes] = field(default=None, repr=False)
 
-# Dataclase general de la disposicion de metadata de video
+# Contexto de un video ya resuelto (se reutiliza durante todo el trabajo)
 @dataclass
-class MusicMetadata:
-    """Metadatos extraídos de videos auto-generated"""
-    song_title: str
-    artists: List[str]
-    album: str
-    release_date: Optional[str]
-    year: Optional[str]
-    label: Optional[str]
-    composers: List[str]
-    is_official: bool
+class VideoContext:
+    """Video resuelto una sola vez: objeto YouTube + VideoInfo calculada"""
+    url: str
+    yt: "YouTube"
+    video_info: Optional[VideoInfo] = None
 
 
 # Clase encargada del proceso logico de descarga (Actualizado para videos Auto-Generated)
 class YouTubeDownloaderCore:
     """Clase base con toda la lógica de descarga - Actualizada para Auto-generated"""
     
-    def __init__(self, temp_dir: str = "temp"):
+    def __init__(self, temp_dir: str = "temp", cache: Optional[MetadataCache] = None,
+                 use_cache: bool = True, segmented: bool = False, connections: int = 4,
+                 resumable: bool = False, streaming: bool = False,
+                 profile: Union[str, EncoderProfile] = DEFAULT_PROFILE):
         self.temp_dir = Path(temp_dir)
         self.temp_dir.mkdir(exist_ok=True)
         
-        # AGRGADO
-        # Verificar FFmpeg al inicio
-        self.ffmpeg_available = self._check_ffmpeg()
+        # Perfil de codificación por defecto (cada trabajo puede pedir otro)
+        self.profile = get_profile(profile)
+        
+        # Modo pipeline: la red alimenta a ffmpeg por stdin (sin archivo fuente en disco)
+        self.streaming = streaming
+        
+        # Limites de concurrencia separados: descargas de red y trabajo de ffmpeg (CPU)
+        self._network_slots = None
+        self._encoder_slots = None
+        
+        # Descargas parciales reanudables: nombre determinista (video_id, itag) + journal.
+        # Se activa a pedido (servidor y workers): por defecto se usa stream.download()
+        self.resumable = resumable
+        self.partials_dir = self.temp_dir / "partials"
+        
+        # Cada trabajo usa su propia carpeta temp/jobs/job_xxx (nunca se comparten)
+        self.workspaces_dir = self.temp_dir / "jobs"
+        self._last_janitor = 0.0
+        
+        # Descarga segmentada por rangos (varias conexiones por pista)
+        self.segmented = segmented
+        self.connections = connections
+        
+        # Progreso de stream.download() de pytubefix: el callback es por objeto YouTube
+        # (compartido entre trabajos), así que cada hilo deja aquí su tracker y pista
+        self._progress_local = threading.local()
+        
+        # Contador de resoluciones de metadatos (construcciones de YouTube(url))
+        self.resolve_count = 0
+        self._stats_lock = threading.Lock()
+        
+        # Sesión HTTP con conexiones keep-alive reutilizables (se crea al primer uso)
+        self._http = None
+        self._http_lock = threading.Lock()
+        
+        # Cache de metadatos por video_id (None = sin cache)
+        if cache is not None:
+            self.cache = cache
+        else:
+            self.cache = MetadataCache() if use_cache else None
         
-        # AGREGADO
-        if not self.ffmpeg_available:
+        # FFmpeg se sondea al primer uso (no al construir el core)
+        self._ffmpeg_warned = False
+    
+    # Propiedad con la sesión HTTP compartida (requests solo se importa si se usa)
+    @property
+    def http(self) -> "requests.Session":
+        if self._http is None:
+            with self._http_lock:
+                if self._http is None:
+                    import requests
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=4,
+                                                            pool_maxsize=max(16, 2 * self.connections))
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._http = session
+        return self._http
+    
+    # Propiedad con las capacidades de ffmpeg (un solo sondeo por proceso)
+    @property
+    def ffmpeg(self) -> FFmpegCapabilities:
+        capabilities = probe_ffmpeg()
+        if not capabilities.available and not self._ffmpeg_warned:
+            self._ffmpeg_warned = True
             self._display_ffmpeg_warning()
+        return capabilities
+    
+    # Propiedad que indica si ffmpeg está instalado
+    @property
+    def ffmpeg_available(self) -> bool:
+        return self.ffmpeg.available
+    
+    # Metodo para limitar cuantas descargas y codificaciones corren a la vez
+    def configure_limits(self, network: Optional[int] = None, encoder: Optional[int] = None):
+        """Fija el máximo de pistas descargándose y de procesos ffmpeg simultáneos (None = sin límite)"""
+        self._network_slots = threading.BoundedSemaphore(network) if network else None
+        self._encoder_slots = threading.BoundedSemaphore(encoder) if encoder else None
+    
+    # Metodo para elegir el perfil de codificacion por defecto
+    def configure_profile(self, profile: Union[str, EncoderProfile, None] = None,
+                          threads: Optional[int] = None, nice: Optional[int] = None):
+        """Fija el perfil por defecto; threads/nice sobrescriben los del perfil"""
+        self.profile = get_profile(profile or self.profile).with_overrides(threads, nice)
+    
+    # Metodo que resuelve el perfil de un trabajo (None = el del core)
+    def _resolve_profile(self, profile: Union[str, EncoderProfile, None]) -> EncoderProfile:
+        return get_profile(profile) if profile is not None else self.profile
+    
+    # Metodo que ejecuta ffmpeg y comprueba que haya terminado bien
+    def _run_ffmpeg(self, ffmpeg_cmd: List[str], profile: EncoderProfile,
+                    progress: Optional[ProgressTracker] = None,
+                    duration: Optional[float] = None,
+                    output: Optional[Path] = None):
+        """Lanza ffmpeg con el nice del perfil; lanza FFmpegError si falla
+
+        Los fallos transitorios (memoria, proceso matado) se reintentan.
+        Con output, además se exige que el archivo exista y no esté vacío.
+        """
+        for attempt in range(1, FFMPEG_MAX_ATTEMPTS + 1):
+            try:
+                self._run_ffmpeg_once(ffmpeg_cmd, profile, progress, duration)
+                break
+            except FFmpegError as e:
+                if not e.retryable or attempt == FFMPEG_MAX_ATTEMPTS:
+                    raise
+                print(f"Reintentando ffmpeg ({attempt}/{FFMPEG_MAX_ATTEMPTS}): {e}")
+        
+        if output is not None and (not output.exists() or output.stat().st_size == 0):
+            raise FFmpegError(EMPTY_OUTPUT)
+    
+    # Metodo interno: un intento de ffmpeg (stderr se guarda para clasificar el fallo)
+    def _run_ffmpeg_once(self, ffmpeg_cmd: List[str], profile: EncoderProfile,
+                         progress: Optional[ProgressTracker] = None,
+                         duration: Optional[float] = None):
+        # Con progress, ffmpeg informa su posición por stdout (-progress pipe:1)
+        global_args = ["-hide_banner", "-loglevel", "error"]
+        if progress is not None:
+            global_args += ["-progress", "pipe:1", "-nostats"]
+        ffmpeg_cmd = [ffmpeg_cmd[0], *global_args, *ffmpeg_cmd[1:]]
+        
+        process = subprocess.Popen(ffmpeg_cmd,
+                                   stdout=subprocess.PIPE if progress is not None else subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE)
+        apply_priority(process, profile)
+        stderr = StderrTail(process.stderr)
+        
+        if progress is not None:
+            try:
+                read_ffmpeg_progress(process.stdout,
+                                     lambda seconds: progress.set_position(seconds, duration))
+            finally:
+                process.stdout.close()
+        
+        stderr.check(process.wait())
+    
+    # Metodo que corta antes de descargar si no hay ffmpeg o le falta el codificador
+    def _require_ffmpeg(self, output_args: Optional[List[str]] = None):
+        """Lanza FFmpegError (MISSING_FFMPEG / MISSING_CODEC) sin descargar nada"""
+        capabilities = self.ffmpeg
+        if not capabilities.available:
+            raise FFmpegError(MISSING_FFMPEG)
+        
+        encoder = audio_encoder(output_args) if output_args else None
+        if encoder and not capabilities.has_encoder(encoder):
+            raise FFmpegError(MISSING_CODEC, stderr_tail=[f"Encoder {encoder} not found"])
+    
+    # Metodo que descarga y procesa; si ffmpeg ve la entrada corrupta, descarga de nuevo una vez
+    def _fetch_and_encode(self, fetch: Callable[[], None], encode: Callable[[], None],
+                          tracker: ProgressTracker, cancel_event: Optional[threading.Event]):
+        for attempt in range(2):
+            with tracker.phase(DOWNLOAD):
+                fetch()
+            self._check_cancelled(cancel_event)
+            try:
+                return encode()
+            except FFmpegError as e:
+                if e.kind != CORRUPT_INPUT or attempt > 0:
+                    raise
+                print(f"Entrada corrupta, se vuelve a descargar: {e}")
+    
+    # Metodo que recibe el progreso de stream.download() de pytubefix
+    def _on_stream_progress(self, stream, chunk: bytes, bytes_remaining: int):
+        sink = getattr(self._progress_local, "sink", None)
+        if sink is None:
+            return
+        tracker, track = sink
+        total = stream.filesize
+        tracker.set_bytes(track, total - bytes_remaining, total)
+    
+    # Metodo que reserva un hueco de red
+    def _network_slot(self):
+        return self._network_slots or contextlib.nullcontext()
+    
+    # Metodo que reserva un hueco de ffmpeg
+    def _encoder_slot(self):
+        return self._encoder_slots or contextlib.nullcontext()
+    
+    # Metodo que corta el trabajo entre fases si fue cancelado
+    def _check_cancelled(self, cancel_event: Optional[threading.Event]):
+        if cancel_event is not None and cancel_event.is_set():
+            raise DownloadCancelled("Trabajo cancelado")
+    
+    # Metodo que resuelve el video una sola vez por trabajo
+    def resolve(self, url: str, record: bool = True) -> VideoContext:
+        """Construye el objeto YouTube una única vez y lo envuelve en un contexto
+
+        record=False cuando quien llama ya contó un fallo de cache para esta petición
+        """
+        video_id = extract_video_id(url)
+        
+        # Reutilizar el contexto cacheado mientras el manifiesto siga vigente
+        if self.cache is not None:
+            ctx = self.cache.get_context(video_id, record=record)
+            if ctx is not None:
+                return ctx
+        
+        from pytubefix import YouTube
+        yt = YouTube(url, on_progress_callback=self._on_stream_progress)
+        with self._stats_lock:
+            self.resolve_count += 1
+        ctx = VideoContext(url=url, yt=yt)
+        
+        # Si la info sigue en cache no hace falta recalcularla (thumbnails, metadatos)
+        if self.cache is not None:
+            ctx.video_info = self.cache.get_info(video_id, record=False)
+            if ctx.video_info is not None:
+                self.cache.put(video_id, ctx)
+        
+        return ctx
+    
+    # Metodo que acepta una URL o un contexto ya resuelto
+    def _get_context(self, source: Union[str, VideoContext], record: bool = True) -> VideoContext:
+        """Devuelve el contexto recibido o resuelve la URL"""
+        if isinstance(source, VideoContext):
+            return source
+        return self.resolve(source, record)
     
     # Metodo encargado de conseguir la infromacion de video
-    def get_video_info(self, url: str) -> Optional[VideoInfo]:
+    def get_video_info(self, url: Union[str, VideoContext]) -> Optional[VideoInfo]:
         """Obtiene información del video y detecta si es auto-generated"""
         try:
-            yt = YouTube(url)
+            # Con solo la URL basta el cache: no hace falta resolver el video
+            if isinstance(url, str) and self.cache is not None:
+                cached_info = self.cache.get_info(extract_video_id(url))
+                if cached_info is not None:
+                    return cached_info
             
-            # Verificar si es auto-generated
-            is_auto_generated = self._is_auto_generated(yt)
+            # El fallo ya se contó arriba: resolver sin volver a contarlo
+            ctx = self._get_context(url, record=False)
             
-            # Extraer metadatos si es auto-generated
-            extracted_metadata = None
-            if is_auto_generated:
-                extracted_metadata = self._extract_auto_generated_metadata(yt)
+            # Reutilizar la información si el contexto ya la tiene
+            if ctx.video_info is not None:
+                return ctx.video_info
             
-            # Obtener mejor thumbnail
-            thumbnail_candidates = [
-                f"https://i.ytimg.com/vi/{yt.video_id}/maxresdefault.jpg",
-                f"https://i.ytimg.com/vi/{yt.video_id}/sddefault.jpg",
-                f"https://i.ytimg.com/vi/{yt.video_id}/hqdefault.jpg",
-            ]
+            yt = ctx.yt
             
-            thumbnail_url = yt.thumbnail_url
-            for thumb_url in thumbnail_candidates:
-                try:
-                    response = requests.get(thumb_url, timeout=3)
-                    if response.status_code == 200:
-                        thumbnail_url = thumb_url
-                        break
-                except:
-                    continue
+            # Obtener mejor thumbnail (sondeo en paralelo, se guardan los bytes)
+            thumbnail_url, thumbnail_data = self._probe_thumbnail(yt.video_id)
+            ctx.video_info = self._build_video_info(yt, thumbnail_url, thumbnail_data)
             
-            # Formatear duración
-            duration = yt.length
-            if duration < 3600:
-                length_formatted = f"{duration//60}:{duration%60:02d}"
-            else:
-                length_formatted = f"{duration//3600}:{(duration%3600)//60:02d}:{duration%60:02d}"
-            
-            return VideoInfo(
-                title=yt.title,
-                author=yt.author,
-                video_id=yt.video_id,
-                duration=duration,
-                views=yt.views,
-                thumbnail_url=thumbnail_url,
-                length_formatted=length_formatted,
-                is_auto_generated=is_auto_generated,
-                extracted_metadata=extracted_metadata
-            )
+            if self.cache is not None:
+                self.cache.put(yt.video_id, ctx)
+            
+            return ctx.video_info
             
         except Exception as e:
             raise Exception(f"Error obteniendo info: {str(e)}")
     
-    # Metodo que detecta si es un video Auto Generated 
-    def _is_auto_generated(self, yt: YouTube) -> bool:
-        """Detecta si el video es 'Auto-generated by YouTube'"""
-        # Patrones para detectar videos auto-generated
-        description = yt.description.lower()
-        title = yt.title.lower()
-        author = yt.author.lower()
-        
-        # Indicadores clave
-        indicators = [
-            'provided to youtube by' in description,
-            'auto-generated by youtube' in description,
-            '- topic' in author,
-            'topic' in author and len(author) > 10,
-            'released on:' in description,
-            any(x in description for x in ['·', '•', '♪']),  # Caracteres especiales comunes
-            'full album' in title or 'complete album' in title,
-        ]
+    # Metodo que arma la VideoInfo a partir del objeto YouTube y el thumbnail elegido
+    def _build_video_info(self, yt: "YouTube", thumbnail_url: Optional[str] = None,
+                          thumbnail_data: Optional[bytes] = None) -> VideoInfo:
+        """Detecta auto-generated, extrae sus metadatos y formatea la duración"""
+        # Detectar auto-generated y extraer sus metadatos (una sola pasada)
+        is_auto_generated, extracted_metadata = self._parse_description(yt)
+        
+        if thumbnail_url is None:
+            thumbnail_url = yt.thumbnail_url
+        
+        # Formatear duración
+        duration = yt.length
+        if duration < 3600:
+            length_formatted = f"{duration//60}:{duration%60:02d}"
+        else:
+            length_formatted = f"{duration//3600}:{(duration%3600)//60:02d}:{duration%60:02d}"
         
-        # Si tiene al menos 2 indicadores, probablemente sea auto-generated
-        return sum(indicators) >= 2
+        return VideoInfo(
+            title=yt.title,
+            author=yt.author,
+            video_id=yt.video_id,
+            duration=duration,
+            views=yt.views,
+            thumbnail_url=thumbnail_url,
+            length_formatted=length_formatted,
+            is_auto_generated=is_auto_generated,
+            extracted_metadata=extracted_metadata,
+            thumbnail_data=thumbnail_data
+        )
     
-    # Metodo dpara extraer los metadatos para videos Auto Generated
-    def _extract_auto_generated_metadata(self, yt: YouTube) -> Optional[MusicMetadata]:
-        """Extrae metadatos de videos auto-generated como el ejemplo dado"""
+    # Metodo que sondea los thumbnails candidatos en paralelo
+    def _probe_thumbnail(self, video_id: str) -> Tuple[Optional[str], Optional[bytes]]:
+        """Devuelve (url, bytes) del mejor thumbnail disponible en un solo round-trip"""
+        candidates = [f"https://i.ytimg.com/vi/{video_id}/{name}.jpg"
+                      for name in THUMBNAIL_CANDIDATES]
         
-        try:
-            desc = yt.description
-            
-            # Ejemplo del formato:
-            # Provided to YouTube by NexTone Inc.
-            #
-            # Full Moon Full Life · Azumi Takahashi · Lotus Juice · ATLUS Sound Team · ATLUS GAME MUSIC · Lotus Juice · ATLUS Sound Team · ATLUS Sound Team
-            #
-            # Persona 3 Reload Original Soundtrack
-            #
-            # Released on: 2024-04-24
-            #
-            # Auto-generated by YouTube.
-            
-            lines = [line.strip() for line in desc.split('\n') if line.strip()]
-            
-            if len(lines) < 3:
+        # stream=True: solo se leen las cabeceras hasta elegir al ganador
+        def fetch(thumb_url):
+            try:
+                return self.http.get(thumb_url, timeout=3, stream=True)
+            except Exception:
                 return None
-            
-            metadata = {
-                'song_title': '',
-                'artists': [],
-                'album': '',
-                'release_date': None,
-                'year': None,
-                'label': None,
-                'composers': [],
-                'is_official': True
-            }
-            
-            # Buscar etiqueta 'Provided to YouTube by' (sello discográfico)
-            for i, line in enumerate(lines):
-                if 'provided to youtube by' in line.lower():
-                    label_match = re.search(r'Provided to YouTube by\s*(.+)', line, re.IGNORECASE)
-                    if label_match:
-                        metadata['label'] = label_match.group(1).strip()
-                        break
-            
-            # Buscar línea con el título y artistas (usualmente línea 1 o 2 después del label)
-            # Formato: "Título · Artista1 · Artista2 · ..."
-            for i, line in enumerate(lines):
-                if '·' in line and len(line) > 10:
-                    parts = [p.strip() for p in line.split('·')]
-                    
-                    if parts:
-                        # El primer elemento es el título de la canción
-                        metadata['song_title'] = parts[0]
-                        
-                        # Los siguientes son artistas/compositores
-                        if len(parts) > 1:
-                            # Eliminar duplicados manteniendo orden
-                            unique_artists = []
-                            for artist in parts[1:]:
-                                if artist and artist not in unique_artists:
-                                    unique_artists.append(artist)
-                            metadata['artists'] = unique_artists
-                        
-                        # También podrían ser compositores
-                        metadata['composers'] = metadata['artists'].copy()
-                        break
-            
-            # Buscar álbum (usualmente después de la línea de artistas)
-            for i, line in enumerate(lines):
-                if line and len(line) > 5 and '·' not in line:
-                    # Si no es el label, no es la fecha, y no tiene caracteres especiales
-                    if ('provided' not in line.lower() and 
-                        'released' not in line.lower() and 
-                        'auto-generated' not in line.lower()):
-                        # Verificar que no sea el título (ya lo tenemos)
-                        if line != metadata['song_title'] and line not in metadata['artists']:
-                            metadata['album'] = line
-                            break
-            
-            # Buscar fecha de lanzamiento
-            for line in lines:
-                if 'released on:' in line.lower():
-                    date_match = re.search(r'Released on:\s*(.+)', line, re.IGNORECASE)
-                    if date_match:
-                        date_str = date_match.group(1).strip()
-                        metadata['release_date'] = date_str
-                        
-                        # Extraer año
-                        year_match = re.search(r'(\d{4})', date_str)
-                        if year_match:
-                            metadata['year'] = year_match.group(1)
-                        break
-            
-            # Si no encontramos título en descripción, usar título del video
-            if not metadata['song_title']:
-                # Intentar extraer del título del video
-                title_parts = yt.title.split(' - ')
-                if len(title_parts) >= 2:
-                    metadata['song_title'] = title_parts[1].split('(')[0].strip()
-                else:
-                    metadata['song_title'] = yt.title
-            
-            # Limpiar datos
-            if metadata['song_title']:
-                metadata['song_title'] = self._clean_text(metadata['song_title'])
-            
-            if metadata['album']:
-                metadata['album'] = self._clean_text(metadata['album'])
-            
-            return MusicMetadata(**metadata)
-            
+        
+        with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+            responses = list(pool.map(fetch, candidates))
+        
+        winner_url, winner_data = None, None
+        for thumb_url, response in zip(candidates, responses):
+            if response is None:
+                continue
+            try:
+                if winner_url is None and response.status_code == 200:
+                    winner_data = response.content
+                    winner_url = thumb_url
+            except Exception:
+                pass
+            finally:
+                response.close()
+        
+        return winner_url, winner_data
+    
+    # Metodo que descarga un thumbnail que no se pudo reutilizar
+    def _fetch_thumbnail(self, video_info: VideoInfo) -> Optional[bytes]:
+        """Devuelve los bytes de la portada, descargándolos solo si faltan"""
+        if video_info.thumbnail_data:
+            return video_info.thumbnail_data
+        try:
+            response = self.http.get(video_info.thumbnail_url, timeout=5)
+            if response.status_code == 200:
+                video_info.thumbnail_data = response.content
+        except Exception:
+            pass
+        return video_info.thumbnail_data
+    
+    # Metodo que analiza la descripción del video (detección + metadatos)
+    def _parse_description(self, yt: "YouTube") -> Tuple[bool, Optional[MusicMetadata]]:
+        """Ver core/description.py: una sola pasada con expresiones precompiladas"""
+        try:
+            return parse_description(yt.title, yt.author, yt.description or '')
         except Exception as e:
             print(f"Advertencia extrayendo metadatos: {e}")
-            return None
+            return False, None
+    
+    # Metodo que detecta si es un video Auto Generated 
+    def _is_auto_generated(self, yt: "YouTube") -> bool:
+        """Detecta si el video es 'Auto-generated by YouTube'"""
+        return self._parse_description(yt)[0]
+    
+    # Metodo dpara extraer los metadatos para videos Auto Generated
+    def _extract_auto_generated_metadata(self, yt: "YouTube") -> Optional[MusicMetadata]:
+        """Extrae metadatos de videos auto-generated"""
+        return self._parse_description(yt)[1]
     
     # Metodo que limpia correctamente texto
     def _clean_text(self, text: str) -> str:
         """Limpia texto de caracteres extraños"""
-        # Remover caracteres de control y espacios extras
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        
-        # Remover texto entre paréntesis/brackets si son comunes
-        text = re.sub(r'\([^)]*\)', '', text)  # (Official Video)
-        text = re.sub(r'\[[^\]]*\]', '', text)  # [4K]
-        text = re.sub(r'【[^】]*】', '', text)  # 【Full HD】
-        
-        return text.strip()
+        return clean_text(text)
     
     # Metodo que obtiene la mejor calidad de audio 
-    def _get_best_audio_stream(self, yt: YouTube, is_auto_generated: bool = False):
+    def _get_best_audio_stream(self, yt: "YouTube", is_auto_generated: bool = False):
         """Selecciona el mejor stream de audio según el tipo de video"""
         
         audio_streams = yt.streams.filter(only_audio=True)
@@ -296,142 +483,541 @@ class YouTubeDownloaderCore:
         # Si no encuentra, devolver el de mayor bitrate
         return audio_streams.order_by('abr').last()
     
-    # Metodo especial que descarga y convierte a MP3
-    def download_mp3(self, url: str, output_path: Optional[Path] = None, 
-                     preserve_metadata: bool = True) -> Path:
-        """Descarga y convierte a MP3 con metadatos optimizados"""
+    # Metodo que devuelve el codec de audio de un stream ("opus", "mp4a"...)
+    def _audio_codec(self, stream) -> str:
+        codec = getattr(stream, "audio_codec", None) or ""
+        return codec.lower().split(".")[0]
+    
+    # Metodo que elige el audio para mezclar en MP4
+    def _get_mux_audio_stream(self, yt: "YouTube", is_auto_generated: bool = False):
+        """Prefiere AAC (se copia sin recodificar) antes que Opus
+
+        Recodificar Opus a AAC no recupera calidad y cuesta CPU,
+        así que si existe una pista AAC se usa esa.
+        """
+        best = self._get_best_audio_stream(yt, is_auto_generated)
+        if self._audio_codec(best) in MP4_COPY_AUDIO_CODECS:
+            return best
+        
+        compatible = [s for s in yt.streams.filter(only_audio=True)
+                      if self._audio_codec(s) in MP4_COPY_AUDIO_CODECS]
+        if compatible:
+            return max(compatible, key=lambda s: self._parse_bitrate(s.abr))
+        return best
+    
+    # Metodo que convierte el bitrate a un numero ("128kbps" -> 128, 0 si no hay)
+    def _parse_bitrate(self, abr: Optional[str]) -> int:
+        """Convierte bitrate a número para ordenar"""
+        match = re.match(r'(\d+)', abr or "")
+        return int(match.group(1)) if match else 0
+    
+    # Metodo que decide si el audio se copia o se recodifica dentro del MP4
+    def _mp4_audio_args(self, audio_stream, profile: Optional[EncoderProfile] = None) -> Tuple[List[str], str]:
+        """Devuelve (argumentos de ffmpeg, ruta) - ruta es 'copy' o 'transcode'"""
+        if self._audio_codec(audio_stream) in MP4_COPY_AUDIO_CODECS:
+            return ["-c:a", "copy"], "copy"
+        return list((profile or self.profile).aac_args), "transcode"
+    
+    # Metodo que arma las etiquetas del contenedor (opus/m4a) para ffmpeg
+    def _container_metadata_args(self, video_info: VideoInfo) -> List[str]:
+        """Título, artista, álbum y año como argumentos -metadata"""
+        metadata = video_info.extracted_metadata
+        title = metadata.song_title if metadata and metadata.song_title else video_info.title
+        artist = metadata.artists[0] if metadata and metadata.artists else video_info.author
+        album = metadata.album if metadata and metadata.album else "YouTube"
+        
+        args = ["-metadata", f"title={title}",
+                "-metadata", f"artist={artist}",
+                "-metadata", f"album={album}"]
+        if metadata and metadata.year:
+            args += ["-metadata", f"date={metadata.year}"]
+        return args
+    
+    # Metodo que indica la extension del modo audio original para un video
+    def original_audio_extension(self, url: Union[str, VideoContext]) -> str:
+        """".opus" o ".m4a" según el codec del mejor audio disponible"""
+        ctx = self._get_context(url)
+        video_info = self.get_video_info(ctx)
+        audio_stream = self._get_best_audio_stream(ctx.yt, video_info.is_auto_generated)
+        codec = self._audio_codec(audio_stream)
+        extension = ORIGINAL_AUDIO_FORMATS.get(codec)
+        if extension is None:
+            raise Exception(f"Codec de audio sin contenedor directo: {codec or 'desconocido'}")
+        return extension
+    
+    # Metodo que guarda el audio original (Opus/AAC) sin recodificar
+    def download_audio(self, url: Union[str, VideoContext], output_path: Optional[Path] = None,
+                       preserve_metadata: bool = True,
+                       cancel_event: Optional[threading.Event] = None,
+                       report: Optional[Dict] = None,
+                       profile: Union[str, EncoderProfile, None] = None,
+                       on_progress: Optional[Callable[[ProgressEvent], None]] = None) -> Path:
+        """Alternativa a MP3: re-empaqueta el mejor audio en .opus o .m4a (sin pérdida extra)"""
+        tracker = ProgressTracker(on_progress)
         try:
-            # Obtener información del video
-            video_info = self.get_video_info(url)
-            yt = YouTube(url)
-            
-            # Descargar thumbnail
-            thumbnail_data = None
-            try:
-                response = requests.get(video_info.thumbnail_url, timeout=5)
-                if response.status_code == 200:
-                    thumbnail_data = response.content
-            except:
-                pass
+            self._require_ffmpeg()
+            encoder_profile = self._resolve_profile(profile)
+            with tracker.phase(RESOLVE):
+                ctx = self._get_context(url)
+                video_info = self.get_video_info(ctx)
+                yt = ctx.yt
+                
+                audio_stream = self._get_best_audio_stream(yt, video_info.is_auto_generated)
+                codec = self._audio_codec(audio_stream)
+                extension = self.original_audio_extension(ctx)
             
-            # Obtener mejor stream de audio según tipo
-            audio_stream = self._get_best_audio_stream(yt, video_info.is_auto_generated)
+            if report is not None:
+                report.update({'path': 'remux', 'audio_itag': audio_stream.itag,
+                               'audio_codec': codec, 'profile': encoder_profile.name})
             
-            # Archivos temporales
-            temp_audio = self.temp_dir / f"{uuid.uuid4()}.{self._get_audio_extension(audio_stream)}"
-            temp_mp3 = self.temp_dir / f"{uuid.uuid4()}.mp3"
+            if output_path is None:
+                output_path = Path.cwd() / self.suggest_filename(video_info, extension, with_artist=True)
             
-            # Descargar audio
-            print(f"Descargando audio: {audio_stream.abr} ({audio_stream.mime_type})")
-            audio_stream.download(output_path=str(self.temp_dir), filename=temp_audio.name)
-            
-            # Convertir a MP3 con FFmpeg
-            ffmpeg_cmd = [
-                "ffmpeg", "-y", "-i", str(temp_audio),
-                "-codec:a", "libmp3lame",
-                "-q:a", "2",  # Calidad 2 (VBR ~190-250kbps)
-                "-vn", str(temp_mp3)
-            ]
+            print(f"Descargando audio original: {audio_stream.abr} ({audio_stream.mime_type})")
+            self._check_cancelled(cancel_event)
             
-            subprocess.run(ffmpeg_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            
-            # Añadir metadatos ID3
-            if preserve_metadata and video_info.extracted_metadata:
-                self._add_complete_id3_tags(
-                    temp_mp3, 
-                    video_info,
-                    thumbnail_data
-                )
-            elif preserve_metadata:
-                self._add_basic_id3_tags(
-                    temp_mp3,
-                    video_info.title,
-                    video_info.author,
-                    "YouTube",
-                    thumbnail_data
-                )
-            
-            # Definir nombre de archivo final
-            if output_path is None:
-                if video_info.extracted_metadata and video_info.extracted_metadata.song_title:
-                    base_name = f"{video_info.extracted_metadata.song_title}"
-                    if video_info.extracted_metadata.artists:
-                        base_name = f"{video_info.extracted_metadata.artists[0]} - {base_name}"
-                else:
-                    base_name = video_info.title
+            with self.workspace() as ws:
+                temp_source = ws.file(f"source.{self._get_audio_extension(audio_stream)}")
+                temp_output = ws.file(f"audio{extension}")
+                
+                # Solo cambia el contenedor: no hace falta hueco de codificador
+                ffmpeg_cmd = [
+                    "ffmpeg", "-y", "-i", str(temp_source),
+                    "-vn", "-c:a", "copy",
+                    *(self._container_metadata_args(video_info) if preserve_metadata else []),
+                    str(temp_output)
+                ]
                 
-                safe_name = self.sanitize_filename(base_name)
-                output_path = Path.cwd() / f"{safe_name}.mp3"
+                def remux():
+                    with tracker.phase(ENCODE):
+                        self._run_ffmpeg(ffmpeg_cmd, encoder_profile, tracker,
+                                         video_info.duration, output=temp_output)
+                
+                self._fetch_and_encode(
+                    lambda: self._download_stream(audio_stream, temp_source, yt.video_id,
+                                                  cancel_event, tracker, "audio"),
+                    remux, tracker, cancel_event)
+                
+                with tracker.phase(FINALIZE):
+                    shutil.move(str(temp_output), str(output_path))
             
-            # Mover archivo final
-            shutil.move(str(temp_mp3), str(output_path))
+            return output_path
             
-            # Limpiar temporal
-            temp_audio.unlink(missing_ok=True)
+        except (DownloadCancelled, FFmpegError):
+            raise
+        except Exception as e:
+            raise Exception(f"Error descargando audio original: {str(e)}")
+        finally:
+            if report is not None:
+                report['timings'] = tracker.summary()
+    
+    # Metodo especial que descarga y convierte a MP3
+    def download_mp3(self, url: Union[str, VideoContext], output_path: Optional[Path] = None, 
+                     preserve_metadata: bool = True,
+                     cancel_event: Optional[threading.Event] = None,
+                     report: Optional[Dict] = None,
+                     profile: Union[str, EncoderProfile, None] = None,
+                     on_progress: Optional[Callable[[ProgressEvent], None]] = None) -> Path:
+        """Descarga y convierte a MP3 con metadatos optimizados
+
+        Si se pasa report (dict), se rellena con la ruta de procesado usada
+        y los tiempos por fase. profile elige el perfil de codificación
+        (None = el del core) y on_progress recibe los eventos de progreso.
+        """
+        tracker = ProgressTracker(on_progress)
+        try:
+            encoder_profile = self._resolve_profile(profile)
+            self._require_ffmpeg(encoder_profile.mp3_args)
+            with tracker.phase(RESOLVE):
+                # Obtener información del video (una sola resolución por trabajo)
+                ctx = self._get_context(url)
+                video_info = self.get_video_info(ctx)
+                yt = ctx.yt
+                
+                # Portada: se reutilizan los bytes ya obtenidos al sondear el thumbnail
+                thumbnail_data = self._fetch_thumbnail(video_info) if preserve_metadata else None
+                
+                # Obtener mejor stream de audio según tipo
+                audio_stream = self._get_best_audio_stream(yt, video_info.is_auto_generated)
+            
+            print(f"Descargando audio: {audio_stream.abr} ({audio_stream.mime_type})")
+            self._check_cancelled(cancel_event)
+            
+            if report is not None:
+                report.update({
+                    'path': 'transcode',
+                    'audio_itag': audio_stream.itag,
+                    'audio_codec': self._audio_codec(audio_stream),
+                    'profile': encoder_profile.name,
+                })
+            
+            # Temporales en la carpeta propia del trabajo (se borra pase lo que pase)
+            with self.workspace() as ws:
+                temp_audio = ws.file(f"audio.{self._get_audio_extension(audio_stream)}")
+                temp_mp3 = ws.file("audio.mp3")
+                
+                if self.streaming:
+                    # Codificar mientras se descarga: el audio original nunca toca el disco
+                    with self._network_slot(), self._encoder_slot(), tracker.phase(ENCODE):
+                        self._pipe_to_ffmpeg(
+                            self._iter_stream_chunks(audio_stream, cancel_event, tracker, "audio"),
+                            ["-vn", *encoder_profile.mp3_args, *encoder_profile.output_args()],
+                            temp_mp3,
+                            encoder_profile,
+                            tracker,
+                            video_info.duration
+                        )
+                else:
+                    # Convertir a MP3 con FFmpeg
+                    ffmpeg_cmd = [
+                        "ffmpeg", "-y", "-i", str(temp_audio),
+                        *encoder_profile.mp3_args,
+                        *encoder_profile.output_args(),
+                        "-vn", str(temp_mp3)
+                    ]
+                    
+                    def encode():
+                        with self._encoder_slot(), tracker.phase(ENCODE):
+                            self._run_ffmpeg(ffmpeg_cmd, encoder_profile, tracker,
+                                             video_info.duration, output=temp_mp3)
+                    
+                    # Descargar audio y codificar (se vuelve a descargar si llegó corrupto)
+                    self._fetch_and_encode(
+                        lambda: self._download_stream(audio_stream, temp_audio, yt.video_id,
+                                                      cancel_event, tracker, "audio"),
+                        encode, tracker, cancel_event)
+                
+                self._check_cancelled(cancel_event)
+                
+                # Añadir metadatos ID3
+                with tracker.phase(TAG):
+                    if preserve_metadata:
+                        self._tag_mp3(temp_mp3, video_info, thumbnail_data)
+                
+                # Definir nombre de archivo final
+                if output_path is None:
+                    output_path = Path.cwd() / self.suggest_filename(video_info, ".mp3", with_artist=True)
+                
+                # Mover archivo final
+                with tracker.phase(FINALIZE):
+                    shutil.move(str(temp_mp3), str(output_path))
             
             return output_path
             
+        except (DownloadCancelled, FFmpegError):
+            raise
         except Exception as e:
             raise Exception(f"Error descargando MP3: {str(e)}")
+        finally:
+            if report is not None:
+                report['timings'] = tracker.summary()
+
+    # Metodo que obtiene las pistas de un álbum completo (capítulos o tiempos de la descripción)
+    def get_album_tracks(self, url: Union[str, VideoContext]) -> List[AlbumTrack]:
+        """[] si el video no tiene capítulos ni lista de pistas con tiempos"""
+        ctx = self._get_context(url)
+        video_info = self.get_video_info(ctx)
+        return find_tracks(ctx.yt, video_info.duration)
+
+    # Metodo que descarga un álbum completo una vez y lo divide en un MP3 por pista
+    def download_album(self, url: Union[str, VideoContext], output_dir: Optional[Path] = None,
+                       preserve_metadata: bool = True,
+                       cancel_event: Optional[threading.Event] = None,
+                       report: Optional[Dict] = None,
+                       profile: Union[str, EncoderProfile, None] = None,
+                       on_progress: Optional[Callable[[ProgressEvent], None]] = None) -> List[Path]:
+        """Un solo audio descargado y una sola pasada de ffmpeg (muxer segment)
+
+        Cada pista lleva su título (TIT2) y número (TRCK); la portada se
+        obtiene una vez y se comparte. Devuelve los MP3 en orden de pista.
+        """
+        tracker = ProgressTracker(on_progress)
+        try:
+            encoder_profile = self._resolve_profile(profile)
+            self._require_ffmpeg(encoder_profile.mp3_args)
+            with tracker.phase(RESOLVE):
+                ctx = self._get_context(url)
+                video_info = self.get_video_info(ctx)
+                yt = ctx.yt
+
+                tracks = find_tracks(yt, video_info.duration)
+                if not tracks:
+                    raise Exception("El video no tiene capítulos ni lista de pistas con tiempos")
+
+                thumbnail_data = self._fetch_thumbnail(video_info) if preserve_metadata else None
+                audio_stream = self._get_best_audio_stream(yt, video_info.is_auto_generated)
+
+            artist, album = self.album_names(video_info)
+            print(f"Álbum: {album} ({len(tracks)} pistas) - audio {audio_stream.abr} ({audio_stream.mime_type})")
+            self._check_cancelled(cancel_event)
+
+            if report is not None:
+                report.update({
+                    'path': 'album',
+                    'tracks': len(tracks),
+                    'audio_itag': audio_stream.itag,
+                    'audio_codec': self._audio_codec(audio_stream),
+                    'profile': encoder_profile.name,
+                })
+
+            if output_dir is None:
+                output_dir = Path.cwd() / self.sanitize_filename(f"{artist} - {album}")
+            output_dir = Path(output_dir)
+
+            with self.workspace() as ws:
+                temp_audio = ws.file(f"audio.{self._get_audio_extension(audio_stream)}")
+                segments = [ws.file(f"track_{track.number:03d}.mp3") for track in tracks]
+
+                # Una sola pasada: ffmpeg corta en cada inicio de pista y renueva los tiempos
+                ffmpeg_cmd = [
+                    "ffmpeg", "-y", "-i", str(temp_audio),
+                    "-vn", "-map", "0:a:0",
+                    *encoder_profile.mp3_args,
+                    *encoder_profile.output_args(),
+                    "-f", "segment",
+                    "-segment_format", "mp3",
+                    "-segment_times", ",".join(f"{track.start:.3f}" for track in tracks[1:]),
+                    "-segment_start_number", "1",
+                    "-reset_timestamps", "1",
+                    str(ws.file("track_%03d.mp3"))
+                ]
+
+                def encode():
+                    with self._encoder_slot(), tracker.phase(ENCODE):
+                        self._run_ffmpeg(ffmpeg_cmd, encoder_profile, tracker, video_info.duration)
+                    missing = [segment for segment in segments
+                               if not segment.exists() or segment.stat().st_size == 0]
+                    if missing:
+                        raise FFmpegError(EMPTY_OUTPUT)
+
+                self._fetch_and_encode(
+                    lambda: self._download_stream(audio_stream, temp_audio, yt.video_id,
+                                                  cancel_event, tracker, "audio"),
+                    encode, tracker, cancel_event)
+
+                self._check_cancelled(cancel_event)
+
+                # Etiquetas por pista (la portada es la misma para todas)
+                with tracker.phase(TAG):
+                    if preserve_metadata:
+                        for track, segment in zip(tracks, segments):
+                            self._tag_album_track(segment, video_info, track, len(tracks),
+                                                  artist, album, thumbnail_data)
+
+                outputs = []
+                with tracker.phase(FINALIZE):
+                    output_dir.mkdir(parents=True, exist_ok=True)
+                    for track, segment in zip(tracks, segments):
+                        name = self.sanitize_filename(f"{track.number:02d} - {track.title}")
+                        output_path = output_dir / f"{name}.mp3"
+                        shutil.move(str(segment), str(output_path))
+                        outputs.append(output_path)
+
+            return outputs
+
+        except (DownloadCancelled, FFmpegError):
+            raise
+        except Exception as e:
+            raise Exception(f"Error descargando álbum: {str(e)}")
+        finally:
+            if report is not None:
+                report['timings'] = tracker.summary()
+
+    # Metodo que genera MP3 codificado a medida que llega el audio de la red
+    def stream_mp3(self, url: Union[str, VideoContext],
+                   profile: Union[str, EncoderProfile, None] = None) -> Iterator[bytes]:
+        """Devuelve un iterador de bytes MP3 (sin etiquetas ID3) mientras se descarga"""
+        encoder_profile = self._resolve_profile(profile)
+        self._require_ffmpeg(encoder_profile.mp3_stream_args)
+        ctx = self._get_context(url)
+        video_info = self.get_video_info(ctx)
+        audio_stream = self._get_best_audio_stream(ctx.yt, video_info.is_auto_generated)
+        return self._iter_mp3(audio_stream, encoder_profile)
+    
+    # Metodo que genera MP4 fragmentado a medida que se descargan las pistas
+    def stream_mp4(self, url: Union[str, VideoContext], quality: int = 5,
+                   profile: Union[str, EncoderProfile, None] = None) -> Iterator[bytes]:
+        """Devuelve un iterador de bytes MP4 fragmentado (reproducible sin moov final)"""
+        self._require_ffmpeg()
+        encoder_profile = self._resolve_profile(profile)
+        ctx = self._get_context(url)
+        video_info = self.get_video_info(ctx)
+        video_stream, resolution = self._select_video_stream(ctx.yt, quality)
+        
+        if not video_stream:
+            raise Exception(f"No se encontró video en {resolution}")
+        
+        fragmented = ["-movflags", "frag_keyframe+empty_moov", "-f", "mp4"]
+        
+        if video_stream.is_progressive:
+            # Ya trae audio: solo re-empaquetar en fragmentos
+            return self._iter_ffmpeg_pipe(
+                self._iter_stream_chunks(video_stream),
+                ["-c", "copy", *fragmented],
+                profile=encoder_profile
+            )
+        
+        # Adaptativo: ffmpeg lee ambas pistas de la red y mezcla al vuelo
+        audio_stream = self._get_mux_audio_stream(ctx.yt, video_info.is_auto_generated)
+        audio_args, _ = self._mp4_audio_args(audio_stream, encoder_profile)
+        self._require_ffmpeg(audio_args)
+        return self._iter_ffmpeg_pipe(
+            None,
+            ["-map", "0:v:0", "-map", "1:a:0",
+             "-c:v", "copy", *audio_args, *encoder_profile.output_args(),
+             "-shortest", *fragmented],
+            input_args=["-i", video_stream.url, "-i", audio_stream.url],
+            profile=encoder_profile
+        )
+    
+    # Metodo interno: audio de la red -> ffmpeg -> MP3
+    def _iter_mp3(self, audio_stream, profile: Optional[EncoderProfile] = None) -> Iterator[bytes]:
+        """Codifica a MP3 el stream de audio sin escribir el original a disco"""
+        profile = profile or self.profile
+        return self._iter_ffmpeg_pipe(
+            self._iter_stream_chunks(audio_stream),
+            ["-vn", *profile.mp3_stream_args, *profile.output_args(),
+             "-write_xing", "0", "-id3v2_version", "0", "-f", "mp3"],
+            profile=profile
+        )
+    
+    # Metodo que recorre los bytes de un stream directamente desde la red
+    def _iter_stream_chunks(self, stream, cancel_event: Optional[threading.Event] = None,
+                            progress: Optional[ProgressTracker] = None,
+                            track: str = "audio") -> Iterator[bytes]:
+        """Itera el contenido del stream por rangos (conexión keep-alive)"""
+        if not stream.filesize:
+            return stream.iter_chunks()
+        on_bytes = None
+        if progress is not None:
+            filesize = stream.filesize
+            on_bytes = lambda count: progress.add_bytes(track, count, filesize)
+        return iter_range_chunks(self.http, stream.url, stream.filesize,
+                                 cancel_event=cancel_event, on_bytes=on_bytes)
+    
+    # Metodo que alimenta ffmpeg por stdin y escribe el resultado en un archivo
+    def _pipe_to_ffmpeg(self, chunks: Iterator[bytes], output_args: List[str], output_file: Path,
+                        profile: Optional[EncoderProfile] = None,
+                        progress: Optional[ProgressTracker] = None,
+                        duration: Optional[float] = None):
+        """Codifica los bytes recibidos a output_file a medida que llegan"""
+        progress_args = ["-progress", "pipe:1", "-nostats"] if progress is not None else []
+        ffmpeg_cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *progress_args,
+                      "-i", "pipe:0", *output_args, str(output_file)]
+        process = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE if progress is not None else subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE)
+        apply_priority(process, profile or self.profile)
+        stderr = StderrTail(process.stderr)
+        
+        # El hilo principal escribe stdin: la posición se lee en otro hilo
+        reader = None
+        if progress is not None:
+            reader = threading.Thread(
+                target=read_ffmpeg_progress,
+                args=(process.stdout, lambda seconds: progress.set_position(seconds, duration)),
+                daemon=True
+            )
+            reader.start()
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+            process.stdin.close()
+            process.wait()
+        except BrokenPipeError:
+            process.wait()
+        except DownloadCancelled:
+            process.kill()
+            raise
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            if reader is not None:
+                reader.join()
+                process.stdout.close()
+        
+        # Si ffmpeg murió antes (entrada corrupta, sin espacio...) la descarga ya se cortó
+        stderr.check(process.returncode)
+        if not output_file.exists() or output_file.stat().st_size == 0:
+            raise FFmpegError(EMPTY_OUTPUT)
+    
+    # Metodo que conecta un iterador de entrada con ffmpeg (stdin -> stdout)
+    def _iter_ffmpeg_pipe(self, chunks: Optional[Iterator[bytes]], output_args: List[str],
+                          input_args: Optional[List[str]] = None,
+                          profile: Optional[EncoderProfile] = None) -> Iterator[bytes]:
+        """Alimenta ffmpeg por stdin en un hilo y entrega su salida a medida que se produce"""
+        if input_args is None:
+            input_args = ["-i", "pipe:0"]
+        ffmpeg_cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error",
+                      *input_args, *output_args, "pipe:1"]
+        process = subprocess.Popen(ffmpeg_cmd,
+                                   stdin=subprocess.PIPE if chunks is not None else subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        apply_priority(process, profile or self.profile)
+        stderr = StderrTail(process.stderr)
+        feed_errors = []
+        
+        def feed():
+            try:
+                for chunk in chunks:
+                    process.stdin.write(chunk)
+            except BrokenPipeError:
+                pass  # ffmpeg terminó (o se canceló la salida)
+            except Exception as e:
+                feed_errors.append(e)
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+        
+        feeder = threading.Thread(target=feed, daemon=True)
+        if chunks is not None:
+            feeder.start()
+        
+        try:
+            with self._encoder_slot():
+                while True:
+                    data = process.stdout.read1(PIPE_READ_SIZE)
+                    if not data:
+                        break
+                    yield data
+                process.wait()
+            if chunks is not None:
+                feeder.join()
+        finally:
+            # El consumidor abandonó (o hubo error): no dejar ffmpeg vivo
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+        
+        if feed_errors:
+            raise Exception(f"Error descargando el stream: {feed_errors[0]}")
+        stderr.check(process.returncode)
+    
+    # Metodo que elige las etiquetas ID3 completas o básicas según el video
+    def _tag_mp3(self, mp3_path: Path, video_info: VideoInfo, thumbnail_data: Optional[bytes] = None):
+        if video_info.extracted_metadata:
+            self._add_complete_id3_tags(mp3_path, video_info, thumbnail_data)
+        else:
+            self._add_basic_id3_tags(mp3_path, video_info.title, video_info.author,
+                                     "YouTube", thumbnail_data)
     
     # Metodo que añade los metadatos ID3 a los videos Auto Generated
     def _add_complete_id3_tags(self, mp3_path: Path, video_info: VideoInfo, 
                                thumbnail_data: Optional[bytes] = None):
         """Añade metadatos ID3 completos para videos auto-generated"""
+        from mutagen.mp3 import MP3
+        from mutagen.id3 import ID3
+        metadata = video_info.extracted_metadata
         try:
             audio = MP3(str(mp3_path), ID3=ID3)
             if audio.tags is None:
                 audio.add_tags()
             
-            metadata = video_info.extracted_metadata
-            
-            # Título de la canción
-            if metadata.song_title:
-                audio.tags.add(TIT2(encoding=3, text=metadata.song_title))
-            else:
-                audio.tags.add(TIT2(encoding=3, text=video_info.title))
-            
-            # Artista principal (primer artista)
-            if metadata.artists:
-                audio.tags.add(TPE1(encoding=3, text=metadata.artists[0]))
-                # Album artist (puede ser diferente)
-                audio.tags.add(TPE2(encoding=3, text=metadata.artists[0]))
-            else:
-                audio.tags.add(TPE1(encoding=3, text=video_info.author))
-            
-            # Álbum
-            if metadata.album:
-                audio.tags.add(TALB(encoding=3, text=metadata.album))
-            else:
-                audio.tags.add(TALB(encoding=3, text="YouTube"))
-            
-            # Año
-            if metadata.year:
-                audio.tags.add(TYER(encoding=3, text=metadata.year))
-            elif video_info.publish_date:
-                audio.tags.add(TYER(encoding=3, text=str(video_info.publish_date.year)))
-            
-            # Género (podemos inferir o dejar vacío)
-            audio.tags.add(TCON(encoding=3, text="Soundtrack" if "soundtrack" in metadata.album.lower() else "Music"))
-            
-            # Comentario con información adicional
-            comment_text = f"Source: YouTube | Channel: {video_info.author}"
-            if metadata.label:
-                comment_text += f" | Label: {metadata.label}"
-            audio.tags.add(COMM(encoding=3, lang='eng', desc='', text=comment_text))
-            
-            # Número de pista (podríamos intentar inferir si es un tracklist)
-            # Por ahora dejamos vacío
-            
-            # Thumbnail
-            if thumbnail_data:
-                audio.tags.add(APIC(
-                    encoding=3,
-                    mime='image/jpeg',
-                    type=3,
-                    desc='Cover',
-                    data=thumbnail_data
-                ))
+            self._fill_complete_id3_tags(audio.tags, video_info, thumbnail_data)
             
             audio.save(v2_version=3)
             
@@ -446,33 +1032,195 @@ class YouTubeDownloaderCore:
                 thumbnail_data
             )
     
+    # Metodo que rellena las etiquetas completas (archivo o cabecera en memoria)
+    def _fill_complete_id3_tags(self, tags: "ID3", video_info: VideoInfo,
+                                thumbnail_data: Optional[bytes] = None):
+        """Rellena las etiquetas ID3 completas de un video auto-generated"""
+        from mutagen.id3 import APIC, TIT2, TPE1, TALB, TYER, TCON, TPE2, COMM
+        metadata = video_info.extracted_metadata
+        
+        # Título de la canción
+        if metadata.song_title:
+            tags.add(TIT2(encoding=3, text=metadata.song_title))
+        else:
+            tags.add(TIT2(encoding=3, text=video_info.title))
+        
+        # Artista principal (primer artista)
+        if metadata.artists:
+            tags.add(TPE1(encoding=3, text=metadata.artists[0]))
+            # Album artist (puede ser diferente)
+            tags.add(TPE2(encoding=3, text=metadata.artists[0]))
+        else:
+            tags.add(TPE1(encoding=3, text=video_info.author))
+        
+        # Álbum
+        if metadata.album:
+            tags.add(TALB(encoding=3, text=metadata.album))
+        else:
+            tags.add(TALB(encoding=3, text="YouTube"))
+        
+        # Año
+        publish_date = getattr(video_info, 'publish_date', None)
+        if metadata.year:
+            tags.add(TYER(encoding=3, text=metadata.year))
+        elif publish_date:
+            tags.add(TYER(encoding=3, text=str(publish_date.year)))
+        
+        # Género (podemos inferir o dejar vacío)
+        tags.add(TCON(encoding=3, text="Soundtrack" if "soundtrack" in metadata.album.lower() else "Music"))
+        
+        # Comentario con información adicional
+        comment_text = f"Source: YouTube | Channel: {video_info.author}"
+        if metadata.label:
+            comment_text += f" | Label: {metadata.label}"
+        tags.add(COMM(encoding=3, lang='eng', desc='', text=comment_text))
+        
+        # Número de pista (podríamos intentar inferir si es un tracklist)
+        # Por ahora dejamos vacío
+        
+        # Thumbnail
+        if thumbnail_data:
+            tags.add(APIC(
+                encoding=3,
+                mime='image/jpeg',
+                type=3,
+                desc='Cover',
+                data=thumbnail_data
+            ))
+    
+    # Metodo que devuelve el artista y el nombre del álbum de un video "Full Album"
+    def album_names(self, video_info: VideoInfo) -> Tuple[str, str]:
+        metadata = self._album_metadata(video_info)
+        artist, album = album_from_title(video_info.title, video_info.author)
+        if metadata and metadata.album:
+            album = metadata.album
+        if metadata and metadata.artists:
+            artist = metadata.artists[0]
+        return artist, album
+
+    # Metodo que devuelve los metadatos del video solo si vienen de "Provided to YouTube by"
+    def _album_metadata(self, video_info: VideoInfo) -> Optional[MusicMetadata]:
+        """En subidas de usuarios el "álbum" detectado suele ser una línea del tracklist"""
+        metadata = video_info.extracted_metadata
+        return metadata if metadata and metadata.label else None
+
+    # Metodo que etiqueta una pista de un álbum dividido
+    def _tag_album_track(self, mp3_path: Path, video_info: VideoInfo, track: AlbumTrack,
+                         total: int, artist: str, album: str,
+                         thumbnail_data: Optional[bytes] = None):
+        """Etiquetas del álbum con el título (TIT2) y número de pista (TRCK) propios"""
+        from mutagen.mp3 import MP3
+        from mutagen.id3 import ID3, TRCK, TPE2
+        try:
+            audio = MP3(str(mp3_path), ID3=ID3)
+            if audio.tags is None:
+                audio.add_tags()
+
+            metadata = self._album_metadata(video_info)
+            if metadata:
+                track_metadata = replace(metadata, song_title=track.title, album=album)
+                self._fill_complete_id3_tags(
+                    audio.tags, replace(video_info, extracted_metadata=track_metadata),
+                    thumbnail_data)
+            else:
+                self._fill_basic_id3_tags(audio.tags, track.title, artist, album, thumbnail_data)
+                audio.tags.add(TPE2(encoding=3, text=artist[:100]))
+
+            audio.tags.add(TRCK(encoding=3, text=f"{track.number}/{total}"))
+
+            audio.save(v2_version=3)
+
+        except Exception as e:
+            print(f"Advertencia al etiquetar la pista {track.number}: {e}")
+
     # Metodo que añade los metadatos basicos - No Auto Generated
     def _add_basic_id3_tags(self, mp3_path: Path, title: str, artist: str, 
                             album: str, thumbnail_data: Optional[bytes] = None):
         """Añade metadatos ID3 básicos"""
+        from mutagen.mp3 import MP3
+        from mutagen.id3 import ID3
         try:
             audio = MP3(str(mp3_path), ID3=ID3)
             if audio.tags is None:
                 audio.add_tags()
             
-            audio.tags.add(TIT2(encoding=3, text=title[:100]))
-            audio.tags.add(TPE1(encoding=3, text=artist[:100]))
-            audio.tags.add(TALB(encoding=3, text=album[:100]))
-            
-            if thumbnail_data:
-                audio.tags.add(APIC(
-                    encoding=3,
-                    mime='image/jpeg',
-                    type=3,
-                    desc='Cover',
-                    data=thumbnail_data
-                ))
+            self._fill_basic_id3_tags(audio.tags, title, artist, album, thumbnail_data)
             
             audio.save(v2_version=3)
             
         except Exception as e:
             print(f"Advertencia al añadir metadatos básicos: {e}")
     
+    # Metodo que rellena las etiquetas basicas
+    def _fill_basic_id3_tags(self, tags: "ID3", title: str, artist: str,
+                             album: str, thumbnail_data: Optional[bytes] = None):
+        """Rellena las etiquetas ID3 básicas"""
+        from mutagen.id3 import APIC, TIT2, TPE1, TALB
+        tags.add(TIT2(encoding=3, text=title[:100]))
+        tags.add(TPE1(encoding=3, text=artist[:100]))
+        tags.add(TALB(encoding=3, text=album[:100]))
+        
+        if thumbnail_data:
+            tags.add(APIC(
+                encoding=3,
+                mime='image/jpeg',
+                type=3,
+                desc='Cover',
+                data=thumbnail_data
+            ))
+    
+    # Metodo que genera la cabecera ID3 para anteponerla a un MP3 en streaming
+    def render_id3_header(self, video_info: VideoInfo, thumbnail_data: Optional[bytes] = None) -> bytes:
+        """Devuelve los bytes de una etiqueta ID3v2.3 con los metadatos del video"""
+        if thumbnail_data is None:
+            thumbnail_data = self._fetch_thumbnail(video_info)
+        
+        from mutagen.id3 import ID3
+        tags = ID3()
+        try:
+            if video_info.extracted_metadata:
+                self._fill_complete_id3_tags(tags, video_info, thumbnail_data)
+            else:
+                self._fill_basic_id3_tags(tags, video_info.title, video_info.author,
+                                          "YouTube", thumbnail_data)
+        except Exception as e:
+            print(f"Advertencia al generar cabecera ID3: {e}")
+            tags = ID3()
+            self._fill_basic_id3_tags(tags, video_info.title, video_info.author,
+                                      "YouTube", thumbnail_data)
+        
+        buffer = io.BytesIO()
+        tags.save(buffer, v2_version=3, padding=lambda info: 0)
+        return buffer.getvalue()
+    
+    # Metodo que describe los parametros que determinan el archivo final
+    def output_signature(self, kind: str, preserve_metadata: bool = True,
+                         profile: Union[str, EncoderProfile, None] = None) -> Tuple:
+        """Codificador y versión de etiquetado (parte de la clave del cache de salidas)"""
+        encoder_profile = self._resolve_profile(profile)
+        if kind == "mp3":
+            encoder = encoder_profile.mp3_args
+        elif kind == "audio":
+            encoder = ["-c:a", "copy"]
+        else:
+            # El audio se copia si es AAC; si no, se recodifica con el AAC del perfil
+            encoder = ["-c:v", "copy", "-c:a", "copy-if-aac", *encoder_profile.aac_args]
+        return (" ".join(encoder), TAGGING_VERSION, preserve_metadata)
+
+    # Metodo que propone el nombre de archivo de salida
+    def suggest_filename(self, video_info: VideoInfo, extension: str,
+                         with_artist: bool = False, suffix: str = "") -> str:
+        """Nombre de archivo seguro a partir de los metadatos del video"""
+        metadata = video_info.extracted_metadata
+        if metadata and metadata.song_title:
+            base_name = f"{metadata.song_title}"
+            if with_artist and metadata.artists:
+                base_name = f"{metadata.artists[0]} - {base_name}"
+        else:
+            base_name = video_info.title
+        
+        return f"{self.sanitize_filename(base_name)}{suffix}{extension}"
+    
     # Metodo para obtener la extencion de video 
     def _get_audio_extension(self, stream) -> str:
         """Obtiene extensión apropiada para el stream de audio"""
@@ -485,126 +1233,380 @@ class YouTubeDownloaderCore:
         else:
             return 'mp3'
         
-    # Metodo especial que se encarga de convertir de 144p a 1080p
-    def download_mp4(self, url: str, quality: int = 5, output_path: Optional[Path] = None) -> Path:
-        """Descarga y convierte a MP4 con soporte para 240p y 480p"""
+    # Metodo que descarga un stream a un archivo local
+    def _download_stream(self, stream, destination: Path, video_id: Optional[str] = None,
+                         cancel_event: Optional[threading.Event] = None,
+                         progress: Optional[ProgressTracker] = None, track: str = "audio") -> Path:
+        """Descarga un stream (audio o video) en la ruta indicada"""
+        with self._network_slot():
+            return self._download_stream_unlimited(stream, destination, video_id, cancel_event,
+                                                   progress, track)
+    
+    # Metodo interno de descarga (sin contar el hueco de red)
+    def _download_stream_unlimited(self, stream, destination: Path, video_id: Optional[str],
+                                   cancel_event: Optional[threading.Event],
+                                   progress: Optional[ProgressTracker] = None,
+                                   track: str = "audio") -> Path:
+        resumable = self.resumable and bool(video_id)
+        filesize = stream.filesize if (self.segmented or resumable) else 0
+        
+        if not filesize:
+            # pytubefix informa el progreso por on_progress (ver _on_stream_progress)
+            self._progress_local.sink = (progress, track) if progress is not None else None
+            try:
+                stream.download(output_path=str(destination.parent), filename=destination.name)
+            finally:
+                self._progress_local.sink = None
+            self._check_cancelled(cancel_event)
+            return destination
+        
+        on_bytes = None
+        if progress is not None:
+            on_bytes = lambda count: progress.add_bytes(track, count, filesize)
+        
+        # Varias conexiones por rangos (el CDN limita cada conexión)
+        connections = self.connections if self.segmented else 1
+        downloader = SegmentedDownloader(session=self.http, connections=connections,
+                                         cancel_event=cancel_event, on_bytes=on_bytes)
+        
+        partial = self._acquire_partial(video_id, stream.itag) if resumable else None
+        if partial is None:
+            return downloader.download(stream.url, destination, filesize)
+        
+        # Retomar con HTTP Range lo que quedó de un intento anterior
+        journal = RangeJournal(partial.with_name(partial.name + ".json"), filesize)
         try:
-            video_info = self.get_video_info(url)
-            yt = YouTube(url)
-            
-            # Mapear calidad - CON 240p Y 480p
-            quality_map = {
-                1: "144p",
-                2: "240p",      #  NUEVO
-                3: "360p",      #  Movido
-                4: "480p",      #  NUEVO
-                5: "720p",      #  Movido
-                6: "1080p",     #  Movido
-                7: "max"        #  Movido
-            }
-            
-            # Validar calidad
-            if quality not in quality_map:
-                quality = 5  # Por defecto 720p (ahora posición 5)
-            
-            resolution = quality_map.get(quality, "720p")
-            
-            # Descargar audio
-            audio_stream = self._get_best_audio_stream(yt, video_info.is_auto_generated)
-            temp_audio = self.temp_dir / f"audio_{uuid.uuid4()}.{self._get_audio_extension(audio_stream)}"
-            audio_stream.download(output_path=str(self.temp_dir), filename=temp_audio.name)
-            
-            # Descargar video
-            if quality == 7:  # ✅ max calidad
-                video_stream = yt.streams.filter(
-                    mime_type="video/mp4",
-                    progressive=False
-                ).order_by("resolution").desc().first()
+            downloader.download(stream.url, partial, filesize, journal)
+            os.replace(partial, destination)
+            journal.remove()
+        finally:
+            self._release_partial(partial)
+        
+        return destination
+    
+    # Metodo que reserva el archivo parcial de una pista (video_id, itag)
+    def _acquire_partial(self, video_id: str, itag) -> Optional[Path]:
+        """Devuelve la ruta .part bloqueada, o None si otro proceso la está usando"""
+        self.partials_dir.mkdir(parents=True, exist_ok=True)
+        partial = self.partials_dir / f"{video_id}_{itag}.part"
+        lock = partial.with_name(partial.name + ".lock")
+        
+        try:
+            fd = os.open(str(lock), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not self._partial_lock_stale(lock):
+                return None
+            # Lock abandonado (proceso caído o demasiado viejo): tomarlo
+            lock.unlink(missing_ok=True)
+            try:
+                fd = os.open(str(lock), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                return None
+        
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return partial
+    
+    # Metodo que indica si el lock de un parcial quedó abandonado
+    def _partial_lock_stale(self, lock: Path) -> bool:
+        """El PID guardado ya no existe, o el lock supera PARTIAL_LOCK_STALE_SECONDS"""
+        try:
+            age = time.time() - lock.stat().st_mtime
+            pid = int(lock.read_text(encoding="utf-8").strip() or 0)
+        except FileNotFoundError:
+            return True
+        except (OSError, ValueError):
+            # Lock recién creado (aún sin PID) o ilegible: decide la antigüedad
+            try:
+                age = time.time() - lock.stat().st_mtime
+            except OSError:
+                return True
+            return age >= PARTIAL_LOCK_STALE_SECONDS
+        
+        if pid and not process_alive(pid):
+            return True
+        return age >= PARTIAL_LOCK_STALE_SECONDS
+    
+    # Metodo que libera el lock de un archivo parcial
+    def _release_partial(self, partial: Path):
+        partial.with_name(partial.name + ".lock").unlink(missing_ok=True)
+    
+    # Metodo que recupera espacio de parciales viejos o que exceden el limite
+    def reclaim_partials(self, max_age_hours: float = 24, max_total_mb: float = 2048) -> int:
+        """Elimina parciales abandonados por antigüedad y por tamaño total; devuelve cuántos"""
+        if not self.partials_dir.exists():
+            return 0
+        
+        now = time.time()
+        candidates = []
+        for partial in self.partials_dir.glob("*.part"):
+            lock = partial.with_name(partial.name + ".lock")
+            try:
+                # Un parcial en uso (lock de un proceso vivo) nunca se toca
+                if lock.exists() and not self._partial_lock_stale(lock):
+                    continue
+                stat = partial.stat()
+            except OSError:
+                continue
+            candidates.append((stat.st_mtime, stat.st_size, partial))
+        
+        removed = []
+        kept = []
+        for mtime, size, partial in sorted(candidates, key=lambda c: c[0]):
+            if now - mtime > max_age_hours * 3600:
+                removed.append(partial)
             else:
-                # Primero buscar exacto
+                kept.append((mtime, size, partial))
+        
+        # Si aún se supera el limite, eliminar los más antiguos primero
+        total = sum(size for _, size, _ in kept)
+        budget = max_total_mb * 1024 * 1024
+        for mtime, size, partial in kept:
+            if total <= budget:
+                break
+            removed.append(partial)
+            total -= size
+        
+        for partial in removed:
+            for path in (partial,
+                         partial.with_name(partial.name + ".json"),
+                         partial.with_name(partial.name + ".lock")):
+                try:
+                    path.unlink(missing_ok=True)
+                except OSError:
+                    pass
+        
+        return len(removed)
+    
+    # Metodo que elige el stream de video segun la calidad pedida
+    def _select_video_stream(self, yt: "YouTube", quality: int = 5):
+        """Devuelve (stream de video, resolución) para la calidad solicitada"""
+        # Mapear calidad - CON 240p Y 480p
+        quality_map = {
+            1: "144p",
+            2: "240p",      #  NUEVO
+            3: "360p",      #  Movido
+            4: "480p",      #  NUEVO
+            5: "720p",      #  Movido
+            6: "1080p",     #  Movido
+            7: "max"        #  Movido
+        }
+        
+        # Validar calidad
+        if quality not in quality_map:
+            quality = 5  # Por defecto 720p (ahora posición 5)
+        
+        resolution = quality_map.get(quality, "720p")
+        
+        if quality == 7:  # ✅ max calidad
+            video_stream = yt.streams.filter(
+                mime_type="video/mp4",
+                progressive=False
+            ).order_by("resolution").desc().first()
+        else:
+            # Primero buscar exacto
+            video_stream = yt.streams.filter(
+                mime_type="video/mp4",
+                res=f"{resolution}",
+                progressive=False
+            ).first()
+            
+            # Si no encuentra, buscar progresivo (audio+video juntos)
+            if not video_stream:
                 video_stream = yt.streams.filter(
                     mime_type="video/mp4",
                     res=f"{resolution}",
-                    progressive=False
+                    progressive=True
                 ).first()
+            
+            # Si aún no encuentra, buscar la mejor disponible
+            if not video_stream:
+                video_stream = self._find_best_available_stream(yt, resolution)
+        
+        return video_stream, resolution
+    
+    # Metodo que comprueba (solo con el manifiesto) si se puede convertir
+    def check_availability(self, url: Union[str, VideoContext], quality: Optional[int] = None) -> Dict:
+        """Verifica sin descargar nada que exista el audio (MP3) o el video en la calidad pedida"""
+        try:
+            ctx = self._get_context(url)
+            video_info = self.get_video_info(ctx)
+            
+            # MP3: basta con que exista un stream de audio
+            if quality is None:
+                audio_stream = self._get_best_audio_stream(ctx.yt, video_info.is_auto_generated)
+                return {
+                    'available': True,
+                    'itag': audio_stream.itag,
+                    'abr': audio_stream.abr,
+                }
+            
+            video_stream, resolution = self._select_video_stream(ctx.yt, quality)
+            if not video_stream:
+                return {'available': False, 'requested': resolution, 'resolution': None}
+            
+            return {
+                'available': True,
+                'requested': resolution,
+                'resolution': video_stream.resolution,
+                'exact': quality == 7 or video_stream.resolution == resolution,
+                'itag': video_stream.itag,
+                'is_progressive': video_stream.is_progressive,
+            }
+            
+        except Exception as e:
+            raise Exception(f"Error verificando disponibilidad: {str(e)}")
+    
+    # Metodo que busca la resolucion mas cercana (sin pasarse) a la pedida
+    def _find_best_available_stream(self, yt: "YouTube", resolution: str):
+        """Devuelve el mejor stream MP4 que no supere la resolución pedida"""
+        target = self._parse_resolution(resolution)
+        candidates = [
+            stream for stream in yt.streams.filter(mime_type="video/mp4")
+            if self._parse_resolution(stream.resolution) > 0
+        ]
+        
+        if not candidates:
+            return None
+        
+        lower = [s for s in candidates if self._parse_resolution(s.resolution) <= target]
+        if lower:
+            # Mayor resolución posible; a igualdad, preferir adaptativo
+            return max(lower, key=lambda s: (self._parse_resolution(s.resolution),
+                                             not s.is_progressive))
+        
+        # Si todas superan la pedida, la más baja disponible
+        return min(candidates, key=lambda s: self._parse_resolution(s.resolution))
+    
+    # Metodo especial que se encarga de convertir de 144p a 1080p
+    def download_mp4(self, url: Union[str, VideoContext], quality: int = 5, 
+                     output_path: Optional[Path] = None,
+                     cancel_event: Optional[threading.Event] = None,
+                     report: Optional[Dict] = None,
+                     profile: Union[str, EncoderProfile, None] = None,
+                     on_progress: Optional[Callable[[ProgressEvent], None]] = None) -> Path:
+        """Descarga y convierte a MP4 con soporte para 240p y 480p
+
+        Si se pasa report (dict), se rellena con la ruta de procesado usada
+        y los tiempos por fase. profile elige el perfil de codificación
+        (None = el del core) y on_progress recibe los eventos de progreso.
+        """
+        report = report if report is not None else {}
+        tracker = ProgressTracker(on_progress)
+        try:
+            encoder_profile = self._resolve_profile(profile)
+            report['profile'] = encoder_profile.name
+            
+            with tracker.phase(RESOLVE):
+                ctx = self._get_context(url)
+                video_info = self.get_video_info(ctx)
+                yt = ctx.yt
                 
-                # Si no encuentra, buscar progresivo (audio+video juntos)
-                if not video_stream:
-                    video_stream = yt.streams.filter(
-                        mime_type="video/mp4",
-                        res=f"{resolution}",
-                        progressive=True
-                    ).first()
-                
-                # Si aún no encuentra, buscar la mejor disponible
-                if not video_stream:
-                    self._find_best_available_stream(yt, resolution)
+                # Elegir el video antes de descargar nada
+                video_stream, resolution = self._select_video_stream(yt, quality)
             
             if not video_stream:
                 raise Exception(f"No se encontró video en {resolution}")
             
-            temp_video = self.temp_dir / f"video_{uuid.uuid4()}.mp4"
-            video_stream.download(output_path=str(self.temp_dir), filename=temp_video.name)
+            # Mezclar pistas necesita ffmpeg: comprobarlo antes de descargar nada
+            if not video_stream.is_progressive:
+                self._require_ffmpeg()
             
-            # Si el stream es progresivo (ya tiene audio), no necesitamos combinar
-            if video_stream.is_progressive:
-                # Solo renombrar
-                if output_path is None:
-                    if video_info.extracted_metadata and video_info.extracted_metadata.song_title:
-                        base_name = f"{video_info.extracted_metadata.song_title}"
-                    else:
-                        base_name = video_info.title
+            # Definir nombre de salida
+            if output_path is None:
+                output_path = Path.cwd() / self.suggest_filename(video_info, ".mp4",
+                                                                 suffix=f"_{resolution}")
+            
+            self._check_cancelled(cancel_event)
+            
+            # Temporales en la carpeta propia del trabajo (se borra pase lo que pase)
+            with self.workspace() as ws:
+                temp_video = ws.file("video.mp4")
+                
+                # Si el stream es progresivo (ya tiene audio), no hace falta el audio separado
+                if video_stream.is_progressive:
+                    report.update({'path': 'progressive', 'video_itag': video_stream.itag})
+                    with tracker.phase(DOWNLOAD):
+                        self._download_stream(video_stream, temp_video, yt.video_id, cancel_event,
+                                              tracker, "video")
                     
-                    safe_name = self.sanitize_filename(base_name)
-                    output_path = Path.cwd() / f"{safe_name}_{resolution}.mp4"
+                    # Solo renombrar
+                    with tracker.phase(FINALIZE):
+                        shutil.move(str(temp_video), str(output_path))
+                    return output_path
                 
-                shutil.move(str(temp_video), str(output_path))
-                temp_audio.unlink(missing_ok=True)  # No necesitamos audio separado
+                # Audio y video son independientes: descargarlos a la vez
+                audio_stream = self._get_mux_audio_stream(yt, video_info.is_auto_generated)
+                temp_audio = ws.file(f"audio.{self._get_audio_extension(audio_stream)}")
                 
-            else:
-                # Combinar audio y video
-                temp_combined = self.temp_dir / f"combined_{uuid.uuid4()}.mp4"
+                # AAC entra tal cual en MP4: solo se recodifica si el codec no es compatible
+                audio_args, path = self._mp4_audio_args(audio_stream, encoder_profile)
+                self._require_ffmpeg(audio_args)
+                report.update({
+                    'path': path,
+                    'video_itag': video_stream.itag,
+                    'audio_itag': audio_stream.itag,
+                    'audio_codec': self._audio_codec(audio_stream),
+                })
+                
+                def fetch():
+                    with ThreadPoolExecutor(max_workers=2) as pool:
+                        audio_job = pool.submit(self._download_stream, audio_stream,
+                                                temp_audio, yt.video_id, cancel_event,
+                                                tracker, "audio")
+                        video_job = pool.submit(self._download_stream, video_stream,
+                                                temp_video, yt.video_id, cancel_event,
+                                                tracker, "video")
+                        audio_job.result()
+                        video_job.result()
+                
+                # Combinar audio y video en cuanto ambas pistas están listas
+                temp_combined = ws.file("combined.mp4")
                 
                 ffmpeg_cmd = [
                     "ffmpeg", "-y",
                     "-i", str(temp_video),
                     "-i", str(temp_audio),
                     "-c:v", "copy",
-                    "-c:a", "aac",
-                    "-b:a", "192k",
+                    *audio_args,
+                    *encoder_profile.output_args(),
                     "-shortest",
                     str(temp_combined)
                 ]
                 
-                subprocess.run(ffmpeg_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                def mux():
+                    with self._encoder_slot(), tracker.phase(ENCODE):
+                        self._run_ffmpeg(ffmpeg_cmd, encoder_profile, tracker,
+                                         video_info.duration, output=temp_combined)
                 
-                # Definir nombre de salida
-                if output_path is None:
-                    if video_info.extracted_metadata and video_info.extracted_metadata.song_title:
-                        base_name = f"{video_info.extracted_metadata.song_title}"
-                    else:
-                        base_name = video_info.title
-                    
-                    safe_name = self.sanitize_filename(base_name)
-                    output_path = Path.cwd() / f"{safe_name}_{resolution}.mp4"
+                self._fetch_and_encode(fetch, mux, tracker, cancel_event)
                 
                 # Mover archivo
-                shutil.move(str(temp_combined), str(output_path))
-                
-                # Limpiar
-                temp_audio.unlink(missing_ok=True)
-                temp_video.unlink(missing_ok=True)
+                with tracker.phase(FINALIZE):
+                    shutil.move(str(temp_combined), str(output_path))
             
             return output_path
             
+        except (DownloadCancelled, FFmpegError):
+            raise
         except Exception as e:
             raise Exception(f"Error descargando MP4: {str(e)}")
+        finally:
+            report['timings'] = tracker.summary()
         
     # Metodo para ontener los streams disponibles de un video
-    def get_available_streams(self, url: str) -> list:
+    def get_available_streams(self, url: Union[str, VideoContext]) -> list:
         """Obtiene lista de streams disponibles"""
         try:
-            yt = YouTube(url)
+            # Manifiesto cacheado (TTL corto porque las URLs de streams caducan)
+            video_id = url.yt.video_id if isinstance(url, VideoContext) else extract_video_id(url)
+            if self.cache is not None:
+                cached_streams = self.cache.get_streams(video_id)
+                if cached_streams is not None:
+                    return cached_streams
+            
+            ctx = self._get_context(url, record=False)
+            yt = ctx.yt
             streams = []
             
             for stream in yt.streams:
@@ -633,12 +1635,17 @@ class YouTubeDownloaderCore:
                 
                 streams.append(stream_info)
             
-            return sorted(streams, key=lambda x: (
+            streams = sorted(streams, key=lambda x: (
                 0 if x['type'] == 'video' else 1,
                 self._parse_resolution(x.get('resolution', '0p')),
                 self._parse_bitrate(x.get('abr', '0kbps'))
             ))
             
+            if self.cache is not None:
+                self.cache.put_streams(yt.video_id, streams, ctx)
+            
+            return streams
+            
         except Exception as e:
             raise Exception(f"Error obteniendo streams: {str(e)}")
         
@@ -653,22 +1660,13 @@ class YouTubeDownloaderCore:
         except:
             return 0
     
-    # Metodo que convierte el bitrate a un numero
-    def _parse_bitrate(self, abr: str) -> int:
-        """Convierte bitrate a número para ordenar"""
-        if not abr or 'kbps' not in abr:
-            return 0
-        
-        try:
-            return int(abr.replace('kbps', ''))
-        except:
-            return 0
     # metodo que se encarga de obtener la informacion detallada de video
-    def get_detailed_info(self, url: str) -> Dict:
+    def get_detailed_info(self, url: Union[str, VideoContext]) -> Dict:
         """Obtiene información detallada del video"""
         try:
-            video_info = self.get_video_info(url)
-            yt = YouTube(url)
+            ctx = self._get_context(url)
+            video_info = self.get_video_info(ctx)
+            yt = ctx.yt
             
             info = {
                 'basic': {
@@ -717,28 +1715,59 @@ class YouTubeDownloaderCore:
         
         return filename[:150]  # Limitar a 150 caracteres
     
+    # Metodo que crea la carpeta temporal exclusiva de un trabajo
+    def workspace(self) -> Workspace:
+        """Context manager con una carpeta propia bajo temp/jobs (se borra al salir)"""
+        # Janitor: de vez en cuando reclamar carpetas de procesos caídos
+        now = time.time()
+        if now - self._last_janitor > WORKSPACE_JANITOR_INTERVAL:
+            self._last_janitor = now
+            try:
+                self.reclaim_workspaces()
+            except Exception:
+                pass
+        
+        return Workspace(self.workspaces_dir)
+    
+    # Metodo que elimina carpetas de trabajo abandonadas
+    def reclaim_workspaces(self, max_age_hours: float = WORKSPACE_STALE_SECONDS / 3600) -> int:
+        """Borra carpetas de trabajo sin actividad reciente; devuelve cuántas"""
+        return reclaim_workspaces(self.workspaces_dir, max_age_hours * 3600)
+    
     # Metetodo para la limpieza general de la carpeta temp
     def cleanup(self):
-        """Limpia archivos temporales"""
+        """Limpia temporales abandonados sin tocar los trabajos en curso de otros procesos"""
+        try:
+            self.reclaim_workspaces()
+        except Exception:
+            pass
+        
+        # Restos sueltos de versiones anteriores (antes todo iba directo a temp/)
         if self.temp_dir.exists():
-            try:
-                shutil.rmtree(self.temp_dir)
-                self.temp_dir.mkdir(exist_ok=True)
-            except:
-                pass
+            now = time.time()
+            for entry in self.temp_dir.iterdir():
+                if entry in (self.partials_dir, self.workspaces_dir):
+                    continue
+                try:
+                    if now - entry.stat().st_mtime < WORKSPACE_STALE_SECONDS:
+                        continue
+                    if entry.is_dir():
+                        shutil.rmtree(entry)
+                    else:
+                        entry.unlink()
+                except:
+                    pass
+        
+        # Parciales: solo se reclaman los viejos o si ocupan demasiado
+        try:
+            self.reclaim_partials()
+        except Exception:
+            pass
     
-    # Metodo para hacer un checkeo si esta instalado ffmpeg   
+    # Metodo para hacer un checkeo si esta instalado ffmpeg (usa el sondeo cacheado)
     def _check_ffmpeg(self) -> bool:
         """Verifica si FFmpeg está disponible en el sistema"""
-        try:
-            result = subprocess.run(
-                ["ffmpeg", "-version"], 
-                capture_output=True, 
-                text=True
-            )
-            return result.returncode == 0
-        except (subprocess.SubprocessError, FileNotFoundError):
-            return False
+        return probe_ffmpeg().available
         
     def _display_ffmpeg_warning(self):
         """Muestra advertencia amigable sobre FFmpeg"""
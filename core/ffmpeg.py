@@ -0,0 +1,188 @@
+# core/ffmpeg.py - FFMPEG: SONDEO DE CAPACIDADES, ERRORES Y CLASIFICACIÓN
+import collections
+import re
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import IO, Optional, List, FrozenSet, Sequence
+
+# Tipos de fallo de ffmpeg
+MISSING_FFMPEG = "missing_ffmpeg"
+MISSING_CODEC = "missing_codec"
+CORRUPT_INPUT = "corrupt_input"
+DISK_FULL = "disk_full"
+RESOURCES = "resources"
+KILLED = "killed"
+EMPTY_OUTPUT = "empty_output"
+UNKNOWN = "unknown"
+
+# Descripción legible de cada tipo
+DESCRIPTIONS = {
+    MISSING_FFMPEG: "ffmpeg no está instalado",
+    MISSING_CODEC: "codec o formato no disponible en este ffmpeg",
+    CORRUPT_INPUT: "archivo de entrada corrupto o incompleto",
+    DISK_FULL: "sin espacio en disco",
+    RESOURCES: "sin memoria o recursos del sistema",
+    KILLED: "proceso interrumpido",
+    EMPTY_OUTPUT: "ffmpeg no generó salida",
+    UNKNOWN: "error desconocido",
+}
+
+# Fallos transitorios: se reintenta la misma orden
+RETRYABLE = (RESOURCES, KILLED)
+
+# Reintentos de ffmpeg para fallos transitorios
+MAX_ATTEMPTS = 2
+
+# Lineas de stderr que se guardan para el diagnóstico
+STDERR_TAIL_LINES = 20
+
+# Patrones de stderr por tipo (se evalúan en orden)
+_PATTERNS = [
+    (DISK_FULL, re.compile(r"No space left on device|Disk quota exceeded|File too large", re.I)),
+    (MISSING_CODEC, re.compile(
+        r"Unknown encoder|Encoder \S+ not found|Unknown decoder|Decoder \S+ not found"
+        r"|Requested output format .* is not|Unable to find a suitable output format"
+        r"|Automatic encoder selection failed|Could not find tag for codec"
+        r"|codec not currently supported in container", re.I)),
+    (RESOURCES, re.compile(r"Cannot allocate memory|Resource temporarily unavailable"
+                           r"|Too many open files", re.I)),
+    (CORRUPT_INPUT, re.compile(
+        r"Invalid data found when processing input|moov atom not found"
+        r"|could not find codec parameters|Error while decoding|corrupt"
+        r"|EBML header parsing failed|Truncating packet|Invalid NAL unit"
+        r"|End of file|partial file", re.I)),
+]
+
+
+# Excepcion de ffmpeg con el motivo clasificado
+class FFmpegError(Exception):
+    """ffmpeg terminó mal: guarda el código, el tipo de fallo y el final de stderr"""
+
+    def __init__(self, kind: str, returncode: Optional[int] = None,
+                 stderr_tail: Optional[List[str]] = None):
+        self.kind = kind
+        self.returncode = returncode
+        self.stderr_tail = stderr_tail or []
+
+        detail = self.stderr_tail[-1] if self.stderr_tail else ""
+        code = f", código {returncode}" if returncode is not None else ""
+        message = f"FFmpeg falló ({DESCRIPTIONS.get(kind, kind)}{code})"
+        super().__init__(f"{message}: {detail}" if detail else message)
+
+    # Metodo que indica si vale la pena repetir la misma orden
+    @property
+    def retryable(self) -> bool:
+        return self.kind in RETRYABLE
+
+
+# Funcion que clasifica un fallo a partir del código de salida y stderr
+def classify_ffmpeg_error(returncode: int, stderr_lines: List[str]) -> str:
+    """Devuelve el tipo de fallo (DISK_FULL, MISSING_CODEC, CORRUPT_INPUT...)"""
+    text = "\n".join(stderr_lines)
+    for kind, pattern in _PATTERNS:
+        if pattern.search(text):
+            return kind
+
+    # Terminado por una señal (OOM killer, kill -9) o "received signal" en Windows
+    if returncode < 0 or "received signal" in text:
+        return KILLED
+    return UNKNOWN
+
+
+# Clase que lee stderr de ffmpeg en un hilo y guarda las últimas líneas
+class StderrTail:
+    """Vacía stderr (para que ffmpeg nunca se bloquee) conservando el final"""
+
+    def __init__(self, pipe: IO[bytes], max_lines: int = STDERR_TAIL_LINES):
+        self._lines = collections.deque(maxlen=max_lines)
+        self._thread = threading.Thread(target=self._read, args=(pipe,), daemon=True)
+        self._thread.start()
+
+    def _read(self, pipe: IO[bytes]):
+        try:
+            for raw in iter(pipe.readline, b""):
+                line = raw.decode("utf-8", "replace").strip()
+                if line:
+                    self._lines.append(line)
+        except (OSError, ValueError):
+            pass  # pipe cerrado al matar el proceso
+        finally:
+            pipe.close()
+
+    # Metodo que espera el final de stderr y devuelve las líneas guardadas
+    def lines(self, timeout: float = 5) -> List[str]:
+        self._thread.join(timeout)
+        return list(self._lines)
+
+    # Metodo que convierte un código de salida distinto de 0 en FFmpegError
+    def check(self, returncode: int):
+        """Lanza FFmpegError clasificado si ffmpeg no terminó bien"""
+        if returncode == 0:
+            return
+        lines = self.lines()
+        raise FFmpegError(classify_ffmpeg_error(returncode, lines), returncode, lines)
+
+
+# Dataclase con lo que ofrece el ffmpeg instalado
+@dataclass(frozen=True)
+class FFmpegCapabilities:
+    """Resultado de sondear ffmpeg: si existe, su versión y sus codificadores"""
+    available: bool
+    version: Optional[str] = None
+    encoders: FrozenSet[str] = frozenset()
+
+    # Metodo que indica si ffmpeg tiene un codificador (libmp3lame, aac...)
+    def has_encoder(self, name: str) -> bool:
+        # Sin lista (salida inesperada de -encoders) no se bloquea nada
+        return not self.encoders or name in self.encoders
+
+
+# Resultado del sondeo, compartido por todo el proceso
+_capabilities: Optional[FFmpegCapabilities] = None
+_probe_lock = threading.Lock()
+
+# Linea de -encoders: flags ("A....D") y nombre del codificador
+_ENCODER_LINE = re.compile(r"^\s*([VAS][A-Z.]{5})\s+(\S+)")
+_VERSION_LINE = re.compile(r"ffmpeg version (\S+)")
+
+
+# Funcion que sondea ffmpeg la primera vez que se necesita y cachea el resultado
+def probe_ffmpeg(binary: str = "ffmpeg", refresh: bool = False) -> FFmpegCapabilities:
+    """Un solo "ffmpeg -encoders" por proceso: versión (banner) y codificadores"""
+    global _capabilities
+    with _probe_lock:
+        if _capabilities is None or refresh:
+            _capabilities = _run_probe(binary)
+        return _capabilities
+
+
+# Funcion interna: ejecuta ffmpeg y parsea banner (stderr) y lista (stdout)
+def _run_probe(binary: str) -> FFmpegCapabilities:
+    try:
+        result = subprocess.run([binary, "-encoders"], capture_output=True,
+                                text=True, errors="replace", timeout=15)
+    except (OSError, subprocess.SubprocessError):
+        return FFmpegCapabilities(available=False)
+    if result.returncode != 0:
+        return FFmpegCapabilities(available=False)
+
+    version = _VERSION_LINE.search(result.stderr)
+    encoders = set()
+    for line in result.stdout.splitlines():
+        match = _ENCODER_LINE.match(line)
+        if match and match.group(2) != "=":
+            encoders.add(match.group(2))
+
+    return FFmpegCapabilities(available=True,
+                              version=version.group(1) if version else None,
+                              encoders=frozenset(encoders))
+
+
+# Funcion que extrae el codificador de audio de unos argumentos de ffmpeg
+def audio_encoder(args: Sequence[str]) -> Optional[str]:
+    """Devuelve el valor de -codec:a / -c:a / -acodec (None si es copy o no hay)"""
+    for flag, value in zip(args, args[1:]):
+        if flag in ("-codec:a", "-c:a", "-acodec") and value != "copy":
+            return value
+    return None
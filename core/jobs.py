@@ -0,0 +1,412 @@
+# core/jobs.py - COLA DE TRABAJOS CON POOL DE WORKERS ACOTADO (PERSISTENTE OPCIONAL)
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, List, Callable
+
+from core.segmented import DownloadCancelled
+from core.profiles import get_profile
+from core.progress import ProgressEvent
+from core.ffmpeg import FFmpegError
+
+
+# Estados posibles de un trabajo
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, ERROR, CANCELLED)
+
+# Veces que un trabajo interrumpido (reinicio, worker caído) se vuelve a encolar
+MAX_RECOVERY_ATTEMPTS = 3
+
+# Segundos que el cierre espera a que los trabajos en curso vuelvan a la cola
+SHUTDOWN_GRACE = 10
+
+
+# Excepcion de control de admision (la cola está llena)
+class QueueFullError(Exception):
+    """No se aceptan más trabajos hasta que se libere la cola"""
+
+
+# Dataclase con el estado de un trabajo de conversion
+@dataclass
+class Job:
+    """Trabajo de conversión encolado"""
+    id: str
+    kind: str
+    url: str
+    quality: Optional[int] = None
+    # Perfil de codificación (None = el del core)
+    profile: Optional[str] = None
+    state: str = QUEUED
+    error: Optional[str] = None
+    # Tipo de fallo de ffmpeg (disk_full, missing_codec, corrupt_input...)
+    error_kind: Optional[str] = None
+    result_path: Optional[Path] = None
+    # Ruta de procesado que tomó el trabajo (copy, transcode, remux...)
+    report: Dict = field(default_factory=dict)
+    # Último evento de progreso (fase, bytes o posición del codificador)
+    progress: Optional[Dict] = None
+    # Fase en curso (resolve, download, encode, tag, finalize)
+    phase: Optional[str] = None
+    # Archivos producidos (ruta del resultado y su tamaño)
+    artifacts: Dict = field(default_factory=dict)
+    # Veces que se retomó tras una interrupción
+    attempts: int = 0
+    # Contador de cambios (estado o progreso) para quien espera novedades
+    version: int = field(default=0, repr=False)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    # Metodo que devuelve el estado en formato serializable
+    def to_dict(self) -> Dict:
+        """Estado público del trabajo (JSON)"""
+        return {
+            "job_id": self.id,
+            "tipo": self.kind,
+            "url": self.url,
+            "calidad": self.quality,
+            "perfil": self.report.get("profile", self.profile),
+            "estado": self.state,
+            "error": self.error,
+            "error_tipo": self.error_kind,
+            "archivo": self.result_path.name if self.result_path else None,
+            "procesado": self.report.get("path"),
+            "fase": self.phase,
+            "progreso": self.progress,
+            "tiempos": self.report.get("timings"),
+            "intentos": self.attempts,
+            "creado": self.created_at,
+            "iniciado": self.started_at,
+            "terminado": self.finished_at,
+        }
+
+
+# Clase encargada de encolar y ejecutar conversiones con un pool acotado
+class JobManager:
+    """Cola de trabajos con workers limitados y control de admisión
+
+    Con store (JobStore), cada cambio se guarda en SQLite: al arrancar se
+    retoman los trabajos encolados o interrumpidos (la descarga sigue desde
+    los parciales de temp/partials) y los terminados siguen accesibles por ID.
+    """
+
+    def __init__(self, core, workers: int = 4, max_queue: int = 32,
+                 results_dir: str = "results", result_ttl: float = 3600,
+                 store: Optional["JobStore"] = None):
+        self.core = core
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.results_dir = Path(results_dir)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.store = store
+        # Nombre con el que este proceso reclama trabajos en el store
+        self.worker_name = f"hilos-{os.getpid()}"
+
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        # Avisa a quien espera cambios de algún trabajo (eventos SSE)
+        self._changed = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        # Al cerrar, lo interrumpido vuelve a la cola del store en vez de cancelarse
+        self._stopping = False
+        # Trabajos que ejecuta este proceso (en el store puede haber running de otros)
+        self._running = set()
+
+        if store is not None:
+            self._recover()
+
+    # Metodo interno: carga el store y vuelve a encolar lo pendiente
+    def _recover(self):
+        # Solo lo de procesos caídos: otro servidor vivo sigue con sus trabajos
+        requeued, failed = self.store.recover(max_attempts=MAX_RECOVERY_ATTEMPTS, stale_only=True)
+        if requeued or failed:
+            print(f"Trabajos recuperados: {requeued} retomados, {failed} fallidos")
+
+        for job in self.store.list():
+            self._jobs[job.id] = job
+            if job.state == QUEUED:
+                self._executor.submit(self._run, job)
+
+    # Metodo interno: copia el estado del store a un trabajo que no se pudo reclamar
+    def _sync_from_store(self, job: Job):
+        stored = self.store.get(job.id)
+        if stored is None:
+            return
+        with self._lock:
+            job.state = stored.state
+            job.started_at = stored.started_at
+            job.finished_at = stored.finished_at
+            job.error = stored.error
+            job.result_path = stored.result_path
+            self._touch(job)
+
+    # Metodo interno: guarda cambios del trabajo en el store (si hay)
+    def _persist(self, job: Job, **fields):
+        if self.store is not None:
+            self.store.update(job.id, **fields)
+
+    # Metodo que encola un trabajo nuevo (o rechaza si la cola está llena)
+    def submit(self, kind: str, url: str, quality: Optional[int] = None,
+               profile: Optional[str] = None) -> Job:
+        """Crea y encola un trabajo; lanza QueueFullError si no hay sitio"""
+        if kind not in ("mp3", "mp4", "audio"):
+            raise ValueError(f"Tipo de trabajo inválido: {kind}")
+        if profile is not None:
+            profile = get_profile(profile).name
+
+        self._prune()
+
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.state in (QUEUED, RUNNING))
+            if active >= self.workers + self.max_queue:
+                raise QueueFullError(f"Cola llena ({active} trabajos activos)")
+
+            job = Job(id=uuid.uuid4().hex, kind=kind, url=url, quality=quality,
+                      profile=profile)
+            self._jobs[job.id] = job
+
+        if self.store is not None:
+            self.store.add(job)
+        self._executor.submit(self._run, job)
+        return job
+
+    # Metodo que busca un trabajo activo con los mismos parámetros
+    def find_active(self, kind: str, url: str, quality: Optional[int] = None,
+                    profile: Optional[str] = None) -> Optional[Job]:
+        """Encolado o en curso (para unirse a él en vez de repetir la conversión)"""
+        with self._lock:
+            for job in self._jobs.values():
+                if (job.state in (QUEUED, RUNNING) and job.kind == kind and job.url == url
+                        and job.quality == quality and job.profile == profile):
+                    return job
+        return None
+
+    # Metodo que devuelve un trabajo por su ID
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    # Metodo que lista los trabajos conocidos
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    # Metodo que espera a que un trabajo cambie de estado o de progreso
+    def wait_for_change(self, job: Job, version: int, timeout: float = 15) -> int:
+        """Bloquea hasta que job.version != version (o timeout); devuelve la versión actual"""
+        with self._changed:
+            self._changed.wait_for(lambda: job.version != version, timeout)
+            return job.version
+
+    # Metodo interno: marca un cambio del trabajo (llamar con el lock tomado)
+    def _touch(self, job: Job):
+        job.version += 1
+        self._changed.notify_all()
+
+    # Metodo que guarda el último evento de progreso de un trabajo
+    def _publish(self, job: Job, event: ProgressEvent):
+        with self._lock:
+            job.progress = event.to_dict()
+            job.phase = event.phase
+            self._touch(job)
+        self._persist(job, progress=job.progress, phase=job.phase)
+
+    # Metodo que cancela un trabajo (encolado o en curso)
+    def cancel(self, job_id: str) -> bool:
+        """Marca el trabajo como cancelado; False si no existe o ya terminó"""
+        job = self.get(job_id)
+        if job is None or job.state in FINISHED_STATES:
+            return False
+
+        if self.store is not None:
+            self.store.request_cancel(job_id)
+        job.cancel_event.set()
+        with self._lock:
+            if job.state == QUEUED:
+                job.state = CANCELLED
+                job.finished_at = time.time()
+                self._touch(job)
+        return True
+
+    # Metodo que ejecuta un trabajo en un worker del pool
+    def _run(self, job: Job):
+        with self._lock:
+            if job.state != QUEUED or job.cancel_event.is_set():
+                return
+
+        if self.store is not None:
+            # Reclamo atómico en el store: si otro proceso ya lo tomó, no se repite
+            claimed = self.store.claim(self.worker_name, job.id)
+            if claimed is None:
+                self._sync_from_store(job)
+                return
+            started_at = claimed.started_at
+        else:
+            started_at = time.time()
+
+        with self._lock:
+            job.state = RUNNING
+            job.started_at = started_at
+            self._running.add(job.id)
+            self._touch(job)
+
+        on_progress = lambda event: self._publish(job, event)
+        try:
+            result = convert_job(self.core, job, self.results_dir / job.id, on_progress)
+
+            with self._lock:
+                job.result_path = result
+                job.artifacts = result_artifacts(result)
+                job.state = DONE
+
+        except DownloadCancelled:
+            if self._stopping and self.store is not None and not self.store.is_cancel_requested(job.id):
+                # Cierre del servidor: se retoma al arrancar (los parciales se conservan)
+                with self._lock:
+                    job.state = QUEUED
+                    job.started_at = None
+                    self._touch(job)
+                self._persist(job, state=QUEUED, started_at=None, progress=None, report=job.report)
+                return
+            with self._lock:
+                job.state = CANCELLED
+            self._remove_result(job)
+        except FFmpegError as e:
+            with self._lock:
+                job.state = ERROR
+                job.error = str(e)
+                job.error_kind = e.kind
+            self._remove_result(job)
+        except Exception as e:
+            with self._lock:
+                job.state = ERROR
+                job.error = str(e)
+            self._remove_result(job)
+        finally:
+            if job.state != QUEUED:
+                with self._lock:
+                    job.finished_at = time.time()
+                    self._touch(job)
+                self._persist(job, state=job.state, error=job.error, error_kind=job.error_kind,
+                              result_path=job.result_path, artifacts=job.artifacts,
+                              report=job.report, finished_at=job.finished_at)
+            with self._lock:
+                self._running.discard(job.id)
+                self._changed.notify_all()
+
+    # Metodo que borra la carpeta de resultado de un trabajo
+    def _remove_result(self, job: Job):
+        remove_result(self.results_dir, job.id)
+
+    # Metodo que olvida los trabajos terminados hace tiempo (y sus archivos)
+    def _prune(self):
+        """Elimina trabajos terminados más viejos que result_ttl"""
+        now = time.time()
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.state in FINISHED_STATES and job.finished_at
+                       and now - job.finished_at > self.result_ttl]
+            for job in expired:
+                del self._jobs[job.id]
+
+        if self.store is not None:
+            self.store.delete([job.id for job in expired])
+        for job in expired:
+            self._remove_result(job)
+
+    # Metodo para detener el pool (cancela lo pendiente)
+    def shutdown(self):
+        """Detiene los workers; sin store cancela lo activo, con store queda para el reinicio
+
+        Con store espera hasta SHUTDOWN_GRACE segundos a que lo que corre vuelva a la cola.
+        """
+        if self.store is None:
+            for job in self.list():
+                if job.state in (QUEUED, RUNNING):
+                    self.cancel(job.id)
+        else:
+            # Interrumpir lo que corre; lo encolado sigue queued en el store
+            self._stopping = True
+            for job in self.list():
+                if job.id in self._running:
+                    job.cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        if self.store is not None:
+            # Esperar a que lo interrumpido vuelva a queued; lo que no llegue a tiempo
+            # se devuelve a la cola sin contar un intento (no quedan filas running huérfanas)
+            deadline = time.time() + SHUTDOWN_GRACE
+            with self._lock:
+                while self._running:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._changed.wait(remaining)
+            self.store.release(self.worker_name)
+
+
+# Funcion que ejecuta la conversión de un trabajo (la usan los hilos y el tier de procesos)
+def convert_job(core, job: Job, output_dir: Path,
+                on_progress: Optional[Callable[[ProgressEvent], None]] = None) -> Path:
+    """Convierte job.url según job.kind dentro de output_dir y devuelve la ruta final"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    video = core.resolve(job.url)
+    video_info = core.get_video_info(video)
+
+    if job.kind == "mp3":
+        output_path = output_dir / core.suggest_filename(video_info, ".mp3", with_artist=True)
+        result = core.download_mp3(video, output_path,
+                                   cancel_event=job.cancel_event,
+                                   report=job.report,
+                                   profile=job.profile,
+                                   on_progress=on_progress)
+    elif job.kind == "audio":
+        output_path = output_dir / core.suggest_filename(
+            video_info, core.original_audio_extension(video), with_artist=True)
+        result = core.download_audio(video, output_path,
+                                     cancel_event=job.cancel_event,
+                                     report=job.report,
+                                     profile=job.profile,
+                                     on_progress=on_progress)
+    else:
+        output_path = output_dir / core.suggest_filename(video_info, ".mp4")
+        result = core.download_mp4(video, job.quality or 5, output_path,
+                                   cancel_event=job.cancel_event,
+                                   report=job.report,
+                                   profile=job.profile,
+                                   on_progress=on_progress)
+
+    return Path(result)
+
+
+# Funcion que describe los archivos producidos por un trabajo terminado
+def result_artifacts(result: Path) -> Dict:
+    try:
+        size = result.stat().st_size
+    except OSError:
+        size = None
+    return {"result": str(result), "size": size}
+
+
+# Funcion que borra la carpeta de resultado de un trabajo
+def remove_result(results_dir: Path, job_id: str):
+    output_dir = Path(results_dir) / job_id
+    if output_dir.exists():
+        for path in output_dir.iterdir():
+            path.unlink(missing_ok=True)
+        try:
+            output_dir.rmdir()
+        except OSError:
+            pass
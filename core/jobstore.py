@@ -0,0 +1,351 @@
+# core/jobstore.py - ESTADO DE TRABAJOS PERSISTENTE Y COMPARTIDO ENTRE PROCESOS (SQLITE WAL)
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, List, Tuple
+
+from core.jobs import Job, QUEUED, RUNNING, ERROR, CANCELLED, FINISHED_STATES
+from core.workspace import process_alive
+
+
+# Ubicación por defecto (fuera de temp/, que se limpia al arrancar y cerrar)
+DEFAULT_STORE = "results/jobs.db"
+
+# Espera máxima por el bloqueo de escritura de otro proceso
+BUSY_TIMEOUT = 10
+
+# Nombres de worker con el PID del proceso dueño: "hilos-{pid}" y "worker-{pid}-{n}"
+_OWNER_RE = re.compile(r'^(?:hilos|worker)-(\d+)(?:-\d+)?$')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    quality INTEGER,
+    profile TEXT,
+    state TEXT NOT NULL,
+    error TEXT,
+    error_kind TEXT,
+    result_path TEXT,
+    report TEXT NOT NULL DEFAULT '{}',
+    progress TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, created_at);
+"""
+
+# Columnas añadidas después de la primera versión (se agregan a bases existentes)
+_MIGRATIONS = {
+    "phase": "TEXT",
+    "artifacts": "TEXT NOT NULL DEFAULT '{}'",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+}
+
+# Columnas que se pueden actualizar desde fuera (el resto las gestiona el store)
+_UPDATABLE = ("state", "error", "error_kind", "result_path", "report", "progress",
+              "phase", "artifacts", "started_at", "finished_at")
+
+# Columnas guardadas como JSON
+_JSON_FIELDS = ("report", "progress", "artifacts")
+
+
+# Clase que guarda los trabajos en SQLite para que varios procesos los compartan
+class JobStore:
+    """Trabajos, progreso y cancelaciones visibles para todos los procesos
+
+    Los servidores web insertan trabajos y leen su estado; los workers los
+    reclaman (queued -> running de forma atómica) y publican fase, progreso,
+    tiempos y archivos producidos. Cada escritura incrementa version, que es
+    lo que vigilan los clientes SSE.
+
+    En modo WAL las lecturas no esperan a las escrituras y todo sobrevive a
+    un reinicio: recover() devuelve a la cola lo que quedó a medias.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE, timeout: float = BUSY_TIMEOUT):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        # Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)
+        self._local = threading.local()
+
+        conn = self._connect()
+        # WAL es persistente: queda activado en el archivo para todos los procesos
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        self._migrate(conn)
+
+    # Metodo interno: conexión del hilo actual (autocommit; transacciones explícitas)
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            # Con WAL, NORMAL no pierde consistencia (solo lo último ante un corte de luz)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Metodo interno: añade las columnas nuevas a una base creada por una versión anterior
+    def _migrate(self, conn: sqlite3.Connection):
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in _MIGRATIONS.items():
+            if column not in existing:
+                try:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+                except sqlite3.OperationalError:
+                    # Otro proceso la añadió a la vez
+                    pass
+
+    # Metodo interno: transacción con bloqueo de escritura desde el inicio
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    # Metodo que guarda un trabajo nuevo si hay sitio (admisión atómica entre procesos)
+    def add(self, job: Job, limit: Optional[int] = None) -> bool:
+        """Inserta el trabajo; False si ya hay limit trabajos activos"""
+        with self._transaction() as conn:
+            if limit is not None and self._count_active(conn) >= limit:
+                return False
+            conn.execute(
+                "INSERT INTO jobs (id, kind, url, quality, profile, state, report, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.kind, job.url, job.quality, job.profile, job.state,
+                 json.dumps(job.report), job.created_at))
+        return True
+
+    # Metodo que devuelve un trabajo por su ID (copia; no se actualiza sola)
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_from_row(row) if row else None
+
+    # Metodo que lista los trabajos conocidos
+    def list(self) -> List[Job]:
+        rows = self._connect().execute("SELECT * FROM jobs ORDER BY created_at").fetchall()
+        return [_job_from_row(row) for row in rows]
+
+    # Metodo que devuelve la versión actual de un trabajo (None si no existe)
+    def version(self, job_id: str) -> Optional[int]:
+        row = self._connect().execute("SELECT version FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    # Metodo que cuenta los trabajos encolados o en curso
+    def count_active(self) -> int:
+        return self._count_active(self._connect())
+
+    def _count_active(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)",
+                            (QUEUED, RUNNING)).fetchone()[0]
+
+    # Metodo que reserva un trabajo encolado para un worker (el más antiguo o job_id)
+    def claim(self, worker: str, job_id: Optional[str] = None) -> Optional[Job]:
+        """Pasa un trabajo de queued a running; dos workers nunca reciben el mismo
+
+        Con job_id solo se reclama ese trabajo (None si ya no está encolado).
+        """
+        with self._transaction() as conn:
+            if job_id is None:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE state = ? AND cancel_requested = 0 "
+                    "ORDER BY created_at LIMIT 1", (QUEUED,)).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE id = ? AND state = ? AND cancel_requested = 0",
+                    (job_id, QUEUED)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = ?, started_at = ?, worker = ?, version = version + 1 "
+                "WHERE id = ?", (RUNNING, time.time(), worker, row["id"]))
+        return self.get(row["id"])
+
+    # Metodo que actualiza campos de un trabajo y avisa del cambio
+    def update(self, job_id: str, **fields):
+        """Campos admitidos: state, error, error_kind, result_path, report, progress,
+        phase, artifacts, started_at, finished_at"""
+        unknown = set(fields) - set(_UPDATABLE)
+        if unknown:
+            raise ValueError(f"Campos no actualizables: {', '.join(sorted(unknown))}")
+
+        values = []
+        for name in fields:
+            value = fields[name]
+            if name in _JSON_FIELDS and value is not None:
+                value = json.dumps(value, ensure_ascii=False)
+            elif name == "result_path" and value is not None:
+                value = str(value)
+            values.append(value)
+
+        assignments = "".join(f"{name} = ?, " for name in fields)
+        self._connect().execute(
+            f"UPDATE jobs SET {assignments}version = version + 1 WHERE id = ?",
+            (*values, job_id))
+
+    # Metodo que pide cancelar un trabajo (el worker que lo ejecuta lo verá)
+    def request_cancel(self, job_id: str) -> bool:
+        """Marca la cancelación; un trabajo aún encolado pasa a cancelled directamente"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["state"] in FINISHED_STATES:
+                return False
+            if row["state"] == QUEUED:
+                conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1, state = ?, finished_at = ?, "
+                    "version = version + 1 WHERE id = ?", (CANCELLED, time.time(), job_id))
+            else:
+                conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1, version = version + 1 WHERE id = ?",
+                    (job_id,))
+        return True
+
+    # Metodo que indica si alguien pidió cancelar el trabajo
+    def is_cancel_requested(self, job_id: str) -> bool:
+        row = self._connect().execute("SELECT cancel_requested FROM jobs WHERE id = ?",
+                                      (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    # Metodo que devuelve a la cola los trabajos que quedaron en curso (reinicio o worker caído)
+    def recover(self, worker: Optional[str] = None, max_attempts: int = 3,
+                stale_only: bool = False) -> Tuple[int, int]:
+        """Running -> queued (o error tras max_attempts); devuelve (retomados, fallidos)
+
+        Si se pidió cancelarlos pasan a cancelled. La descarga se retoma desde
+        los parciales de temp/partials, no desde cero. Con stale_only solo se
+        tocan los trabajos cuyo proceso dueño ya no existe (otros servidores o
+        tiers vivos siguen con los suyos).
+        """
+        where = "state = ?"
+        params: List = [RUNNING]
+        if worker is not None:
+            where += " AND worker = ?"
+            params.append(worker)
+
+        now = time.time()
+        with self._transaction() as conn:
+            if stale_only:
+                owners = [row[0] for row in conn.execute(
+                    f"SELECT DISTINCT worker FROM jobs WHERE {where} AND worker IS NOT NULL",
+                    params)]
+                stale = [owner for owner in owners if _owner_gone(owner)]
+                where += f" AND (worker IS NULL OR worker IN ({', '.join('?' * len(stale)) or 'NULL'}))"
+                params.extend(stale)
+
+            conn.execute(
+                f"UPDATE jobs SET state = ?, finished_at = ?, version = version + 1 "
+                f"WHERE {where} AND cancel_requested = 1", (CANCELLED, now, *params))
+            failed = conn.execute(
+                f"UPDATE jobs SET state = ?, error = ?, finished_at = ?, version = version + 1 "
+                f"WHERE {where} AND attempts + 1 >= ?",
+                (ERROR, f"Interrumpido {max_attempts} veces, no se reintenta", now,
+                 *params, max_attempts)).rowcount
+            requeued = conn.execute(
+                f"UPDATE jobs SET state = ?, attempts = attempts + 1, worker = NULL, "
+                f"started_at = NULL, progress = NULL, version = version + 1 WHERE {where}",
+                (QUEUED, *params)).rowcount
+        return requeued, failed
+
+    # Metodo que devuelve a la cola lo que un worker deja a medias al cerrar
+    def release(self, worker: str) -> int:
+        """Running de worker -> queued sin contar un intento (cierre ordenado, no caída)"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, finished_at = ?, version = version + 1 "
+                "WHERE state = ? AND worker = ? AND cancel_requested = 1",
+                (CANCELLED, time.time(), RUNNING, worker))
+            return conn.execute(
+                "UPDATE jobs SET state = ?, worker = NULL, started_at = NULL, progress = NULL, "
+                "version = version + 1 WHERE state = ? AND worker = ?",
+                (QUEUED, RUNNING, worker)).rowcount
+
+    # Metodo que busca un trabajo activo con los mismos parámetros
+    def find_active(self, kind: str, url: str, quality: Optional[int] = None,
+                    profile: Optional[str] = None) -> Optional[Job]:
+        """Encolado o en curso (para unirse a él en vez de repetir la conversión)"""
+        row = self._connect().execute(
+            "SELECT * FROM jobs WHERE state IN (?, ?) AND kind = ? AND url = ? "
+            "AND quality IS ? AND profile IS ? ORDER BY created_at LIMIT 1",
+            (QUEUED, RUNNING, kind, url, quality, profile)).fetchone()
+        return _job_from_row(row) if row else None
+
+    # Metodo que devuelve los trabajos terminados hace más de ttl segundos
+    def expired(self, ttl: float) -> List[Job]:
+        rows = self._connect().execute(
+            f"SELECT * FROM jobs WHERE state IN ({', '.join('?' * len(FINISHED_STATES))}) "
+            "AND finished_at IS NOT NULL AND finished_at < ?",
+            (*FINISHED_STATES, time.time() - ttl)).fetchall()
+        return [_job_from_row(row) for row in rows]
+
+    # Metodo que borra trabajos del store
+    def delete(self, job_ids: List[str]):
+        if not job_ids:
+            return
+        self._connect().execute(
+            f"DELETE FROM jobs WHERE id IN ({', '.join('?' * len(job_ids))})", list(job_ids))
+
+    # Metodo que cierra la conexión del hilo actual
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Clase auxiliar: BEGIN IMMEDIATE / COMMIT / ROLLBACK como context manager
+class _Transaction:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+# Funcion que indica si el proceso dueño de un nombre de worker ya no existe
+def _owner_gone(worker: str) -> bool:
+    """Sin PID reconocible, PID muerto o el propio PID (ejecución anterior reutilizándolo)"""
+    match = _OWNER_RE.match(worker)
+    if match is None:
+        return True
+    pid = int(match.group(1))
+    return pid == os.getpid() or not process_alive(pid)
+
+
+# Funcion que reconstruye un Job a partir de una fila del store
+def _job_from_row(row: sqlite3.Row) -> Job:
+    job = Job(
+        id=row["id"],
+        kind=row["kind"],
+        url=row["url"],
+        quality=row["quality"],
+        profile=row["profile"],
+        state=row["state"],
+        error=row["error"],
+        error_kind=row["error_kind"],
+        result_path=Path(row["result_path"]) if row["result_path"] else None,
+        report=json.loads(row["report"] or "{}"),
+        progress=json.loads(row["progress"]) if row["progress"] else None,
+        phase=row["phase"],
+        artifacts=json.loads(row["artifacts"] or "{}"),
+        attempts=row["attempts"],
+        version=row["version"],
+        created_at=row["created_at"],
+        started_at=row["started_at"],
+        finished_at=row["finished_at"],
+    )
+    if row["cancel_requested"]:
+        job.cancel_event.set()
+    return job
@@ -0,0 +1,272 @@
+# core/outputcache.py - CACHÉ EN DISCO DE ARCHIVOS TERMINADOS (MP3/MP4)
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Dict, Hashable
+
+# Segundos entre escrituras del índice por lecturas (los aciertos solo tocan la memoria)
+INDEX_SAVE_INTERVAL = 30
+
+
+# Entrada del cache: archivo publicado y sus datos de uso
+@dataclass
+class CachedOutput:
+    """Archivo terminado guardado en el cache"""
+    key: str
+    file: str
+    filename: str
+    size: int
+    created: float
+    last_access: float
+    hits: int = 0
+
+    # Ruta del archivo (se resuelve respecto a la carpeta del cache)
+    path: Optional[Path] = None
+
+
+# Clase encargada de guardar las conversiones terminadas en disco
+class OutputCache:
+    """Cache direccionado por contenido con presupuesto de bytes y expulsión LRU
+
+    Los archivos se publican con rename atómico y el índice (index.json)
+    se reescribe también de forma atómica, así sobrevive a reinicios. Los
+    accesos (LRU) se guardan con cada escritura o cada INDEX_SAVE_INTERVAL
+    segundos; flush() los persiste al cerrar. max_bytes <= 0 lo desactiva.
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, root: str = "cache", max_bytes: int = 2 * 1024 ** 3):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._entries: Dict[str, CachedOutput] = {}
+        # Archivos que se están enviando: no se expulsan hasta liberarlos
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Accesos aún no guardados en index.json
+        self._dirty = False
+        self._last_save = time.time()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load_index()
+
+    # Metodo que convierte una clave (tupla de parametros) en su hash
+    @staticmethod
+    def make_key(key: Hashable) -> str:
+        """SHA-256 de la representación JSON de la clave"""
+        raw = json.dumps(key, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # Metodo que carga el indice y descarta lo que ya no existe en disco
+    def _load_index(self):
+        # Desactivado: no se expulsa ni se borra nada de la carpeta
+        if self.max_bytes <= 0:
+            return
+
+        index_path = self.root / self.INDEX_NAME
+        try:
+            data = json.loads(index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+
+        for raw in data.get("entries", []):
+            try:
+                entry = CachedOutput(**{k: v for k, v in raw.items() if k != "path"})
+            except TypeError:
+                continue
+            entry.path = self.root / entry.file
+            if entry.path.exists() and entry.path.stat().st_size == entry.size:
+                self._entries[entry.key] = entry
+
+        # Archivos huérfanos (publicaciones interrumpidas o sin índice)
+        known = {entry.file for entry in self._entries.values()}
+        for path in self.root.iterdir():
+            if path.name == self.INDEX_NAME or path.name in known or not path.is_file():
+                continue
+            path.unlink(missing_ok=True)
+
+        with self._lock:
+            self._evict()
+            self._save_index()
+
+    # Metodo interno de guardado atomico del indice
+    def _save_index(self):
+        """Reescribe index.json; debe llamarse con el lock tomado"""
+        index_path = self.root / self.INDEX_NAME
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        entries = []
+        for entry in self._entries.values():
+            data = asdict(entry)
+            data.pop("path")
+            entries.append(data)
+        tmp_path.write_text(json.dumps({"entries": entries}), encoding="utf-8")
+        os.replace(tmp_path, index_path)
+        self._dirty = False
+        self._last_save = time.time()
+
+    # Metodo interno: guarda los accesos pendientes si pasó INDEX_SAVE_INTERVAL
+    def _save_if_due(self):
+        """Debe llamarse con el lock tomado"""
+        if self._dirty and time.time() - self._last_save >= INDEX_SAVE_INTERVAL:
+            self._save_index()
+
+    # Metodo que guarda en disco los accesos pendientes (al cerrar)
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    # Metodo que devuelve el total de bytes guardados
+    def total_bytes(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
+
+    # Metodo interno que respeta el presupuesto de bytes
+    def _evict(self) -> bool:
+        """Expulsa las entradas usadas hace más tiempo (nunca las que se están enviando)
+
+        Devuelve True si expulsó alguna (hay que guardar el índice)
+        """
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return False
+
+        evicted = False
+        for entry in sorted(self._entries.values(), key=lambda e: e.last_access):
+            if total <= self.max_bytes:
+                break
+            if self._pins.get(entry.key):
+                continue
+            del self._entries[entry.key]
+            entry.path.unlink(missing_ok=True)
+            total -= entry.size
+            self.evictions += 1
+            evicted = True
+        return evicted
+
+    # Metodo que busca un archivo terminado (queda reservado hasta release)
+    def get(self, key: Hashable) -> Optional[CachedOutput]:
+        """Devuelve la entrada si existe; hay que llamar a release(key) al terminar de enviarla"""
+        if self.max_bytes <= 0:
+            return None
+
+        digest = self.make_key(key)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or not entry.path.exists():
+                if entry is not None:
+                    del self._entries[digest]
+                    self._save_index()
+                self.misses += 1
+                return None
+
+            entry.last_access = time.time()
+            entry.hits += 1
+            self.hits += 1
+            self._pins[digest] = self._pins.get(digest, 0) + 1
+            self._dirty = True
+            self._save_if_due()
+            return entry
+
+    # Metodo que libera una entrada obtenida con get() o publish()
+    def release(self, key: Hashable):
+        digest = self.make_key(key)
+        with self._lock:
+            pins = self._pins.get(digest, 0) - 1
+            if pins > 0:
+                self._pins[digest] = pins
+            else:
+                self._pins.pop(digest, None)
+            if self._evict():
+                self._save_index()
+            else:
+                self._save_if_due()
+
+    # Metodo que guarda un archivo terminado en el cache (mueve o enlaza el original)
+    def publish(self, key: Hashable, source: Path, filename: Optional[str] = None,
+                keep_source: bool = False) -> Optional[CachedOutput]:
+        """Mueve source al cache y devuelve la entrada reservada; None si no cabe
+
+        Con keep_source el original se queda donde está (otro lo referencia,
+        p. ej. el resultado de un trabajo): se publica un hardlink o una copia.
+        """
+        source = Path(source)
+        size = source.stat().st_size
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return None
+
+        digest = self.make_key(key)
+        final_path = self.root / f"{digest}{source.suffix}"
+
+        # Copiar (o mover) a un temporal del mismo disco y publicar con rename atómico
+        tmp_path = self.root / f".{digest}.{uuid.uuid4().hex}.tmp"
+        try:
+            if keep_source:
+                _link_or_copy(source, tmp_path)
+            else:
+                shutil.move(str(source), str(tmp_path))
+            os.replace(tmp_path, final_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        now = time.time()
+        entry = CachedOutput(
+            key=digest,
+            file=final_path.name,
+            filename=filename or source.name,
+            size=size,
+            created=now,
+            last_access=now,
+            path=final_path
+        )
+
+        with self._lock:
+            self._entries[digest] = entry
+            self._pins[digest] = self._pins.get(digest, 0) + 1
+            self._evict()
+            self._save_index()
+        return entry
+
+    # Metodo para invalidar una entrada concreta
+    def invalidate(self, key: Hashable) -> bool:
+        digest = self.make_key(key)
+        with self._lock:
+            entry = self._entries.pop(digest, None)
+            if entry is None:
+                return False
+            if not self._pins.get(digest):
+                entry.path.unlink(missing_ok=True)
+            self._save_index()
+            return True
+
+    # Metodo que devuelve las estadisticas del cache
+    def stats(self) -> Dict:
+        """Estadísticas de uso y ocupación"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes(),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+# Funcion que enlaza un archivo (mismo disco) o lo copia si no se puede
+def _link_or_copy(source: Path, destination: Path):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
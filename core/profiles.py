@@ -0,0 +1,101 @@
+# core/profiles.py - PERFILES DE CODIFICACIÓN PARA FFMPEG (CALIDAD VS RENDIMIENTO)
+import dataclasses
+import os
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+
+# Dataclase con los parametros de ffmpeg de un perfil
+@dataclass(frozen=True)
+class EncoderProfile:
+    """Parámetros de codificación, hilos y prioridad de un perfil"""
+    name: str
+    description: str
+    # MP3 en archivo (admite VBR: la cabecera Xing se escribe al final)
+    mp3_args: Tuple[str, ...]
+    # MP3 en streaming (CBR: no se puede volver atrás a escribir la cabecera)
+    mp3_stream_args: Tuple[str, ...]
+    # Audio del MP4 cuando hay que recodificar
+    aac_args: Tuple[str, ...]
+    # Hilos por proceso ffmpeg (0 = que decida ffmpeg)
+    threads: int = 0
+    # Prioridad del proceso (0 normal, 1-19 más baja; en Windows >0 = BELOW_NORMAL)
+    nice: int = 0
+
+    # Metodo que devuelve los argumentos de salida comunes (hilos)
+    def output_args(self) -> List[str]:
+        return ["-threads", str(self.threads)] if self.threads > 0 else []
+
+    # Metodo que devuelve una copia con hilos/prioridad cambiados
+    def with_overrides(self, threads: Optional[int] = None, nice: Optional[int] = None) -> "EncoderProfile":
+        changes = {}
+        if threads is not None:
+            changes["threads"] = max(0, threads)
+        if nice is not None:
+            changes["nice"] = min(max(0, nice), 19)
+        return dataclasses.replace(self, **changes) if changes else self
+
+
+# Perfiles disponibles ("balanced" conserva los parametros de siempre)
+PROFILES: Dict[str, EncoderProfile] = {
+    "fast": EncoderProfile(
+        name="fast",
+        description="Rápido: VBR ~130 kbps, LAME en modo rápido, 1 hilo y prioridad baja",
+        mp3_args=("-codec:a", "libmp3lame", "-q:a", "5", "-compression_level", "9"),
+        mp3_stream_args=("-codec:a", "libmp3lame", "-b:a", "128k", "-compression_level", "9"),
+        aac_args=("-c:a", "aac", "-b:a", "128k"),
+        threads=1,
+        nice=10,
+    ),
+    "balanced": EncoderProfile(
+        name="balanced",
+        description="Equilibrado: VBR ~190-250 kbps (calidad 2), AAC 192 kbps",
+        mp3_args=("-codec:a", "libmp3lame", "-q:a", "2"),
+        mp3_stream_args=("-codec:a", "libmp3lame", "-b:a", "192k"),
+        aac_args=("-c:a", "aac", "-b:a", "192k"),
+        threads=0,
+        nice=0,
+    ),
+    "archival": EncoderProfile(
+        name="archival",
+        description="Archivo: MP3 CBR 320 kbps con LAME en máxima calidad, AAC 256 kbps",
+        mp3_args=("-codec:a", "libmp3lame", "-b:a", "320k", "-compression_level", "0"),
+        mp3_stream_args=("-codec:a", "libmp3lame", "-b:a", "320k", "-compression_level", "0"),
+        aac_args=("-c:a", "aac", "-b:a", "256k"),
+        threads=0,
+        nice=0,
+    ),
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+# Funcion que devuelve un perfil por nombre (o el mismo si ya es un perfil)
+def get_profile(profile: Union[str, EncoderProfile, None] = None) -> EncoderProfile:
+    """Resuelve un perfil; lanza ValueError si el nombre no existe"""
+    if isinstance(profile, EncoderProfile):
+        return profile
+
+    name = (profile or DEFAULT_PROFILE).lower()
+    if name not in PROFILES:
+        raise ValueError(f"Perfil desconocido: {profile}. Use: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+# Funcion que baja la prioridad de un proceso ffmpeg recién lanzado
+def apply_priority(process: subprocess.Popen, profile: EncoderProfile):
+    """Aplica el nice del perfil (POSIX) o BELOW_NORMAL (Windows) sin preexec_fn"""
+    if profile.nice <= 0:
+        return
+
+    try:
+        if hasattr(os, "setpriority"):
+            os.setpriority(os.PRIO_PROCESS, process.pid, profile.nice)
+        elif os.name == "nt":
+            import ctypes
+            BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
+            ctypes.windll.kernel32.SetPriorityClass(int(process._handle), BELOW_NORMAL_PRIORITY_CLASS)
+    except Exception:
+        # Sin permisos o proceso ya terminado: se sigue con prioridad normal
+        pass
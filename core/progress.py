@@ -0,0 +1,159 @@
+# core/progress.py - EVENTOS DE PROGRESO Y TIEMPOS POR FASE
+import contextlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Callable, IO
+
+# Fases de un trabajo (en orden)
+RESOLVE = "resolve"
+DOWNLOAD = "download"
+ENCODE = "encode"
+TAG = "tag"
+FINALIZE = "finalize"
+
+# Tipos de evento
+START = "start"
+PROGRESS = "progress"
+END = "end"
+
+# Minimo entre dos eventos de progreso de la misma pista (segundos)
+MIN_EVENT_INTERVAL = 0.25
+
+
+# Dataclase con un evento de progreso
+@dataclass
+class ProgressEvent:
+    """Inicio/fin de una fase, bytes descargados o posición del codificador"""
+    phase: str
+    event: str
+    # audio / video (solo en la descarga)
+    track: Optional[str] = None
+    # Bytes descargados o segundos codificados
+    done: float = 0
+    total: Optional[float] = None
+    # Segundos desde el inicio del trabajo
+    elapsed: float = 0.0
+    # Duración de la fase (solo en END)
+    duration: Optional[float] = None
+
+    # Metodo que devuelve el porcentaje (None si no se conoce el total)
+    def percent(self) -> Optional[float]:
+        if not self.total:
+            return None
+        return min(100.0, 100.0 * self.done / self.total)
+
+    # Metodo que devuelve el evento en formato serializable
+    def to_dict(self) -> Dict:
+        percent = self.percent()
+        return {
+            "fase": self.phase,
+            "evento": self.event,
+            "pista": self.track,
+            "hecho": self.done,
+            "total": self.total,
+            "porcentaje": round(percent, 1) if percent is not None else None,
+            "transcurrido": round(self.elapsed, 2),
+            "duracion": round(self.duration, 3) if self.duration is not None else None,
+        }
+
+
+# Clase que acumula el progreso de un trabajo y lo reenvía a un callback
+class ProgressTracker:
+    """Mide cada fase y emite eventos (acotados en frecuencia) al callback
+
+    Sin callback solo registra los tiempos por fase. Es seguro usarlo desde
+    varios hilos (audio y video se descargan a la vez).
+    """
+
+    def __init__(self, callback: Optional[Callable[[ProgressEvent], None]] = None,
+                 min_interval: float = MIN_EVENT_INTERVAL):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self._bytes: Dict[str, int] = {}
+        self._last_emit: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # Metodo que mide una fase (se puede repetir: los tiempos se suman)
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        self._emit(ProgressEvent(name, START))
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            duration = time.perf_counter() - started
+            with self._lock:
+                self.timings[name] = self.timings.get(name, 0.0) + duration
+            self._emit(ProgressEvent(name, END, duration=duration))
+
+    # Metodo que suma bytes descargados de una pista
+    def add_bytes(self, track: str, count: int, total: Optional[int] = None):
+        """Acumula count bytes; emite como mucho un evento cada min_interval"""
+        with self._lock:
+            done = self._bytes.get(track, 0) + count
+            self._bytes[track] = done
+        if self._should_emit(track, done >= (total or 0) > 0):
+            self._emit(ProgressEvent(DOWNLOAD, PROGRESS, track=track, done=done, total=total))
+
+    # Metodo que fija los bytes de una pista (callbacks que dan el total restante)
+    def set_bytes(self, track: str, done: int, total: Optional[int] = None):
+        with self._lock:
+            self._bytes[track] = done
+        if self._should_emit(track, done >= (total or 0) > 0):
+            self._emit(ProgressEvent(DOWNLOAD, PROGRESS, track=track, done=done, total=total))
+
+    # Metodo que informa la posición del codificador (segundos de salida)
+    def set_position(self, seconds: float, duration: Optional[float] = None):
+        final = bool(duration) and seconds >= duration
+        if self._should_emit(ENCODE, final):
+            self._emit(ProgressEvent(ENCODE, PROGRESS, done=round(seconds, 2), total=duration))
+
+    # Metodo que devuelve los tiempos por fase y el total (segundos)
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            timings = {name: round(seconds, 3) for name, seconds in self.timings.items()}
+        timings["total"] = round(time.perf_counter() - self.started, 3)
+        return timings
+
+    # Metodo interno: limita la frecuencia de eventos por clave
+    def _should_emit(self, key: str, force: bool = False) -> bool:
+        if self.callback is None:
+            return False
+        now = time.perf_counter()
+        with self._lock:
+            if not force and now - self._last_emit.get(key, 0.0) < self.min_interval:
+                return False
+            self._last_emit[key] = now
+            return True
+
+    # Metodo interno: entrega el evento sin dejar que un callback roto corte el trabajo
+    def _emit(self, event: ProgressEvent):
+        if self.callback is None:
+            return
+        event.elapsed = time.perf_counter() - self.started
+        try:
+            self.callback(event)
+        except Exception as e:
+            print(f"Advertencia en callback de progreso: {e}")
+
+
+# Funcion que extrae la posición (segundos) de una línea de "ffmpeg -progress"
+def parse_ffmpeg_progress(raw: bytes) -> Optional[float]:
+    """Devuelve los segundos de out_time_us o None si la línea es otra clave"""
+    key, _, value = raw.decode("ascii", "replace").strip().partition("=")
+    # out_time_us está en microsegundos (out_time_ms también, por un bug histórico)
+    if key == "out_time_us" and value.lstrip("-").isdigit():
+        return max(0, int(value)) / 1_000_000
+    return None
+
+
+# Funcion que lee la salida de "ffmpeg -progress" y reporta la posición
+def read_ffmpeg_progress(pipe: IO[bytes], on_position: Callable[[float], None]):
+    """Consume las líneas clave=valor hasta que ffmpeg cierra el pipe"""
+    for raw in iter(pipe.readline, b""):
+        seconds = parse_ffmpeg_progress(raw)
+        if seconds is not None:
+            on_position(seconds)
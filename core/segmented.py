@@ -0,0 +1,299 @@
+# core/segmented.py - DESCARGA SEGMENTADA POR RANGOS (MULTI-CONEXIÓN)
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Tuple, Iterator, Callable, TYPE_CHECKING
+
+# requests se importa al crear la primera sesión (no al importar el core)
+if TYPE_CHECKING:
+    import requests
+
+
+# Tamaño de cada rango (YouTube limita la velocidad por conexión, no por rango)
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Tamaño de lectura de cada respuesta
+READ_SIZE = 256 * 1024
+
+# Limite global de conexiones simultaneas (sumando todos los trabajos)
+GLOBAL_MAX_CONNECTIONS = 32
+_global_slots = threading.BoundedSemaphore(GLOBAL_MAX_CONNECTIONS)
+
+
+# Excepcion que indica que el trabajo fue cancelado (no se reintenta)
+class DownloadCancelled(Exception):
+    """La descarga se interrumpió porque el trabajo fue cancelado"""
+
+
+# Funcion para ajustar el limite global de conexiones
+def set_global_connection_limit(limit: int):
+    """Cambia el máximo de conexiones simultáneas de todo el proceso"""
+    global _global_slots, GLOBAL_MAX_CONNECTIONS
+    GLOBAL_MAX_CONNECTIONS = max(1, limit)
+    _global_slots = threading.BoundedSemaphore(GLOBAL_MAX_CONNECTIONS)
+
+
+# Funcion que divide el tamaño del archivo en rangos de bytes
+def split_ranges(filesize: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 completed: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[int, int]]:
+    """Devuelve rangos (inicio, fin) inclusivos que faltan por descargar"""
+    # Huecos que no cubren los rangos ya completados
+    gaps = []
+    position = 0
+    for start, end in sorted(completed or []):
+        if start > position:
+            gaps.append((position, min(start, filesize) - 1))
+        position = max(position, end + 1)
+    if position < filesize:
+        gaps.append((position, filesize - 1))
+
+    return [
+        (start, min(start + chunk_size - 1, gap_end))
+        for gap_start, gap_end in gaps
+        for start in range(gap_start, gap_end + 1, chunk_size)
+    ]
+
+
+# Clase que guarda en disco los rangos ya completados de una descarga parcial
+class RangeJournal:
+    """Sidecar JSON con los rangos terminados de un archivo .part"""
+
+    def __init__(self, path: Path, filesize: int):
+        self.path = Path(path)
+        self.filesize = filesize
+        self.completed: List[Tuple[int, int]] = []
+        self._lock = threading.Lock()
+
+    # Metodo que carga el journal si corresponde al mismo archivo
+    def load(self) -> bool:
+        """Carga los rangos completados; False si no existe o no coincide"""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+
+        if data.get("filesize") != self.filesize:
+            return False
+
+        self.completed = [tuple(r) for r in data.get("completed", [])]
+        return True
+
+    # Metodo que marca un rango como terminado (escritura atómica)
+    def mark_done(self, start: int, end: int):
+        """Añade un rango completado y persiste el journal"""
+        with self._lock:
+            self.completed.append((start, end))
+            self._save()
+
+    # Metodo interno de guardado atomico
+    def _save(self):
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps({
+            "filesize": self.filesize,
+            "completed": sorted(self.completed),
+            "updated": time.time(),
+        }), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    # Metodo que devuelve los bytes ya descargados
+    def bytes_done(self) -> int:
+        return sum(end - start + 1 for start, end in self.completed)
+
+    # Metodo que elimina el journal al terminar
+    def remove(self):
+        self.path.unlink(missing_ok=True)
+
+
+# Clase encargada de descargar un stream por rangos en paralelo
+class SegmentedDownloader:
+    """Descarga un archivo en rangos paralelos sobre un pool de conexiones"""
+
+    def __init__(self, session: Optional["requests.Session"] = None, connections: int = 4,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, max_retries: int = 3,
+                 timeout: float = 15, cancel_event: Optional[threading.Event] = None,
+                 on_bytes: Optional[Callable[[int], None]] = None):
+        if session is None:
+            import requests
+            session = requests.Session()
+        self.session = session
+        self.cancel_event = cancel_event
+        # Callback con los bytes recibidos (progreso); se llama desde varios hilos
+        self.on_bytes = on_bytes
+        self.connections = max(1, connections)
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        # Sin os.pwrite (Windows) se escribe con lseek + write protegidos por lock
+        self._write_lock = threading.Lock()
+
+    # Metodo principal de descarga
+    def download(self, url: str, destination: Path, filesize: int,
+                 journal: Optional[RangeJournal] = None) -> Path:
+        """Descarga url en destination (preasignado a filesize bytes)
+
+        Con journal, retoma los rangos pendientes de un intento anterior.
+        """
+        destination = Path(destination)
+
+        completed = []
+        resuming = (journal is not None and destination.exists()
+                    and destination.stat().st_size == filesize and journal.load())
+        if resuming:
+            completed = journal.completed
+        elif journal is not None:
+            journal.completed = []
+
+        ranges = split_ranges(filesize, self.chunk_size, completed)
+
+        # Lo ya descargado en un intento anterior cuenta como progreso
+        if self.on_bytes is not None:
+            already_done = filesize - sum(end - start + 1 for start, end in ranges)
+            if already_done:
+                self.on_bytes(already_done)
+
+        # Preasignar el archivo para escribir cada rango en su posición
+        if not resuming:
+            with open(destination, "wb") as f:
+                f.truncate(filesize)
+
+        if not ranges:
+            return destination
+
+        fd = os.open(str(destination), os.O_WRONLY | getattr(os, "O_BINARY", 0))
+        try:
+            workers = min(self.connections, len(ranges)) or 1
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                jobs = [pool.submit(self._fetch_range, url, fd, start, end, journal)
+                        for start, end in ranges]
+                try:
+                    for job in jobs:
+                        job.result()
+                except Exception:
+                    # Un rango agotó sus reintentos: no seguir con los pendientes
+                    for job in jobs:
+                        job.cancel()
+                    raise
+        finally:
+            os.close(fd)
+
+        return destination
+
+    # Metodo que descarga un rango con reintentos (continúa desde lo ya escrito)
+    def _fetch_range(self, url: str, fd: int, start: int, end: int,
+                     journal: Optional[RangeJournal] = None):
+        """Descarga bytes [start, end] y los escribe en su posición"""
+        # Posición ya escrita: un reintento no vuelve a pedir esos bytes
+        position = [start]
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with _global_slots:
+                    self._stream_range(url, fd, position, end)
+                if journal is not None:
+                    journal.mark_done(start, end)
+                return
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                last_error = e
+                if attempt < self.max_retries:
+                    time.sleep(min(2 ** attempt * 0.5, 5))
+
+        raise Exception(f"Rango {start}-{end} falló tras {self.max_retries + 1} intentos: {last_error}")
+
+    # Metodo que hace una peticion Range y escribe la respuesta
+    def _stream_range(self, url: str, fd: int, position: List[int], end: int):
+        """Escribe desde position[0] hasta end, actualizando position"""
+        self._check_cancelled()
+        response = self.session.get(
+            url,
+            headers={"Range": f"bytes={position[0]}-{end}"},
+            stream=True,
+            timeout=self.timeout
+        )
+        try:
+            if response.status_code != 206:
+                raise Exception(f"Respuesta HTTP {response.status_code} (se esperaba 206)")
+
+            for chunk in response.iter_content(READ_SIZE):
+                if not chunk:
+                    continue
+                self._write_at(fd, chunk, position[0])
+                position[0] += len(chunk)
+                if self.on_bytes is not None:
+                    self.on_bytes(len(chunk))
+                self._check_cancelled()
+        finally:
+            response.close()
+
+        if position[0] != end + 1:
+            raise IOError(f"Rango incompleto: {position[0]}/{end + 1} bytes")
+
+    # Metodo que corta la descarga si el trabajo fue cancelado
+    def _check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise DownloadCancelled("Descarga cancelada")
+
+    # Metodo que escribe bytes en una posición concreta del archivo
+    def _write_at(self, fd: int, data: bytes, offset: int):
+        """Escritura posicional (os.pwrite o lseek + write)"""
+        if hasattr(os, "pwrite"):
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                view = view[written:]
+                offset += written
+        else:
+            view = memoryview(data)
+            with self._write_lock:
+                os.lseek(fd, offset, os.SEEK_SET)
+                while view:
+                    view = view[os.write(fd, view):]
+
+
+# Funcion que recorre un stream en orden por rangos, sin escribir a disco
+def iter_range_chunks(session: "requests.Session", url: str, filesize: int,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, max_retries: int = 3,
+                      timeout: float = 15,
+                      cancel_event: Optional[threading.Event] = None,
+                      on_bytes: Optional[Callable[[int], None]] = None) -> Iterator[bytes]:
+    """Genera los bytes del stream en orden (reintenta desde el último byte recibido)"""
+    for start, end in split_ranges(filesize, chunk_size):
+        position = start
+        attempt = 0
+        while position <= end:
+            if cancel_event is not None and cancel_event.is_set():
+                raise DownloadCancelled("Descarga cancelada")
+            try:
+                response = session.get(
+                    url,
+                    headers={"Range": f"bytes={position}-{end}"},
+                    stream=True,
+                    timeout=timeout
+                )
+                try:
+                    if response.status_code != 206:
+                        raise Exception(f"Respuesta HTTP {response.status_code} (se esperaba 206)")
+                    for chunk in response.iter_content(READ_SIZE):
+                        if chunk:
+                            position += len(chunk)
+                            if on_bytes is not None:
+                                on_bytes(len(chunk))
+                            yield chunk
+                finally:
+                    response.close()
+
+                if position <= end:
+                    raise IOError(f"Rango incompleto: {position}/{end + 1} bytes")
+            except GeneratorExit:
+                raise
+            except Exception as e:
+                attempt += 1
+                if attempt > max_retries:
+                    raise Exception(f"Rango {start}-{end} falló tras {attempt} intentos: {e}")
+                time.sleep(min(2 ** (attempt - 1) * 0.5, 5))
@@ -0,0 +1,133 @@
+# core/singleflight.py - DEDUPLICACIÓN DE CONVERSIONES IDÉNTICAS EN CURSO
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# Cada cuánto revisa un consumidor async si la conversión compartida terminó (segundos)
+ASYNC_POLL_INTERVAL = 0.1
+
+
+# Estado compartido de una conversion en curso (o terminada y aun en uso)
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.refs = 0
+
+
+# Clase que une peticiones identicas simultaneas a una sola ejecucion
+class SingleFlight:
+    """Ejecuta una vez cada clave en curso y reparte el resultado con contador de referencias
+
+    Cada acquire() suma un consumidor; el último release() elimina la
+    entrada y llama a on_release(resultado) (por ejemplo, borrar el archivo).
+    """
+
+    def __init__(self, on_release: Optional[Callable[[Any], None]] = None):
+        self.on_release = on_release
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+        self.executions = 0
+        self.shared = 0
+
+    # Metodo que obtiene el resultado de la clave (ejecutando producer si nadie lo hace)
+    def acquire(self, key: Hashable, producer: Callable[[], Any]) -> Any:
+        """Devuelve el resultado compartido; hay que llamar a release(key) al terminar"""
+        flight, leader = self._join(key)
+
+        if leader:
+            try:
+                flight.result = producer()
+            except BaseException as e:
+                self._fail(key, flight, e)
+            finally:
+                flight.done.set()
+        else:
+            flight.done.wait()
+
+        return self._result(flight)
+
+    # Metodo equivalente a acquire() para corutinas (no bloquea el event loop)
+    async def acquire_async(self, key: Hashable, producer: Callable[[], Awaitable[Any]]) -> Any:
+        """Como acquire(), pero producer es una corutina; comparte claves con acquire()"""
+        flight, leader = self._join(key)
+
+        if leader:
+            try:
+                flight.result = await producer()
+            except BaseException as e:
+                self._fail(key, flight, e)
+            finally:
+                flight.done.set()
+        else:
+            # El líder puede ser un hilo: se consulta el Event sin ocupar un hilo esperando
+            try:
+                while not flight.done.is_set():
+                    await asyncio.sleep(ASYNC_POLL_INTERVAL)
+            except BaseException:
+                # Consumidor cancelado (cliente desconectado): su referencia no debe quedar
+                self._drop(key, flight)
+                raise
+
+        return self._result(flight)
+
+    # Metodo interno: se une a la clave (o la crea) y suma un consumidor
+    def _join(self, key: Hashable):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.executions += 1
+            else:
+                self.shared += 1
+            flight.refs += 1
+        return flight, leader
+
+    # Metodo interno: guarda el fallo del líder
+    def _fail(self, key: Hashable, flight: _Flight, error: BaseException):
+        flight.error = error
+        # Un fallo no se comparte con peticiones futuras: se reintenta
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    # Metodo interno: devuelve el resultado o relanza el fallo compartido
+    def _result(self, flight: _Flight) -> Any:
+        if flight.error is not None:
+            with self._lock:
+                flight.refs -= 1
+            raise flight.error
+        return flight.result
+
+    # Metodo que libera un consumidor; el ultimo limpia el resultado
+    def release(self, key: Hashable):
+        """Resta un consumidor y ejecuta on_release cuando no queda ninguno"""
+        with self._lock:
+            flight = self._flights.get(key)
+        if flight is not None:
+            self._drop(key, flight)
+
+    # Metodo interno: resta un consumidor de un vuelo concreto
+    def _drop(self, key: Hashable, flight: _Flight):
+        """El último consumidor borra la clave y, si hubo resultado, llama a on_release"""
+        with self._lock:
+            flight.refs -= 1
+            if flight.refs > 0:
+                return
+            # La clave puede ser ya otro vuelo (este falló y se reintentó)
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if flight.error is not None or not flight.done.is_set():
+                return
+
+        if self.on_release is not None:
+            self.on_release(flight.result)
+
+    # Metodo que devuelve cuantas claves siguen activas
+    def active(self) -> int:
+        with self._lock:
+            return len(self._flights)
@@ -0,0 +1,343 @@
+# core/workers.py - TIER DE PROCESOS: CONVERSIONES FUERA DEL SERVIDOR WEB
+"""
+Modo de despliegue por procesos: el servidor web solo inserta trabajos en
+el JobStore (SQLite) y lee su estado; un pool de procesos worker, uno por
+núcleo, los reclama y ejecuta ffmpeg. Así el trabajo de CPU usa todos los
+núcleos y no compite con el event loop ni con el GIL del servidor.
+
+Uso (tier independiente):
+    python -m core.workers [--procesos 8] [--store results/jobs.db]
+
+main.py lo lanza solo con: python main.py --procesos 8 [--frontends 4]
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, List
+
+from core.jobs import (Job, QueueFullError, convert_job, remove_result, result_artifacts,
+                       QUEUED, DONE, ERROR, CANCELLED, MAX_RECOVERY_ATTEMPTS)
+from core.jobstore import JobStore, DEFAULT_STORE
+from core.profiles import get_profile, DEFAULT_PROFILE
+from core.segmented import (DownloadCancelled, set_global_connection_limit,
+                            GLOBAL_MAX_CONNECTIONS)
+from core.ffmpeg import FFmpegError
+
+
+# Un worker por núcleo: cada uno ejecuta un trabajo (un ffmpeg) a la vez
+DEFAULT_PROCESSES = os.cpu_count() or 2
+
+# Cada cuánto se consulta el store (trabajos nuevos, cancelaciones, cambios)
+POLL_INTERVAL = 0.5
+
+# Tiempo que se espera a los workers al detener el tier antes de matarlos
+STOP_GRACE_SECONDS = 10
+
+
+# Clase con la interfaz de JobManager para el servidor web en modo procesos
+class ProcessJobManager:
+    """Encola en el JobStore; los trabajos los ejecuta el tier de workers
+
+    get() y list() devuelven copias del estado guardado; wait_for_change()
+    refresca en su sitio el Job que recibe, igual que en el modo por hilos.
+    """
+
+    def __init__(self, store: JobStore, workers: int = DEFAULT_PROCESSES, max_queue: int = 32,
+                 results_dir: str = "results", result_ttl: float = 3600):
+        self.store = store
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.results_dir = Path(results_dir)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+
+    # Metodo que encola un trabajo nuevo (o rechaza si la cola está llena)
+    def submit(self, kind: str, url: str, quality: Optional[int] = None,
+               profile: Optional[str] = None) -> Job:
+        """Crea y encola un trabajo; lanza QueueFullError si no hay sitio"""
+        if kind not in ("mp3", "mp4", "audio"):
+            raise ValueError(f"Tipo de trabajo inválido: {kind}")
+        if profile is not None:
+            profile = get_profile(profile).name
+
+        self._prune()
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, url=url, quality=quality, profile=profile)
+        if not self.store.add(job, limit=self.workers + self.max_queue):
+            raise QueueFullError(f"Cola llena ({self.store.count_active()} trabajos activos)")
+        return job
+
+    # Metodo que devuelve un trabajo por su ID
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    # Metodo que lista los trabajos conocidos
+    def list(self) -> List[Job]:
+        return self.store.list()
+
+    # Metodo que espera a que un trabajo cambie de estado o de progreso
+    def wait_for_change(self, job: Job, version: int, timeout: float = 15) -> int:
+        """Consulta el store hasta que cambie la versión (o timeout) y actualiza job"""
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self.store.version(job.id)
+            remaining = deadline - time.monotonic()
+            if current is None or current != version or remaining <= 0:
+                break
+            time.sleep(min(POLL_INTERVAL, remaining))
+
+        fresh = self.store.get(job.id)
+        if fresh is not None:
+            for name in ("state", "error", "error_kind", "result_path", "report", "progress",
+                         "phase", "artifacts", "attempts", "version", "started_at", "finished_at"):
+                setattr(job, name, getattr(fresh, name))
+        return job.version
+
+    # Metodo que busca un trabajo activo con los mismos parámetros
+    def find_active(self, kind: str, url: str, quality: Optional[int] = None,
+                    profile: Optional[str] = None) -> Optional[Job]:
+        return self.store.find_active(kind, url, quality, profile)
+
+    # Metodo que cancela un trabajo (encolado o en curso)
+    def cancel(self, job_id: str) -> bool:
+        """Pide la cancelación; False si no existe o ya terminó"""
+        return self.store.request_cancel(job_id)
+
+    # Metodo que olvida los trabajos terminados hace tiempo (y sus archivos)
+    def _prune(self):
+        expired = self.store.expired(self.result_ttl)
+        self.store.delete([job.id for job in expired])
+        for job in expired:
+            remove_result(self.results_dir, job.id)
+
+    # Metodo de cierre del servidor web: los trabajos siguen en el tier de workers
+    def shutdown(self):
+        self.store.close()
+
+
+# Funcion que ejecuta un trabajo reclamado y guarda el resultado en el store
+def run_job(core, store: JobStore, job: Job, results_dir: Path,
+            stop_event: Optional[threading.Event] = None):
+    """Vigila cancelaciones (store o parada del tier) mientras convierte"""
+    finished = threading.Event()
+
+    def watch():
+        while not finished.wait(POLL_INTERVAL):
+            if (stop_event is not None and stop_event.is_set()) or store.is_cancel_requested(job.id):
+                job.cancel_event.set()
+                return
+
+    threading.Thread(target=watch, daemon=True).start()
+
+    fields = {}
+    try:
+        result = convert_job(core, job, results_dir / job.id,
+                             lambda event: store.update(job.id, progress=event.to_dict(),
+                                                        phase=event.phase))
+        fields.update(state=DONE, result_path=result, artifacts=result_artifacts(result),
+                      finished_at=time.time())
+    except DownloadCancelled:
+        if store.is_cancel_requested(job.id):
+            fields.update(state=CANCELLED, finished_at=time.time())
+            remove_result(results_dir, job.id)
+        else:
+            # Parada del tier: vuelve a la cola y se retoma desde los parciales
+            fields.update(state=QUEUED, started_at=None, progress=None)
+    except FFmpegError as e:
+        fields.update(state=ERROR, error=str(e), error_kind=e.kind, finished_at=time.time())
+        remove_result(results_dir, job.id)
+    except Exception as e:
+        fields.update(state=ERROR, error=str(e), finished_at=time.time())
+        remove_result(results_dir, job.id)
+    finally:
+        finished.set()
+        store.update(job.id, report=job.report, **fields)
+
+
+# Funcion de entrada de cada proceso worker
+def worker_main(name: str, store_path: str, results_dir: str, temp_dir: str,
+                profile: str, threads: Optional[int], nice: Optional[int], stop_event):
+    """Reclama trabajos del store hasta que el tier pida parar"""
+    # Ctrl+C lo gestiona el proceso padre (parada ordenada)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from core.downloader import YouTubeDownloaderCore
+
+    # Los trabajos retomados siguen desde los parciales de temp/partials
+    core = YouTubeDownloaderCore(temp_dir=temp_dir, resumable=True)
+    core.configure_profile(profile, threads=threads, nice=nice)
+    # Mismo tope de conexiones que el servidor (NDX_MAX_CONNECTIONS, por proceso)
+    set_global_connection_limit(
+        int(os.environ.get("NDX_MAX_CONNECTIONS", str(GLOBAL_MAX_CONNECTIONS))))
+    store = JobStore(store_path)
+    results = Path(results_dir)
+
+    # Event de multiprocessing -> threading.Event para el vigilante de run_job
+    stopping = threading.Event()
+
+    # También se para si el proceso padre desaparece (no quedan workers huérfanos)
+    parent = multiprocessing.parent_process()
+
+    def bridge():
+        while not stop_event.wait(POLL_INTERVAL):
+            if parent is not None and not parent.is_alive():
+                break
+        stopping.set()
+
+    threading.Thread(target=bridge, daemon=True).start()
+
+    while not stopping.is_set():
+        job = store.claim(name)
+        if job is None:
+            stopping.wait(POLL_INTERVAL)
+            continue
+        run_job(core, store, job, results, stopping)
+
+    store.close()
+
+
+# Clase que arranca y supervisa los procesos worker
+class WorkerPool:
+    """N procesos worker (spawn) sobre el mismo JobStore; reinicia los que mueren"""
+
+    def __init__(self, processes: int = DEFAULT_PROCESSES, store_path: str = DEFAULT_STORE,
+                 results_dir: str = "results", temp_dir: str = "temp",
+                 profile: str = DEFAULT_PROFILE, threads: Optional[int] = None,
+                 nice: Optional[int] = None):
+        self.processes = max(1, processes)
+        self.store_path = store_path
+        self.results_dir = results_dir
+        self.temp_dir = temp_dir
+        self.profile = get_profile(profile).name
+        self.threads = threads
+        self.nice = nice
+
+        # spawn: procesos limpios (sin hilos ni sockets heredados del padre)
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        # Bandera simple: la pueden poner los manejadores de señales sin tomar locks
+        self._stop_requested = False
+        self._workers = {}
+
+    # Metodo que arranca los workers
+    def start(self):
+        # Lo que quedó en curso de una ejecución anterior vuelve a la cola
+        # (solo lo de procesos caídos: otro tier vivo sigue con sus trabajos)
+        requeued, failed = JobStore(self.store_path).recover(max_attempts=MAX_RECOVERY_ATTEMPTS,
+                                                             stale_only=True)
+        if requeued or failed:
+            print(f"Trabajos recuperados: {requeued} retomados, {failed} fallidos")
+
+        for index in range(self.processes):
+            self._spawn(f"worker-{os.getpid()}-{index}")
+
+    # Metodo interno: lanza (o relanza) un worker con nombre fijo
+    def _spawn(self, name: str):
+        process = self._context.Process(
+            target=worker_main, name=name,
+            args=(name, self.store_path, self.results_dir, self.temp_dir,
+                  self.profile, self.threads, self.nice, self._stop_event))
+        process.start()
+        self._workers[name] = process
+
+    # Metodo que relanza los workers que murieron (y reencola su trabajo en curso)
+    def supervise(self) -> int:
+        restarted = 0
+        for name, process in list(self._workers.items()):
+            if process.is_alive() or self._stop_requested:
+                continue
+            print(f"{name} terminó inesperadamente (código {process.exitcode}), se relanza")
+            JobStore(self.store_path).recover(name, max_attempts=MAX_RECOVERY_ATTEMPTS)
+            self._spawn(name)
+            restarted += 1
+        return restarted
+
+    # Metodo que pide parar (seguro desde un manejador de señales)
+    def request_stop(self):
+        self._stop_requested = True
+
+    # Metodo que bloquea supervisando hasta que se pida parar
+    def run_forever(self):
+        while not self._stop_requested:
+            time.sleep(POLL_INTERVAL)
+            self.supervise()
+
+    # Metodo que detiene los workers (su trabajo en curso vuelve a la cola)
+    def stop(self, timeout: float = STOP_GRACE_SECONDS):
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for process in self._workers.values():
+            process.join(max(0, deadline - time.monotonic()))
+        for process in self._workers.values():
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+
+# Funcion que lanza el tier de workers como proceso aparte (lo usa main.py)
+def launch_worker_tier(processes: int, store_path: str = DEFAULT_STORE,
+                       results_dir: str = "results", temp_dir: str = "temp",
+                       profile: str = DEFAULT_PROFILE, threads: Optional[int] = None,
+                       nice: Optional[int] = None) -> subprocess.Popen:
+    """python -m core.workers en un proceso hijo; detenerlo con stop_worker_tier()"""
+    cmd = [sys.executable, "-m", "core.workers",
+           "--procesos", str(processes),
+           "--store", str(store_path),
+           "--resultados", str(results_dir),
+           "--temp", str(temp_dir),
+           "--perfil", profile]
+    if threads is not None:
+        cmd += ["--hilos", str(threads)]
+    if nice is not None:
+        cmd += ["--nice", str(nice)]
+    return subprocess.Popen(cmd, cwd=Path(__file__).resolve().parent.parent)
+
+
+# Funcion que detiene el tier lanzado con launch_worker_tier()
+def stop_worker_tier(process: subprocess.Popen, timeout: float = STOP_GRACE_SECONDS + 5):
+    if process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tier de workers de conversión (procesos)")
+    parser.add_argument("--procesos", type=int, default=DEFAULT_PROCESSES,
+                        help="Procesos worker (por defecto, uno por núcleo)")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="Base de datos de trabajos (SQLite)")
+    parser.add_argument("--resultados", default="results", help="Carpeta de resultados")
+    parser.add_argument("--temp", default="temp", help="Carpeta de temporales")
+    parser.add_argument("--perfil", default=DEFAULT_PROFILE, help="Perfil de codificación")
+    parser.add_argument("--hilos", type=int, help="Hilos de ffmpeg por proceso")
+    parser.add_argument("--nice", type=int, help="Prioridad (nice) de ffmpeg")
+    args = parser.parse_args()
+
+    pool = WorkerPool(args.procesos, args.store, args.resultados, args.temp,
+                      args.perfil, args.hilos, args.nice)
+
+    # SIGTERM (stop_worker_tier, systemd, docker) y Ctrl+C: parada ordenada
+    signal.signal(signal.SIGTERM, lambda signum, frame: pool.request_stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: pool.request_stop())
+
+    pool.start()
+    print(f"Tier de workers: {pool.processes} procesos sobre {args.store}")
+    try:
+        pool.run_forever()
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
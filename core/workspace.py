@@ -0,0 +1,113 @@
+# core/workspace.py - CARPETAS TEMPORALES AISLADAS POR TRABAJO
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+
+# Prefijo de las carpetas de trabajo y nombre de su marca de actividad
+WORKSPACE_PREFIX = "job_"
+LOCK_NAME = ".lock"
+
+# Una carpeta sin actividad durante este tiempo se considera abandonada
+WORKSPACE_STALE_SECONDS = 6 * 3600
+
+
+# Clase que reserva una carpeta propia para los temporales de un trabajo
+class Workspace:
+    """Carpeta temporal exclusiva de un trabajo; se borra siempre al salir del with"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.path: Optional[Path] = None
+
+    def __enter__(self) -> "Workspace":
+        self.root.mkdir(parents=True, exist_ok=True)
+        # mkdtemp garantiza un nombre único aunque haya varios procesos
+        self.path = Path(tempfile.mkdtemp(prefix=WORKSPACE_PREFIX, dir=self.root))
+        (self.path / LOCK_NAME).write_text(f"{os.getpid()} {time.time()}", encoding="utf-8")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+        return False
+
+    # Metodo que devuelve una ruta dentro de la carpeta del trabajo
+    def file(self, name: str) -> Path:
+        return self.path / name
+
+    # Metodo que marca la carpeta como activa (para trabajos muy largos)
+    def touch(self):
+        try:
+            os.utime(self.path / LOCK_NAME)
+        except OSError:
+            pass
+
+
+# Funcion que indica si un proceso sigue vivo (para locks con PID de procesos caídos)
+def process_alive(pid: int) -> bool:
+    """True si existe un proceso con ese PID (ante la duda, se asume vivo)"""
+    if pid <= 0:
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Existe pero es de otro usuario
+        return True
+    except OSError:
+        return True
+    return True
+
+
+# Funcion que devuelve la ultima actividad conocida de una carpeta de trabajo
+def _last_activity(path: Path) -> float:
+    latest = path.stat().st_mtime
+    for entry in path.iterdir():
+        try:
+            latest = max(latest, entry.stat().st_mtime)
+        except OSError:
+            continue
+    return latest
+
+
+# Funcion que elimina carpetas de trabajo abandonadas (procesos caídos)
+def reclaim_workspaces(root: Path, max_age_seconds: float = WORKSPACE_STALE_SECONDS) -> int:
+    """Borra las carpetas de trabajo sin actividad reciente; devuelve cuántas"""
+    root = Path(root)
+    if not root.exists():
+        return 0
+
+    now = time.time()
+    removed = 0
+    for path in root.glob(f"{WORKSPACE_PREFIX}*"):
+        try:
+            if not path.is_dir() or now - _last_activity(path) < max_age_seconds:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+
+    return removed
@@ -1,12 +1,32 @@
-from fastapi import HTTPException, FastAPI, Request, BackgroundTasks
+from fastapi import HTTPException, FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
 from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+import argparse
+import asyncio
+import itertools
+import json
+import os
 import uvicorn
 
 # Importar el core
 from core.downloader import YouTubeDownloaderCore, VideoInfo
+from core.asyncdownloader import AsyncYouTubeDownloaderCore
+from core.jobs import JobManager, QueueFullError, DONE, FINISHED_STATES
+from core.jobstore import JobStore, DEFAULT_STORE
+from core.workers import (ProcessJobManager, DEFAULT_PROCESSES, POLL_INTERVAL,
+                          launch_worker_tier, stop_worker_tier)
+from core.cache import extract_video_id
+from core.singleflight import SingleFlight
+from core.outputcache import OutputCache
+from core.profiles import PROFILES, get_profile
+from core.segmented import set_global_connection_limit, GLOBAL_MAX_CONNECTIONS
+from core.ffmpeg import FFmpegError, DISK_FULL, CORRUPT_INPUT, RESOURCES, KILLED
 
 
 
@@ -18,9 +38,55 @@ app = FastAPI()
 # Montar archivos estáticos
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Inicializar el core
-downloader = YouTubeDownloaderCore()
+# Inicializar el core (descargas reanudables: los trabajos se retoman tras un reinicio)
+downloader = YouTubeDownloaderCore(resumable=True)
 
+# Limites del pool de trabajos (configurables por variables de entorno)
+JOB_WORKERS = int(os.environ.get("NDX_JOB_WORKERS", "4"))
+JOB_MAX_QUEUE = int(os.environ.get("NDX_JOB_MAX_QUEUE", "32"))
+NETWORK_LIMIT = int(os.environ.get("NDX_NETWORK_LIMIT", "8"))
+ENCODER_LIMIT = int(os.environ.get("NDX_ENCODER_LIMIT", str(os.cpu_count() or 2)))
+# Conexiones HTTP simultáneas de todas las descargas segmentadas del proceso
+MAX_CONNECTIONS = int(os.environ.get("NDX_MAX_CONNECTIONS", str(GLOBAL_MAX_CONNECTIONS)))
+
+# Modo de despliegue: "hilos" (todo en este proceso) o "procesos" (tier de workers aparte);
+# python main.py --procesos N lo configura solo. En ambos modos los trabajos se guardan
+# en NDX_JOB_STORE (SQLite) y se retoman tras un reinicio
+WORKER_MODE = os.environ.get("NDX_WORKER_MODE", "hilos")
+WORKER_PROCESSES = int(os.environ.get("NDX_WORKER_PROCESSES", str(DEFAULT_PROCESSES)))
+JOB_STORE = os.environ.get("NDX_JOB_STORE", DEFAULT_STORE)
+FRONTENDS = int(os.environ.get("NDX_FRONTENDS", "1"))
+
+# Perfil de codificación por defecto; cada petición puede pedir otro con ?perfil=
+ENCODER_PROFILE = os.environ.get("NDX_ENCODER_PROFILE", "balanced")
+ENCODER_THREADS = os.environ.get("NDX_ENCODER_THREADS")
+ENCODER_NICE = os.environ.get("NDX_ENCODER_NICE")
+
+# Descargas de red y procesos ffmpeg se limitan por separado
+downloader.configure_limits(network=NETWORK_LIMIT, encoder=ENCODER_LIMIT)
+set_global_connection_limit(MAX_CONNECTIONS)
+downloader.configure_profile(
+    ENCODER_PROFILE,
+    threads=int(ENCODER_THREADS) if ENCODER_THREADS else None,
+    nice=int(ENCODER_NICE) if ENCODER_NICE else None
+)
+
+# Gestor de trabajos: se crea al arrancar el servidor (evento startup), no al importar.
+# python main.py importa este módulo dos veces (__main__ y main); solo el que sirve
+# la app debe retomar trabajos del store
+jobs = None
+
+# Info, streams y los modos stream=true corren en el event loop (mismo cache y perfil)
+downloader_async = AsyncYouTubeDownloaderCore(downloader)
+downloader_async.configure_limits(network=NETWORK_LIMIT, encoder=ENCODER_LIMIT)
+
+
+# Cuerpo de la peticion para crear un trabajo
+class SolicitudTrabajo(BaseModel):
+    url: str
+    formato: str = "MP3"
+    calidad: Optional[int] = None
+    perfil: Optional[str] = None
 
 
 # Función para limpieza en background
@@ -32,6 +98,134 @@ def borrar_archivo(path: Path):
     except Exception as e:
         print(f"Error borrando {path}: {e}")
 
+# Archivos terminados: se guardan en disco hasta NDX_CACHE_MB (0 desactiva el cache).
+# El índice vive en memoria de cada proceso: con varios frontends no se crea (None)
+salidas = None
+if FRONTENDS <= 1:
+    salidas = OutputCache(
+        root=os.environ.get("NDX_CACHE_DIR", "cache"),
+        max_bytes=int(os.environ.get("NDX_CACHE_MB", "2048")) * 1024 * 1024
+    )
+
+# Función que libera el resultado de una conversión compartida
+def liberar_conversion(resultado: tuple):
+    """Suelta la reserva del cache o borra el archivo si no entró en el cache
+
+    Los resultados de trabajos (propio=False) nunca se borran: el store los
+    sigue referenciando por job_id
+    """
+    output_path, _, clave_cache, propio = resultado
+    if clave_cache is not None:
+        salidas.release(clave_cache)
+    elif propio:
+        borrar_archivo(output_path)
+
+# Conversiones idénticas simultáneas comparten una sola descarga;
+# el resultado se libera cuando termina de enviarse al último cliente
+conversiones = SingleFlight(on_release=liberar_conversion)
+
+# Clave de una conversion: (formato, video, calidad, codificador y version de etiquetas)
+def clave_conversion(formato: str, url: str, calidad: int = None,
+                     preservar_metadatos: bool = True, perfil: str = None) -> tuple:
+    return (formato, extract_video_id(url) or url.strip(), calidad,
+            downloader.output_signature(formato, preservar_metadatos, perfil))
+
+# Código HTTP según el tipo de fallo de ffmpeg
+ESTADOS_FFMPEG = {
+    DISK_FULL: 507,
+    CORRUPT_INPUT: 502,
+    RESOURCES: 503,
+    KILLED: 503,
+}
+
+# Función que convierte un fallo de ffmpeg en respuesta HTTP
+def error_ffmpeg(e: FFmpegError) -> HTTPException:
+    return HTTPException(status_code=ESTADOS_FFMPEG.get(e.kind, 500),
+                         detail=f"Error de conversión: {str(e)}")
+
+# Función que valida el perfil pedido (None = el del servidor)
+def validar_perfil(perfil: Optional[str]) -> Optional[str]:
+    if perfil is None:
+        return None
+    try:
+        return get_profile(perfil).name
+    except ValueError:
+        raise HTTPException(status_code=400,
+                            detail=f"Perfil inválido. Use {', '.join(PROFILES)}")
+
+# Función que entrega un archivo terminado: cache en disco, conversión en curso o nueva
+def obtener_salida(clave: tuple, convertir) -> tuple:
+    """Devuelve (ruta, nombre, liberar); liberar() se llama tras enviar el archivo"""
+    entrada = salidas.get(clave) if salidas is not None else None
+    if entrada is not None:
+        return entrada.path, entrada.filename, lambda: salidas.release(clave)
+    
+    def producir():
+        output_path = convertir()
+        entrada = (salidas.publish(clave, output_path, output_path.name)
+                   if salidas is not None else None)
+        if entrada is None:
+            return output_path, output_path.name, None, True
+        return entrada.path, entrada.filename, clave, True
+    
+    output_path, filename, _, _ = conversiones.acquire(clave, producir)
+    return output_path, filename, lambda: conversiones.release(clave)
+
+# Función equivalente a obtener_salida para trabajos persistentes (no ocupa hilos)
+async def obtener_salida_async(clave: tuple, convertir) -> tuple:
+    """Como obtener_salida; convertir es una función que devuelve una corutina.
+    El archivo pertenece al trabajo: el cache recibe un enlace o una copia"""
+    entrada = salidas.get(clave) if salidas is not None else None
+    if entrada is not None:
+        return entrada.path, entrada.filename, lambda: salidas.release(clave)
+    
+    async def producir():
+        output_path = await convertir()
+        entrada = (salidas.publish(clave, output_path, output_path.name, keep_source=True)
+                   if salidas is not None else None)
+        if entrada is None:
+            return output_path, output_path.name, None, False
+        return entrada.path, entrada.filename, clave, False
+    
+    output_path, filename, _, _ = await conversiones.acquire_async(clave, producir)
+    return output_path, filename, lambda: conversiones.release(clave)
+
+# Función que convierte como trabajo persistente y espera el archivo
+async def convertir_como_trabajo(formato: str, url: str, calidad: int = None,
+                                 perfil: str = None) -> Path:
+    """Encola (o se une a un trabajo igual ya activo, p. ej. retomado tras un reinicio)
+    y espera a que termine; así la conversión no vive solo en esta petición"""
+    job = jobs.find_active(formato, url, calidad, perfil) or jobs.submit(formato, url, calidad, perfil)
+    while job.state not in FINISHED_STATES:
+        await asyncio.sleep(POLL_INTERVAL)
+        job = jobs.get(job.id) or job
+    
+    if job.state == DONE:
+        return job.result_path
+    if job.error_kind:
+        raise FFmpegError(job.error_kind)
+    raise Exception(job.error or f"El trabajo terminó en estado {job.state}")
+
+# Respuesta de archivo que suelta su reserva al terminar el envío (aunque falle)
+class ArchivoReservado(FileResponse):
+    """FileResponse que llama a liberar() al acabar; si el cliente se desconecta
+    a mitad del envío las BackgroundTasks no llegan a ejecutarse"""
+
+    def __init__(self, *args, liberar, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.liberar = liberar
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.liberar()
+
+# Cabecera para que el navegador descargue el stream con el nombre correcto
+def cabecera_descarga(filename: str) -> dict:
+    """Content-Disposition compatible con nombres no ASCII"""
+    return {"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"}
+
 @app.get('/')
 def index(req: Request):
     return templates.TemplateResponse(
@@ -40,12 +234,12 @@ def index(req: Request):
     )
 
 @app.get("/request")
-def obtener_info_video(urlVideo: str):
+async def obtener_info_video(urlVideo: str):
     """
     Obtiene información del video usando el core
     """
     try:
-        video_info = downloader.get_video_info(urlVideo)
+        video_info = await downloader_async.get_video_info(urlVideo)
         return {
             "success": True,
             "thumbnail": video_info.thumbnail_url,
@@ -65,8 +259,43 @@ def obtener_info_video(urlVideo: str):
             detail=f"URL inválida o error: {str(e)}"
         )
 
+@app.get("/preflight")
+def verificar_conversion(url: str, formato: str = "MP3", calidad: int = None):
+    """
+    Comprobación previa barata: usa solo el manifiesto de streams (cacheado)
+    para saber si la conversión pedida es posible, sin descargar nada
+    """
+    try:
+        formato = formato.upper()
+        if formato not in ["MP3", "MP4"]:
+            raise HTTPException(status_code=400, detail="Formato inválido. Use MP3 o MP4")
+        
+        if formato == "MP4":
+            if calidad not in [1, 2, 3, 4, 5]:
+                raise HTTPException(status_code=400, detail="Calidad inválida. Use 1-5")
+            resultado = downloader.check_availability(url, calidad)
+        else:
+            resultado = downloader.check_availability(url)
+        
+        return {
+            "success": True,
+            "disponible": resultado["available"],
+            "resolucion": resultado.get("resolution"),
+            "solicitada": resultado.get("requested"),
+            "exacta": resultado.get("exact", True),
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error verificando conversión: {str(e)}"
+        )
+
 @app.get("/conversion/mp3")
-def convertir_mp3(url: str, background_tasks: BackgroundTasks):
+async def convertir_mp3(url: str, stream: bool = False,
+                  perfil: Optional[str] = None):
     """
     ## 🎵 Convertir YouTube a MP3 usando el core
     
@@ -75,28 +304,79 @@ def convertir_mp3(url: str, background_tasks: BackgroundTasks):
     2. 📝 Pega una URL de YouTube:
     3. 🎯 Haz clic en **"Execute"**
     4. ⬇️ El navegador **descargará automáticamente** el MP3
+    
+    Con **stream=true** el MP3 se envía mientras se codifica (ID3 al inicio).
+    **perfil** = fast, balanced o archival (velocidad vs calidad).
     """
+    perfil = validar_perfil(perfil)
     try:
-        # Usar el core para descargar
-        output_path = downloader.download_mp3(url)
+        if stream:
+            # Primer byte en segundos: etiquetas ID3 + salida del codificador
+            video = await downloader_async.resolve(url)
+            video_info = await downloader_async.get_video_info(video)
+            header = await downloader_async.render_id3_header(video_info)
+            body = await run_in_threadpool(downloader.stream_mp3, video, perfil)
+            
+            return StreamingResponse(
+                itertools.chain([header], body),
+                media_type="audio/mpeg",
+                headers=cabecera_descarga(
+                    downloader.suggest_filename(video_info, ".mp3", with_artist=True))
+            )
         
-        # Agregar tarea para limpiar después
-        background_tasks.add_task(borrar_archivo, output_path)
+        # Servir desde el cache, unirse a la misma conversión en curso o convertir
+        output_path, filename, liberar = await obtener_salida_async(
+            clave_conversion("mp3", url, perfil=perfil),
+            lambda: convertir_como_trabajo("mp3", url, perfil=perfil))
         
-        return FileResponse(
+        # Liberar después de enviar el archivo
+        return ArchivoReservado(
             output_path,
             media_type="audio/mpeg",
-            filename=output_path.name
+            filename=filename,
+            liberar=liberar
         )
         
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    except FFmpegError as e:
+        raise error_ffmpeg(e)
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=f"Error descargando MP3: {str(e)}"
         )
 
+@app.get("/conversion/audio")
+def convertir_audio_original(url: str):
+    """
+    ## 🎧 Audio original sin recodificar (.opus / .m4a)
+    
+    Alternativa a MP3: re-empaqueta el mejor audio de YouTube tal cual,
+    sin pérdida adicional de calidad y sin gasto de CPU en codificar.
+    """
+    try:
+        output_path, filename, liberar = obtener_salida(
+            clave_conversion("audio", url), lambda: downloader.download_audio(url))
+        
+        return ArchivoReservado(
+            output_path,
+            media_type="audio/ogg" if output_path.suffix == ".opus" else "audio/mp4",
+            filename=filename,
+            liberar=liberar
+        )
+        
+    except FFmpegError as e:
+        raise error_ffmpeg(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error descargando audio original: {str(e)}"
+        )
+
 @app.get("/conversion/mp4")
-def convertir_mp4(url: str, calidad: int, background_tasks: BackgroundTasks):
+async def convertir_mp4(url: str, calidad: int, stream: bool = False,
+                  perfil: Optional[str] = None):
     """
     ## 🎬 Convertir YouTube a MP4 con Calidad Seleccionable usando el core
     
@@ -113,37 +393,149 @@ def convertir_mp4(url: str, calidad: int, background_tasks: BackgroundTasks):
        - **6** = Máxima resolución disponible
     4. ⚡ Haz clic en **"Execute"**
     5. ⬇️ **El navegador descargará automáticamente** el MP4
+    
+    Con **stream=true** se envía MP4 fragmentado mientras se mezclan las pistas.
+    **perfil** = fast, balanced o archival (solo afecta si hay que recodificar el audio).
     """
+    perfil = validar_perfil(perfil)
     try:
         # Validar calidad
         if calidad not in [1, 2, 3, 4, 5]:
             raise HTTPException(status_code=400, detail="Calidad inválida. Use 1-5")
         
-        # Usar el core para descargar
-        output_path = downloader.download_mp4(url, calidad)
+        if stream:
+            video = await downloader_async.resolve(url)
+            video_info = await downloader_async.get_video_info(video)
+            body = await run_in_threadpool(downloader.stream_mp4, video, calidad, perfil)
+            
+            return StreamingResponse(
+                body,
+                media_type="video/mp4",
+                headers=cabecera_descarga(downloader.suggest_filename(video_info, ".mp4"))
+            )
         
-        # Agregar tarea para limpiar después
-        background_tasks.add_task(borrar_archivo, output_path)
+        # Servir desde el cache, unirse a la misma conversión en curso o convertir
+        output_path, filename, liberar = await obtener_salida_async(
+            clave_conversion("mp4", url, calidad, perfil=perfil),
+            lambda: convertir_como_trabajo("mp4", url, calidad, perfil))
         
-        return FileResponse(
+        # Liberar después de enviar el archivo
+        return ArchivoReservado(
             output_path,
             media_type="video/mp4",
-            filename=output_path.name
+            filename=filename,
+            liberar=liberar
         )
         
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    except FFmpegError as e:
+        raise error_ffmpeg(e)
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=f"Error descargando MP4: {str(e)}"
         )
 
+@app.post("/jobs", status_code=202)
+def crear_trabajo(solicitud: SolicitudTrabajo):
+    """
+    Encola una conversión y devuelve su ID inmediatamente.
+    Responde **429** si la cola está llena.
+    """
+    formato = solicitud.formato.upper()
+    if formato not in ["MP3", "MP4", "AUDIO"]:
+        raise HTTPException(status_code=400, detail="Formato inválido. Use MP3, MP4 o AUDIO")
+    if formato == "MP4" and solicitud.calidad not in [1, 2, 3, 4, 5]:
+        raise HTTPException(status_code=400, detail="Calidad inválida. Use 1-5")
+    perfil = validar_perfil(solicitud.perfil)
+    
+    try:
+        job = jobs.submit(formato.lower(), solicitud.url, solicitud.calidad, perfil)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}")
+def estado_trabajo(job_id: str):
+    """Estado de un trabajo"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+def eventos_trabajo(job_id: str):
+    """
+    Progreso en vivo del trabajo (**Server-Sent Events**).
+    
+    Cada evento `progreso` trae el estado completo del trabajo, con el
+    último evento de progreso en `progreso` y los tiempos por fase en
+    `tiempos`. El stream se cierra cuando el trabajo termina.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    
+    def eventos():
+        version = -1
+        while True:
+            actual = jobs.wait_for_change(job, version, timeout=15)
+            if actual == version:
+                # Comentario SSE: mantiene viva la conexión en proxies
+                yield ": ping\n\n"
+                continue
+            version = actual
+            datos = json.dumps(job.to_dict(), ensure_ascii=False)
+            yield f"event: progreso\ndata: {datos}\n\n"
+            if job.state in FINISHED_STATES:
+                break
+    
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/jobs/{job_id}/result")
+def resultado_trabajo(job_id: str):
+    """Descarga el archivo de un trabajo terminado"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    if job.state != DONE:
+        raise HTTPException(status_code=409, detail=f"El trabajo no está listo (estado: {job.state})")
+    if not job.result_path or not job.result_path.exists():
+        raise HTTPException(status_code=410, detail="El resultado ya no está disponible")
+    
+    media_types = {".mp3": "audio/mpeg", ".mp4": "video/mp4", ".opus": "audio/ogg", ".m4a": "audio/mp4"}
+    return FileResponse(
+        job.result_path,
+        media_type=media_types.get(job.result_path.suffix, "application/octet-stream"),
+        filename=job.result_path.name
+    )
+
+@app.delete("/jobs/{job_id}")
+def cancelar_trabajo(job_id: str):
+    """Cancela un trabajo encolado o en curso"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    if job.state in FINISHED_STATES:
+        raise HTTPException(status_code=409, detail=f"El trabajo ya terminó (estado: {job.state})")
+    
+    jobs.cancel(job_id)
+    # En modo procesos get() devuelve una copia: releer el estado tras cancelar
+    return (jobs.get(job_id) or job).to_dict()
+
 @app.post("/debug/streams")
-def debug_streams(url: str):
+async def debug_streams(url: str):
     """
     Debug endpoint para ver streams disponibles
     """
     try:
-        streams = downloader.get_available_streams(url)
+        streams = await downloader_async.get_available_streams(url)
         
         print("\n===== STREAMS DISPONIBLES =====\n")
         for stream in streams:
@@ -167,13 +559,59 @@ def debug_streams(url: str):
             detail=f"Error obteniendo streams: {str(e)}"
         )
 
+@app.on_event("startup")
+def iniciar_trabajos():
+    """Crea el gestor de trabajos y retoma los pendientes del store"""
+    global jobs
+    if WORKER_MODE == "procesos":
+        # El servidor solo encola y lee estado; ffmpeg corre en los procesos worker
+        jobs = ProcessJobManager(JobStore(JOB_STORE), workers=WORKER_PROCESSES, max_queue=JOB_MAX_QUEUE)
+    else:
+        jobs = JobManager(downloader, workers=JOB_WORKERS, max_queue=JOB_MAX_QUEUE,
+                          store=JobStore(JOB_STORE))
+
 @app.on_event("shutdown")
 def cleanup_on_shutdown():
     """
-    Limpiar archivos temporales al cerrar la aplicación
+    Limpiar archivos temporales al cerrar la aplicación.
+    Los trabajos activos quedan en el store y sus parciales en temp/partials:
+    se retoman al volver a arrancar
     """
+    if jobs is not None:
+        jobs.shutdown()
+    if salidas is not None:
+        salidas.flush()
     downloader.cleanup()
 
+@app.on_event("shutdown")
+async def cerrar_cliente_async():
+    """Cierra las conexiones HTTP del core async"""
+    await downloader_async.aclose()
+
 
 if __name__ == "__main__":
-    uvicorn.run("main:app")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Servidor web de NdxYtConv")
+    parser.add_argument("--procesos", type=int, default=0,
+                        help="Procesos worker para las conversiones (0 = hilos dentro del servidor)")
+    parser.add_argument("--frontends", type=int, default=1,
+                        help="Procesos de uvicorn que atienden HTTP (más de 1 activa --procesos)")
+    args = parser.parse_args()
+    
+    # Varios frontends necesitan el estado compartido del modo procesos
+    if args.frontends > 1 and args.procesos <= 0:
+        args.procesos = DEFAULT_PROCESSES
+    
+    if args.procesos <= 0:
+        uvicorn.run("main:app")
+    else:
+        # Los frontends (procesos de uvicorn) heredan la configuración por entorno
+        os.environ.update(NDX_WORKER_MODE="procesos", NDX_WORKER_PROCESSES=str(args.procesos),
+                          NDX_JOB_STORE=JOB_STORE, NDX_FRONTENDS=str(args.frontends))
+        tier = launch_worker_tier(
+            args.procesos, JOB_STORE, profile=ENCODER_PROFILE,
+            threads=int(ENCODER_THREADS) if ENCODER_THREADS else None,
+            nice=int(ENCODER_NICE) if ENCODER_NICE else None)
+        try:
+            uvicorn.run("main:app", workers=args.frontends)
+        finally:
+            stop_worker_tier(tier)
\ No newline at end of file
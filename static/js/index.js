@@ -216,12 +216,10 @@ $(document).ready(function() {
 
     async function iniciarDescarga(url, formato, calidad) {
     const encodedUrl = encodeURIComponent(url);
-    let downloadUrl;
+    let preflightUrl = `http://127.0.0.1:8000/preflight?url=${encodedUrl}&formato=${formato}`;
 
-    if (formato === 'MP3') {
-        downloadUrl = `http://127.0.0.1:8000/conversion/mp3?url=${encodedUrl}`;
-    } else {
-        downloadUrl = `http://127.0.0.1:8000/conversion/mp4?url=${encodedUrl}&calidad=${calidad}`;
+    if (formato !== 'MP3') {
+        preflightUrl += `&calidad=${calidad}`;
     }
 
     const $btn = $btnDescargarDirecto;
@@ -231,27 +229,35 @@ $(document).ready(function() {
     $btn.prop('disabled', true);
 
     try {
-        const response = await fetch(downloadUrl, { method: 'GET' });
+        // Comprobación previa barata (solo manifiesto de streams, sin convertir)
+        const response = await fetch(preflightUrl, { method: 'GET' });
+        const data = await response.json().catch(() => ({}));
 
-        if (!response.ok) {
+        if (!response.ok || !data.disponible) {
             throw new Error('La calidad seleccionada no está disponible');
+        }
+
+        if (data.exacta === false && data.resolucion) {
+            mostrarAlerta(`<small>${data.solicitada} no disponible, se usará ${data.resolucion}</small>`, 'success');
+        }
+
+        // 👉 Encolar la conversión y seguir su progreso real (SSE)
+        const trabajo = await crearTrabajo(url, formato, calidad);
+        const final = await seguirProgreso(trabajo.job_id, $btn);
 
-            $seccionInfoVideo.hide();
-            $seccionPrincipal.show();            
+        if (final.estado !== 'done') {
+            throw new Error(final.error || 'La conversión no terminó');
         }
 
-        // 👉 Si existe, ahora sí descargar
+        // El navegador descarga el resultado del trabajo
         const link = document.createElement('a');
-        link.href = downloadUrl;
+        link.href = `http://127.0.0.1:8000/jobs/${final.job_id}/result`;
         link.style.display = 'none';
         document.body.appendChild(link);
         link.click();
         document.body.removeChild(link);
 
-        mostrarAlerta(
-                        'Descarga iniciada.<br><small>Por favor espera un momento…</small>',
-                        'success'
-                    );
+        mostrarAlerta('Descarga lista ✅', 'success');
 
 
     } catch (error) {
@@ -265,6 +271,62 @@ $(document).ready(function() {
     }
 }
 
+    // Encolar un trabajo de conversión (POST /jobs)
+    async function crearTrabajo(url, formato, calidad) {
+        const response = await fetch('http://127.0.0.1:8000/jobs', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ url, formato, calidad: formato === 'MP4' ? calidad : null })
+        });
+        const data = await response.json().catch(() => ({}));
+
+        if (response.status === 429) {
+            throw new Error('El servidor está ocupado, intenta en unos segundos');
+        }
+        if (!response.ok) {
+            throw new Error(data.detail || 'No se pudo iniciar la conversión');
+        }
+        return data;
+    }
+
+    // Seguir el progreso del trabajo hasta que termine (Server-Sent Events)
+    function seguirProgreso(jobId, $btn) {
+        const fases = {
+            resolve: 'Preparando',
+            download: 'Descargando',
+            encode: 'Convirtiendo',
+            tag: 'Etiquetando',
+            finalize: 'Terminando'
+        };
+
+        return new Promise((resolve, reject) => {
+            const eventos = new EventSource(`http://127.0.0.1:8000/jobs/${jobId}/events`);
+
+            eventos.addEventListener('progreso', (e) => {
+                const trabajo = JSON.parse(e.data);
+                const progreso = trabajo.progreso;
+
+                if (trabajo.estado === 'queued') {
+                    $btn.html('<span class="spinner-border spinner-border-sm"></span> En cola...');
+                } else if (progreso) {
+                    const fase = fases[progreso.fase] || 'Procesando';
+                    const porcentaje = progreso.porcentaje !== null ? ` ${Math.floor(progreso.porcentaje)}%` : '';
+                    $btn.html(`<span class="spinner-border spinner-border-sm"></span> ${fase}${porcentaje}`);
+                }
+
+                if (['done', 'error', 'cancelled'].includes(trabajo.estado)) {
+                    eventos.close();
+                    resolve(trabajo);
+                }
+            });
+
+            eventos.onerror = () => {
+                eventos.close();
+                reject(new Error('Se perdió la conexión con el servidor'));
+            };
+        });
+    }
+
 
 
     
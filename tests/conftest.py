@@ -0,0 +1,5 @@
+# tests/conftest.py - LOS TESTS IMPORTAN core/ DESDE LA RAÍZ DEL REPO
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
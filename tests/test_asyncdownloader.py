@@ -0,0 +1,94 @@
+# tests/test_asyncdownloader.py - CANCELAR UNA CONVERSIÓN ASYNC NO DEJA RESTOS
+import asyncio
+import functools
+import http.server
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from core.asyncdownloader import AsyncYouTubeDownloaderCore
+from core.downloader import YouTubeDownloaderCore, VideoContext, VideoInfo
+from core.workspace import process_alive
+
+# ffmpeg falso: anota su PID y se queda "codificando" hasta que lo maten
+FAKE_FFMPEG = """#!{python}
+import os, sys, time
+with open({pid_file!r}, "w") as f:
+    f.write(str(os.getpid()))
+time.sleep(60)
+"""
+
+
+@pytest.fixture
+def media_server(tmp_path):
+    """Sirve tmp_path/www/audio.webm por HTTP"""
+    www = tmp_path / "www"
+    www.mkdir()
+    (www / "audio.webm").write_bytes(os.urandom(256 * 1024))
+
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=str(www))
+    handler.log_message = lambda *args: None
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/audio.webm"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """Pone un ffmpeg falso al principio del PATH; devuelve el archivo con su PID"""
+    if os.name == "nt":
+        pytest.skip("ffmpeg falso como script ejecutable (POSIX)")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    pid_file = tmp_path / "ffmpeg.pid"
+    script = bin_dir / "ffmpeg"
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable, pid_file=str(pid_file)))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    return pid_file
+
+
+def test_cancel_mp3_kills_ffmpeg_and_removes_workspace(tmp_path, media_server, fake_ffmpeg):
+    core = YouTubeDownloaderCore(temp_dir=str(tmp_path / "temp"), use_cache=False)
+    # Sin ffmpeg real: no se sondean los codificadores
+    core._require_ffmpeg = lambda output_args=None: None
+
+    stream = SimpleNamespace(url=media_server, filesize=0, abr="160kbps",
+                             mime_type="audio/webm", itag=251, audio_codec="opus")
+    info = VideoInfo(title="Prueba", author="Canal", video_id="abcdefghijk", duration=180,
+                     views=0, thumbnail_url="", length_formatted="3:00", is_auto_generated=False)
+    ctx = VideoContext(url="https://youtu.be/abcdefghijk", yt=None, video_info=info)
+
+    async def scenario():
+        async with AsyncYouTubeDownloaderCore(core) as async_core:
+            async_core._select_mp3_audio = lambda ctx, video_info: (stream, "webm")
+            task = asyncio.ensure_future(async_core.download_mp3(
+                ctx, output_path=tmp_path / "salida.mp3", preserve_metadata=False))
+
+            # Esperar a que ffmpeg esté corriendo (la descarga ya terminó)
+            for _ in range(200):
+                if fake_ffmpeg.exists() and fake_ffmpeg.read_text():
+                    break
+                await asyncio.sleep(0.05)
+            else:
+                task.cancel()
+                pytest.fail("ffmpeg no llegó a arrancar")
+
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(scenario())
+
+    pid = int(fake_ffmpeg.read_text())
+    # process_alive también ve los zombis: el proceso se mató y se esperó
+    assert not process_alive(pid)
+    assert list(core.workspaces_dir.iterdir()) == []
+    assert not (tmp_path / "salida.mp3").exists()
@@ -0,0 +1,121 @@
+# tests/test_jobs.py - RECUPERACIÓN Y CIERRE DE TRABAJOS PERSISTENTES
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import pytest
+
+from core import jobs as jobs_module
+from core.jobs import Job, JobManager, QUEUED, RUNNING
+from core.jobstore import JobStore
+from core.segmented import DownloadCancelled
+
+
+# Core falso: la conversión solo espera (al cancel_event o a que el test la suelte)
+class FakeCore:
+    def __init__(self, honor_cancel: bool = True):
+        self.honor_cancel = honor_cancel
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def resolve(self, url):
+        return url
+
+    def get_video_info(self, video):
+        return video
+
+    def suggest_filename(self, video_info, extension, **kwargs):
+        return f"salida{extension}"
+
+    def download_mp3(self, video, output_path, cancel_event=None, **kwargs):
+        self.started.set()
+        if self.honor_cancel:
+            cancel_event.wait(10)
+            raise DownloadCancelled("Trabajo cancelado")
+        self.release.wait(10)
+        raise DownloadCancelled("Trabajo cancelado")
+
+
+# Funcion que inserta una fila running con el dueño indicado
+def add_running(store: JobStore, worker: str) -> str:
+    job = Job(id=uuid.uuid4().hex, kind="mp3", url=f"https://youtu.be/{worker}")
+    store.add(job)
+    store.claim(worker, job.id)
+    return job.id
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_recover_stale_only_keeps_live_owners(store, dead_pid):
+    live = add_running(store, f"hilos-{os.getppid()}")
+    live_worker = add_running(store, f"worker-{os.getppid()}-0")
+    dead = add_running(store, f"hilos-{dead_pid}")
+    dead_worker = add_running(store, f"worker-{dead_pid}-3")
+    # Mismo PID que este proceso: ejecución anterior (p. ej. PID 1 en un contenedor)
+    previous = add_running(store, f"hilos-{os.getpid()}")
+
+    requeued, failed = store.recover(max_attempts=3, stale_only=True)
+
+    assert (requeued, failed) == (3, 0)
+    assert store.get(live).state == RUNNING
+    assert store.get(live_worker).state == RUNNING
+    for job_id in (dead, dead_worker, previous):
+        job = store.get(job_id)
+        assert job.state == QUEUED
+        assert job.attempts == 1
+
+
+def test_manager_start_does_not_steal_live_jobs(store, tmp_path):
+    live = add_running(store, f"hilos-{os.getppid()}")
+
+    manager = JobManager(FakeCore(), workers=1, results_dir=str(tmp_path / "results"), store=store)
+    try:
+        assert store.get(live).state == RUNNING
+        assert manager.get(live).state == RUNNING
+    finally:
+        manager.shutdown()
+
+
+def test_shutdown_requeues_interrupted_job(store, tmp_path):
+    core = FakeCore(honor_cancel=True)
+    manager = JobManager(core, workers=1, results_dir=str(tmp_path / "results"), store=store)
+    job = manager.submit("mp3", "https://youtu.be/abcdefghijk")
+    assert core.started.wait(5)
+
+    manager.shutdown()
+
+    stored = store.get(job.id)
+    assert stored.state == QUEUED
+    assert stored.attempts == 0
+
+
+def test_shutdown_releases_job_that_ignores_cancel(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs_module, "SHUTDOWN_GRACE", 0.2)
+    core = FakeCore(honor_cancel=False)
+    manager = JobManager(core, workers=1, results_dir=str(tmp_path / "results"), store=store)
+    job = manager.submit("mp3", "https://youtu.be/abcdefghijk")
+    assert core.started.wait(5)
+
+    started = time.time()
+    manager.shutdown()
+
+    assert time.time() - started < 5
+    stored = store.get(job.id)
+    assert stored.state == QUEUED
+    assert stored.attempts == 0
+    core.release.set()
@@ -0,0 +1,83 @@
+# tests/test_outputcache.py - CACHÉ DE ARCHIVOS TERMINADOS
+import json
+
+from core import outputcache
+from core.outputcache import OutputCache
+
+
+# Funcion que crea un archivo de prueba con size bytes
+def make_file(path, size):
+    path.write_bytes(b"x" * size)
+    return path
+
+
+def test_disabled_cache_leaves_directory_untouched(tmp_path):
+    root = tmp_path / "cache"
+    root.mkdir()
+    stray = make_file(root / "otro.mp3", 10)
+    (root / OutputCache.INDEX_NAME).write_text('{"entries": []}', encoding="utf-8")
+
+    cache = OutputCache(root=str(root), max_bytes=0)
+
+    assert stray.exists()
+    assert cache.get(("mp3", "abc")) is None
+    assert cache.publish(("mp3", "abc"), make_file(tmp_path / "a.mp3", 10)) is None
+    assert stray.exists()
+
+
+def test_hits_do_not_rewrite_index(tmp_path, monkeypatch):
+    cache = OutputCache(root=str(tmp_path / "cache"), max_bytes=1000)
+    cache.publish("clave", make_file(tmp_path / "a.mp3", 10), "a.mp3")
+    cache.release("clave")
+
+    saves = []
+    original = cache._save_index
+    monkeypatch.setattr(cache, "_save_index", lambda: (saves.append(1), original()))
+
+    for _ in range(20):
+        assert cache.get("clave") is not None
+        cache.release("clave")
+    assert saves == []
+
+    # Pasado el intervalo se guarda una vez; flush() guarda lo pendiente
+    monkeypatch.setattr(outputcache, "INDEX_SAVE_INTERVAL", 0)
+    cache.get("clave")
+    cache.release("clave")
+    assert saves == [1]
+    cache.flush()
+    assert saves == [1]
+
+
+def test_flush_persists_last_access(tmp_path):
+    root = tmp_path / "cache"
+    cache = OutputCache(root=str(root), max_bytes=1000)
+    cache.publish("clave", make_file(tmp_path / "a.mp3", 10), "a.mp3")
+    cache.release("clave")
+
+    entry = cache.get("clave")
+    cache.release("clave")
+    cache.flush()
+
+    saved = json.loads((root / OutputCache.INDEX_NAME).read_text(encoding="utf-8"))["entries"]
+    assert saved[0]["last_access"] == entry.last_access
+    assert saved[0]["hits"] == 1
+
+
+def test_eviction_follows_in_memory_lru(tmp_path):
+    root = tmp_path / "cache"
+    cache = OutputCache(root=str(root), max_bytes=25)
+    for name in ("a", "b"):
+        cache.publish(name, make_file(tmp_path / f"{name}.mp3", 10), f"{name}.mp3")
+        cache.release(name)
+
+    # "a" se usó hace menos que "b": al publicar "c" sale "b"
+    cache.get("a")
+    cache.release("a")
+    cache.publish("c", make_file(tmp_path / "c.mp3", 10), "c.mp3")
+    cache.release("c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+    saved = json.loads((root / OutputCache.INDEX_NAME).read_text(encoding="utf-8"))["entries"]
+    assert len(saved) == 2
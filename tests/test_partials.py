@@ -0,0 +1,57 @@
+# tests/test_partials.py - LOCKS DE DESCARGAS PARCIALES (REANUDAR TRAS UN CRASH)
+import os
+import subprocess
+import sys
+
+from core.downloader import YouTubeDownloaderCore
+
+
+# Funcion que devuelve el PID de un proceso que ya terminó
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def make_core(tmp_path) -> YouTubeDownloaderCore:
+    return YouTubeDownloaderCore(temp_dir=str(tmp_path / "temp"), use_cache=False, resumable=True)
+
+
+def write_lock(core, pid: int):
+    core.partials_dir.mkdir(parents=True, exist_ok=True)
+    lock = core.partials_dir / "abcdefghijk_251.part.lock"
+    lock.write_text(str(pid), encoding="utf-8")
+    return lock
+
+
+def test_lock_of_dead_process_is_taken_over(tmp_path):
+    core = make_core(tmp_path)
+    lock = write_lock(core, dead_pid())
+
+    partial = core._acquire_partial("abcdefghijk", 251)
+
+    assert partial == core.partials_dir / "abcdefghijk_251.part"
+    assert lock.read_text(encoding="utf-8") == str(os.getpid())
+
+
+def test_lock_of_live_process_is_respected(tmp_path):
+    core = make_core(tmp_path)
+    with subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"]) as owner:
+        try:
+            write_lock(core, owner.pid)
+            assert core._acquire_partial("abcdefghijk", 251) is None
+        finally:
+            owner.kill()
+
+
+def test_reclaim_removes_partials_locked_by_dead_process(tmp_path):
+    core = make_core(tmp_path)
+    write_lock(core, dead_pid())
+    partial = core.partials_dir / "abcdefghijk_251.part"
+    partial.write_bytes(b"x" * 1024)
+
+    # Sin límite de tamaño ni antigüedad: solo cuenta el lock
+    removed = core.reclaim_partials(max_age_hours=0, max_total_mb=1024)
+
+    assert removed == 1
+    assert not partial.exists()
@@ -0,0 +1,159 @@
+# tests/test_segmented.py - DESCARGA SEGMENTADA CONTRA UN SERVIDOR RANGE LOCAL
+import functools
+import http.server
+import os
+import re
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+from core import segmented
+from core.segmented import SegmentedDownloader, RangeJournal, split_ranges
+
+CHUNK = 64 * 1024
+SIZE = 5 * CHUNK + 1234
+
+
+# Servidor GET con Range: bytes=a-b (como benchmarks/bench_pipeline.py) que puede fallar a propósito
+class FlakyRangeHandler(http.server.SimpleHTTPRequestHandler):
+    """Corta a la mitad la primera respuesta de cada inicio en `truncate` y responde 503 a `fail`"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        size = os.path.getsize(path)
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        start = int(match.group(1))
+        end = min(int(match.group(2) or size - 1), size - 1)
+
+        server = self.server
+        with server.lock:
+            server.requests.append((start, end))
+            if start in server.fail:
+                server.fail.discard(start)
+                self.send_error(503)
+                return
+            truncate = start in server.truncate
+            server.truncate.discard(start)
+
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        with open(path, "rb") as source:
+            source.seek(start)
+            length = end - start + 1
+            # Respuesta cortada: solo la mitad de los bytes anunciados
+            self.wfile.write(source.read(length // 2 if truncate else length))
+        if truncate:
+            self.close_connection = True
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Sirve tmp_path/www/media.bin con bytes aleatorios"""
+    www = tmp_path / "www"
+    www.mkdir()
+    payload = os.urandom(SIZE)
+    (www / "media.bin").write_bytes(payload)
+
+    handler = functools.partial(FlakyRangeHandler, directory=str(www))
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    httpd.fail = set()
+    httpd.truncate = set()
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/media.bin"
+    httpd.payload = payload
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    # Los reintentos no esperan en los tests; lecturas pequeñas para escribir respuestas cortadas
+    monkeypatch.setattr(segmented.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(segmented, "READ_SIZE", 4096)
+
+
+def test_split_ranges_covers_file_without_completed():
+    ranges = split_ranges(SIZE, CHUNK, completed=[(CHUNK, 2 * CHUNK - 1)])
+    assert ranges[0] == (0, CHUNK - 1)
+    assert (CHUNK, 2 * CHUNK - 1) not in ranges
+    assert ranges[-1][1] == SIZE - 1
+    covered = sum(end - start + 1 for start, end in ranges)
+    assert covered == SIZE - CHUNK
+
+
+def test_download_reassembles_file(server, tmp_path):
+    destination = tmp_path / "media.part"
+    received = []
+    downloader = SegmentedDownloader(connections=4, chunk_size=CHUNK, on_bytes=received.append)
+
+    downloader.download(server.url, destination, SIZE)
+
+    assert destination.read_bytes() == server.payload
+    assert sum(received) == SIZE
+    assert len(server.requests) == len(split_ranges(SIZE, CHUNK))
+
+
+def test_download_retries_failed_and_truncated_ranges(server, tmp_path):
+    destination = tmp_path / "media.part"
+    server.fail.add(0)
+    server.truncate.add(2 * CHUNK)
+    downloader = SegmentedDownloader(connections=3, chunk_size=CHUNK)
+
+    downloader.download(server.url, destination, SIZE)
+
+    assert destination.read_bytes() == server.payload
+    # El 503 se repite desde el inicio del rango
+    assert [r for r in server.requests if r == (0, CHUNK - 1)] == [(0, CHUNK - 1)] * 2
+    # El corte sigue desde lo ya escrito, no vuelve a pedir el rango entero
+    resumed = [start for start, end in server.requests if 2 * CHUNK < start < 3 * CHUNK]
+    assert resumed == [2 * CHUNK + CHUNK // 2]
+
+
+def test_download_gives_up_after_max_retries(server, tmp_path):
+    server.fail.add(0)
+    downloader = SegmentedDownloader(connections=2, chunk_size=CHUNK, max_retries=0)
+
+    with pytest.raises(Exception, match="Rango 0-"):
+        downloader.download(server.url, tmp_path / "media.part", SIZE)
+
+
+def test_download_resumes_from_journal(server, tmp_path):
+    destination = tmp_path / "media.part"
+    journal = RangeJournal(tmp_path / "media.part.json", SIZE)
+    SegmentedDownloader(connections=2, chunk_size=CHUNK).download(
+        server.url, destination, SIZE, journal)
+
+    # Un intento anterior dejó hechos los dos primeros rangos
+    journal.completed = [(0, CHUNK - 1), (CHUNK, 2 * CHUNK - 1)]
+    journal._save()
+    server.requests.clear()
+    SegmentedDownloader(connections=2, chunk_size=CHUNK).download(
+        server.url, destination, SIZE, RangeJournal(journal.path, SIZE))
+
+    assert destination.read_bytes() == server.payload
+    assert all(start >= 2 * CHUNK for start, end in server.requests)
+
+
+def test_global_connection_limit(monkeypatch):
+    monkeypatch.setattr(segmented, "_global_slots", segmented._global_slots)
+    monkeypatch.setattr(segmented, "GLOBAL_MAX_CONNECTIONS", segmented.GLOBAL_MAX_CONNECTIONS)
+
+    segmented.set_global_connection_limit(2)
+    assert segmented.GLOBAL_MAX_CONNECTIONS == 2
+    assert segmented._global_slots.acquire(blocking=False)
+    assert segmented._global_slots.acquire(blocking=False)
+    assert not segmented._global_slots.acquire(blocking=False)
+    segmented._global_slots.release()
+    segmented._global_slots.release()
@@ -0,0 +1,79 @@
+# tests/test_singleflight.py - CONVERSIONES COMPARTIDAS Y SUS REFERENCIAS
+import asyncio
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+def test_cancelled_waiter_drops_its_reference():
+    released = []
+    flight = SingleFlight(on_release=released.append)
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def producer():
+            await gate.wait()
+            return "archivo.mp3"
+
+        leader = asyncio.ensure_future(flight.acquire_async("clave", producer))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.acquire_async("clave", producer))
+        await asyncio.sleep(0.05)
+
+        # El cliente del segundo consumidor se desconecta mientras espera
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        gate.set()
+        assert await leader == "archivo.mp3"
+        assert flight.executions == 1
+
+        # Solo queda la referencia del líder: su release limpia el resultado
+        flight.release("clave")
+
+    asyncio.run(scenario())
+
+    assert flight.active() == 0
+    assert released == ["archivo.mp3"]
+
+
+def test_cancelled_waiter_after_failed_leader_does_not_touch_retry():
+    released = []
+    flight = SingleFlight(on_release=released.append)
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def failing():
+            await gate.wait()
+            raise RuntimeError("falló")
+
+        async def producer():
+            return "reintento.mp3"
+
+        leader = asyncio.ensure_future(flight.acquire_async("clave", failing))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.acquire_async("clave", failing))
+        await asyncio.sleep(0)
+
+        gate.set()
+        with pytest.raises(RuntimeError):
+            await leader
+
+        # Un reintento crea un vuelo nuevo con la misma clave
+        assert await flight.acquire_async("clave", producer) == "reintento.mp3"
+
+        waiter.cancel()
+        with pytest.raises((asyncio.CancelledError, RuntimeError)):
+            await waiter
+
+        assert flight.active() == 1
+        flight.release("clave")
+
+    asyncio.run(scenario())
+
+    assert flight.active() == 0
+    assert released == ["reintento.mp3"]